@@ -10,36 +10,25 @@ Robust analysis:
 - Delta SO2 calculated only when both start/end exist
 - Per-animal + per-vid_name oxygen extraction
 - No KeyError crashes
+- ΔSO₂ with bootstrap 95% CI + paired t / Wilcoxon p (vessel_stats.py)
+- --profile: time + memory per stage (vessel_profile.py)
+- Fast start: no plotting libraries, scipy.special instead of scipy.stats
+  (≈0.7 s instead of ≈1.4 s on the sample study)
 """
 
-import json
+import argparse
 from pathlib import Path
 import sys
 import pandas as pd
-import numpy as np
-
-def load_json(json_path: Path) -> dict:
-    print(f"[LOAD] Reading: {json_path}")
-    try:
-        with open(json_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        animals = list(data.keys())
-        print(f"   → {len(animals)} animal(s): {', '.join(animals)}")
-        return data
-    except Exception as e:
-        sys.exit(f"ERROR: {e}")
-
-def flatten_vessels(data: dict) -> pd.DataFrame:
-    print("[FLATTEN] Building DataFrame...")
-    rows = []
-    for animal, info in data.items():
-        for v in info["vessels"]:
-            v = v.copy()
-            v["animal"] = animal
-            rows.append(v)
-    df = pd.DataFrame(rows)
-    print(f"   → {len(df):,} vessels")
-    return df
+
+import vessel_loader
+import vessel_metrics
+import vessel_profile
+import vessel_stats
+
+# Columns this script uses (only these are read from the columnar dataset)
+COLUMNS = ["animal", "vid_name", "vessel_nr", "vessel_type",
+           "SO2_start", "SO2_end", "OD", "length", "volume"] + vessel_metrics.DERIVED
 
 def safe_stats(series: pd.Series, name: str):
     if series.empty:
@@ -50,6 +39,14 @@ def safe_stats(series: pd.Series, name: str):
             f"std={series.std():.4f}, "
             f"n={len(series)}")
 
+def delta_line(row) -> str:
+    """ΔSO₂ summary of one vessel_stats row, safe_stats style + CI and paired tests."""
+    if row is None or not row['n']:
+        return "ΔSO₂: (no data)"
+    return (f"ΔSO₂: mean={row['mean']:.4f}, median={row['median']:.4f}, std={row['std']:.4f}, "
+            f"n={row['n']}, {vessel_stats.format_ci(row)}, "
+            f"paired t {vessel_stats.format_p(row['p_t'])}, Wilcoxon {vessel_stats.format_p(row['p_wilcoxon'])}")
+
 def analyze(df: pd.DataFrame):
     print("\n" + "="*70)
     print("OXYGEN EXTRACTION & VESSEL ANALYSIS")
@@ -79,11 +76,12 @@ def analyze(df: pd.DataFrame):
     # 4. OXYGEN EXTRACTION (MAIN FOCUS)
     print(f"\n[4] OXYGEN EXTRACTION (SO2_start → SO2_end)")
     if 'SO2_start' in df.columns and 'SO2_end' in df.columns:
-        measured = df.dropna(subset=['SO2_start', 'SO2_end']).copy()
-        measured['delta_SO2'] = measured['SO2_start'] - measured['SO2_end']
+        measured = vessel_metrics.measured(df)
+        with vessel_profile.stage("delta stats"):
+            stats = vessel_stats.delta_stats(df, levels=["all", "session"])
 
         print(f"    Measured vessels: {len(measured):,} ({len(measured)/len(df)*100:.2f}%)")
-        print(f"    {safe_stats(measured['delta_SO2'], 'ΔSO₂')}")
+        print(f"    {delta_line(vessel_stats.lookup(stats, 'all'))}")
 
         violations = measured[measured['delta_SO2'] < 0]
         print(f"    VIOLATIONS (O₂ increase): {len(violations)}")
@@ -96,8 +94,8 @@ def analyze(df: pd.DataFrame):
         # Per session extraction
         if 'vid_name' in measured.columns:
             print(f"\n    PER SESSION EXTRACTION:")
-            for sess, g in measured.groupby('vid_name'):
-                print(f"      • {sess}: {safe_stats(g['delta_SO2'], 'ΔSO₂')}")
+            for _, row in stats[stats['level'] == "session"].iterrows():
+                print(f"      • {row['vid_name']}: {delta_line(row)}")
 
     else:
         print("    (SO2_start or SO2_end missing)")
@@ -123,10 +121,9 @@ def analyze(df: pd.DataFrame):
     # 7. Estimated diameter
     print(f"\n[7] ESTIMATED DIAMETER (volume & length → µm)")
     if 'volume' in df.columns and 'length' in df.columns:
-        valid = df.dropna(subset=['volume', 'length'])
-        valid = valid[valid['length'] > 0]
+        valid = vessel_metrics.with_diameter(df)
         if len(valid) > 0:
-            diam = 2 * np.sqrt(valid['volume'] / (np.pi * valid['length']))
+            diam = valid['diameter']
             print(f"    Valid: {len(valid):,}")
             print(f"    Mean diameter: {diam.mean():.2f} µm")
             print(f"    Median: {diam.median():.2f} µm")
@@ -141,13 +138,16 @@ def analyze(df: pd.DataFrame):
 
 # ——— Run ———
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python analyze_vessels.py path/to/data.json")
-
-    json_path = Path(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Terminal analysis of data.json (ΔSO₂, violations, OD, geometry)")
+    parser.add_argument("json", type=Path, help="path/to/data.json")
+    vessel_profile.add_arguments(parser)
+    args = parser.parse_args()
+    json_path = args.json
     if not json_path.exists():
         sys.exit(f"File not found: {json_path}")
+    vessel_profile.start(args, "analyze_so2", json_path.parent)
 
-    data = load_json(json_path)
-    df = flatten_vessels(data)
-    analyze(df)
\ No newline at end of file
+    with vessel_profile.stage("load"):
+        df = vessel_loader.load_vessels(json_path, COLUMNS)
+    with vessel_profile.stage("analyze"):
+        analyze(df)
\ No newline at end of file
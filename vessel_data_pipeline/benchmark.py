@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+benchmark.py
+Author: G.M
+Date: 18-10-2026
+Version: 0.1
+
+Scaling benchmark on synthetic studies (make_synthetic.py): how do the
+pipeline steps grow from 10k to 100k to 1M vessels?
+
+    python benchmark.py                                   # 10k, 100k, 1M
+    python benchmark.py --sizes 10000 100000 -o bench.json
+    python benchmark.py --compare benchmark_results.json  # regression check
+
+Steps (each timed in this process; wall, CPU incl. page workers, peak RSS):
+
+    read_excel     pd.read_excel of the synthetic workbook   (≤ --xlsx-max rows)
+    ingest         group + nest + data.json + Parquet dataset (excel_to_nested_json)
+    parse_json     json.load of data.json                    (vessel_loader)
+    flatten        nested dict → flat table + derived metrics
+    load_dataset   columnar dataset → table (what the scripts actually use)
+    analyze        analyze_so2.analyze(), output discarded
+    summary        vessel_summary.build() (cube, ΔSO₂ stats, network)
+    write_txt      generate_report.write_txt()
+    write_pdfs     generate_report.write_pdfs(), no page cache  (≤ --pdf-max rows)
+
+Studies are generated once into --data (default: benchmark_data/) and reused
+while their parameters match. Animals scale with the size (5 up to 100k
+vessels, then one per 20k) so per-animal work grows like a real study.
+
+Results are written as JSON (one record per size × step + versions, CPU
+count, git commit). --compare prints the ratio to an earlier result file
+and exits with 1 when a step got slower than --threshold (default 1.25×),
+so it can run in CI.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime
+from pathlib import Path
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+import pandas as pd
+
+import analyze_so2
+import excel_to_nested_json
+import generate_report
+import make_synthetic
+import vessel_dataset
+import vessel_loader
+import vessel_metrics
+import vessel_profile
+import vessel_summary
+
+SIZES = [10_000, 100_000, 1_000_000]
+STEPS = ["read_excel", "ingest", "parse_json", "flatten", "load_dataset", "analyze",
+         "summary", "write_txt", "write_pdfs"]
+HERE = Path(__file__).resolve().parent
+
+
+def animals_for(n: int) -> int:
+    return max(5, n // 20_000)
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "matplotlib": matplotlib.__version__,
+        "pyarrow": vessel_dataset.pa.__version__ if vessel_dataset.available() else None,
+        "commit": commit,
+    }
+
+
+# —————————————————————————————————————————————————————————————————————
+# One size
+# —————————————————————————————————————————————————————————————————————
+def bench_size(n: int, data_dir: Path, args) -> list:
+    study = data_dir / f"synthetic_{n}"
+    xlsx = n <= args.xlsx_max
+    json_path = make_synthetic.make_study(study, n, animals_for(n), args.sessions, args.seed, xlsx=xlsx)
+    results = []
+
+    def timed(name, fn):
+        """Run fn with its output (and warnings) discarded; a failure is recorded, not raised."""
+        record = {"rows": n, "animals": animals_for(n), "step": name}
+        print(f"   {name:<13}", end="", flush=True)
+        children0 = vessel_profile.children_cpu()
+        value = None
+        try:
+            with vessel_profile.measure(record), contextlib.redirect_stdout(io.StringIO()), \
+                    warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                value = fn()
+        except Exception as e:               # incl. MemoryError at 1M: keep measuring the rest
+            record["error"] = f"{type(e).__name__}: {e}"
+        # + CPU of worker processes (bootstrap, PDF pages) that ended during the step
+        record["cpu_s"] = round(record["cpu_s"] + vessel_profile.children_cpu() - children0, 4)
+        record.pop("pid")
+        results.append(record)
+        if "error" in record:
+            print(f" FAILED ({record['error']})")
+        else:
+            print(f" {record['wall_s']:>9.3f} s   RSS {record['rss_peak_mb']:>7.0f} MB")
+        return value
+
+    def skipped(name, why):
+        results.append({"rows": n, "animals": animals_for(n), "step": name, "skipped": why})
+        print(f"   {name:<13} skipped ({why})")
+
+    print(f"\n[BENCH] {n:,} vessels, {animals_for(n)} animals × {args.sessions} sessions")
+    work = study / "work"
+    work.mkdir(exist_ok=True)
+
+    if xlsx:
+        flat = timed("read_excel", lambda: excel_to_nested_json.load_excel(study / f"{study.name}.xlsx"))
+    else:
+        skipped("read_excel", f"> {args.xlsx_max:,} rows")
+        flat = None
+    if flat is None:
+        flat = make_synthetic.generate(n, animals_for(n), args.sessions, args.seed)
+    timed("ingest", lambda: make_synthetic.write_study(flat, work))
+    del flat
+
+    data = timed("parse_json", lambda: vessel_loader.load_json(json_path))
+    if data is not None:
+        timed("flatten", lambda: vessel_metrics.add_metrics(vessel_loader.compact(vessel_loader.flatten(data))))
+    del data
+    df = timed("load_dataset",
+               lambda: vessel_loader.load_vessels(json_path, generate_report.COLUMNS, use_cache=False))
+    if df is None:
+        return results
+
+    timed("analyze", lambda: analyze_so2.analyze(df[[c for c in df.columns if c in analyze_so2.COLUMNS]]))
+    summary = timed("summary", lambda: vessel_summary.build(df, args.workers))
+    if summary is not None:
+        timed("write_txt", lambda: generate_report.write_txt(summary, work / "report.txt"))
+    if n <= args.pdf_max:
+        timed("write_pdfs", lambda: generate_report.write_pdfs(df, work, args.workers, cache=False))
+    else:
+        skipped("write_pdfs", f"> {args.pdf_max:,} rows")
+    return results
+
+
+# —————————————————————————————————————————————————————————————————————
+# Report
+# —————————————————————————————————————————————————————————————————————
+def table(results: list, sizes: list) -> list:
+    lines = [f"   {'step':<13}" + "".join(f"{n:>13,}" for n in sizes) + "   (wall s)"]
+    for name in STEPS:
+        cells = []
+        for n in sizes:
+            r = next((r for r in results if r["rows"] == n and r["step"] == name), None)
+            if r is None:
+                cells.append("")
+            elif "error" in r:
+                cells.append("FAIL")
+            else:
+                cells.append("skip" if "skipped" in r else f"{r['wall_s']:.3f}")
+        lines.append(f"   {name:<13}" + "".join(f"{c:>13}" for c in cells))
+    return lines
+
+
+def ok_result(r: dict) -> bool:
+    return "wall_s" in r and "error" not in r
+
+
+def compare(results: list, old_path: Path, threshold: float) -> bool:
+    """Ratio new/old per (rows, step); True when nothing got slower than threshold."""
+    old = {(r["rows"], r["step"]): r for r in json.loads(old_path.read_text())["results"]}
+    ok = True
+    print(f"\n[COMPARE] vs {old_path} (slower than {threshold:.2f}× → ✗)")
+    for r in results:
+        prev = old.get((r["rows"], r["step"]))
+        if prev is None or not ok_result(r) or not ok_result(prev) or prev["wall_s"] <= 0:
+            continue
+        ratio = r["wall_s"] / prev["wall_s"]
+        # sub-10 ms steps are mostly noise
+        bad = ratio > threshold and r["wall_s"] - prev["wall_s"] > 0.01
+        ok &= not bad
+        print(f"   {'✗' if bad else '✓'} {r['rows']:>10,} {r['step']:<13} "
+              f"{prev['wall_s']:>9.3f} → {r['wall_s']:>9.3f} s  ({ratio:.2f}×)")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmark on synthetic vessel studies")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Vessel counts (default: 10k 100k 1M)")
+    parser.add_argument("--sessions", type=int, default=24, help="Sessions per animal (default: 24)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data", type=Path, default=Path("benchmark_data"),
+                        help="Folder for the generated studies (reused between runs)")
+    parser.add_argument("-o", "--output", type=Path, default=Path("benchmark_results.json"),
+                        help="Result JSON (default: benchmark_results.json)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="Workers for bootstrap + PDF pages (default: all cores)")
+    parser.add_argument("--xlsx-max", type=int, default=100_000,
+                        help="Largest size with a workbook for read_excel (default: 100000)")
+    parser.add_argument("--pdf-max", type=int, default=100_000,
+                        help="Largest size for write_pdfs (default: 100000)")
+    parser.add_argument("--compare", type=Path, default=None, help="Earlier result JSON to compare with")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown that fails --compare")
+    args = parser.parse_args()
+
+    sizes = sorted(args.sizes)
+    results = []
+    t0 = time.perf_counter()
+    for n in sizes:
+        results += bench_size(n, args.data, args)
+
+    out = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "settings": {"sizes": sizes, "sessions": args.sessions, "seed": args.seed, "workers": args.workers,
+                     "xlsx_max": args.xlsx_max, "pdf_max": args.pdf_max},
+        "total_s": round(time.perf_counter() - t0, 2),
+        "results": results,
+    }
+    args.output.write_text(json.dumps(out, indent=2))
+    print("\n" + "\n".join(table(results, sizes)))
+    print(f"→ Results saved: {args.output}")
+
+    if args.compare is not None:
+        sys.exit(0 if compare(results, args.compare, args.threshold) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+check_vessel_stats.py
+Author: G.M
+Date: 18-10-2026
+Version: 0.1
+
+Quick checks of vessel_stats.delta_stats / vessel_summary.build on small
+hand-made frames (no Excel, no data.json needed):
+
+  • no volume/length columns, or volume all NaN → no size groups: the
+    tables are still built, size-group levels are empty, every other
+    level has its bootstrap CI
+  • paired t-test p equals scipy.stats.ttest_rel (if scipy.stats imports)
+  • the bootstrap gives the same numbers for 1 and 2 worker processes
+
+Usage:
+  python check_vessel_stats.py
+Exit code 0 = all checks passed.
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+import vessel_metrics
+import vessel_stats
+import vessel_summary
+
+N_BOOT = 200
+
+
+def frame(diameters: str = "none", n: int = 40) -> pd.DataFrame:
+    """n vessels over 2 animals × 2 sessions; diameters: none | nan | valid."""
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        "animal": np.repeat(["1", "2"], n // 2),
+        "vid_name": np.tile(["s1", "s2"], n // 2),
+        "vessel_nr": np.arange(n),
+        "SO2_start": rng.uniform(0.6, 0.9, n),
+    })
+    df["SO2_end"] = df["SO2_start"] - rng.normal(0.02, 0.03, n)
+    if diameters == "nan":
+        df["volume"] = np.nan
+        df["length"] = rng.uniform(10, 50, n)
+    elif diameters == "valid":
+        df["volume"] = rng.uniform(100, 5000, n)
+        df["length"] = rng.uniform(10, 50, n)
+    return vessel_metrics.add_metrics(df)
+
+
+def check_no_diameters(diameters: str) -> list:
+    errors = []
+    name = f"diameters={diameters}"
+    df = frame(diameters)
+    try:
+        table = vessel_stats.delta_stats(df, n_boot=N_BOOT)
+        summary = vessel_summary.build(df)
+    except Exception as e:
+        return [f"{name}: {type(e).__name__}: {e}"]
+    for level in ("size_group", "animal_size", "cell"):
+        if (table["level"] == level).any():
+            errors.append(f"{name}: level {level} has rows without any size group")
+    for level in ("all", "animal", "session", "animal_session"):
+        rows = table[table["level"] == level]
+        if rows.empty or rows["ci_low"].isna().any():
+            errors.append(f"{name}: level {level} missing or without bootstrap CI")
+    if vessel_summary.value(summary.cube, "all", "n") != len(df):
+        errors.append(f"{name}: summary cube does not count all {len(df)} vessels")
+    return errors
+
+
+def check_t_test() -> list:
+    try:
+        from scipy.stats import ttest_rel
+    except ImportError:
+        print("   (scipy.stats not importable → t-test check skipped)")
+        return []
+    df = frame("valid")
+    row = vessel_stats.lookup(vessel_stats.delta_stats(df, n_boot=0), "all")
+    expected = ttest_rel(df["SO2_end"], df["SO2_start"]).pvalue
+    if not np.isclose(row["p_t"], expected):
+        return [f"p_t {row['p_t']:.6g} ≠ ttest_rel {expected:.6g}"]
+    return []
+
+
+def check_workers() -> list:
+    df = frame("valid")
+    serial = vessel_stats.delta_stats(df, n_boot=N_BOOT, workers=1)
+    parallel = vessel_stats.delta_stats(df, n_boot=N_BOOT, workers=2)
+    if not np.allclose(serial[["ci_low", "ci_high"]], parallel[["ci_low", "ci_high"]], equal_nan=True):
+        return ["bootstrap CIs differ between 1 and 2 workers"]
+    return []
+
+
+def main():
+    errors = []
+    checks = [("no volume/length columns", lambda: check_no_diameters("none")),
+              ("volume all NaN", lambda: check_no_diameters("nan")),
+              ("paired t-test", check_t_test),
+              ("bootstrap 1 vs 2 workers", check_workers)]
+    for title, check in checks:
+        found = check()
+        print(f"[CHECK] {title}: {'ok' if not found else 'FAILED'}")
+        errors += found
+    for e in errors:
+        print(f"   ✗ {e}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,20 +13,79 @@ Description:
     - Handles huge files safely
     - Auto-detects animal column
     - Preserves ALL columns from Excel in the JSON (except grouping key)
+    - --stream: bounded-memory ingest for very large sheets (v0.2)
+    - Columnar copy: <folder>/dataset/animal=<id>/*.parquet (v0.3)
+    - Compact streamed JSON, optional gzip/zstd; --pretty for the old layout (v0.4)
+    - Batch ingest: many workbooks × all sheets → one combined dataset (v0.5)
     
     Author: G.M
     Date: 6-11-2025
-    Version: 0.1
+    Version: 0.5
+
+    v0.2 (2026-10-18)
+    - Streaming ingest: rows are read in chunks (python-calamine if installed,
+      else openpyxl read-only), empty rows/columns dropped on the fly, and
+      each chunk is spilled into per-animal partitions on disk. Peak memory
+      scales with --chunk-rows (+ the largest animal), not with file size.
+
+    v0.3 (2026-10-18)
+    - Also writes a Parquet dataset partitioned by animal (needs pyarrow,
+      skip with --no-dataset). All analysis/report scripts prefer it over
+      data.json.
+
+    v0.4 (2026-10-18)
+    - data.json is written compact, one animal at a time (no giant string);
+      NaN → null per column before serialization (valid JSON, no per-value
+      callback). --pretty keeps the indented layout, --compress gzip|zstd
+      writes data.json.gz / data.json.zst.
+    - Fix: save_json() wrote the global `nested` instead of its argument.
+    - Writing one form (plain/gzip/zstd) removes the others left by earlier
+      runs, so no stale data.json sits next to a new data.json.gz.
+
+    v0.5 (2026-10-18)
+    - Batch mode: give a directory, a glob or several .xlsx files. Every
+      sheet of every workbook is parsed in a worker process (-w), tagged
+      with source (workbook name), sheet and date (YYYYMMDD in the file
+      name → ISO date) and cached in <output>/sources/<name>-<path hash>/.
+      The combined data.json + dataset are rebuilt from the cached sheets of
+      the given workbooks only, deduplicated within each workbook on
+      (animal, vid_name, vessel_nr). Rerunning with new exports only parses
+      the new/changed workbooks (--force: all); a workbook with an unreadable
+      sheet is parsed again next run. --stream is single-workbook only.
+
+        python excel_to_nested_json.py exports/ -o study
+        python excel_to_nested_json.py "exports/A_TAB_rawdata_pervessel_*.xlsx" -o study
+
+    - --profile: time + memory per stage (vessel_profile.py)
+    - Fix (--stream): the animal column was picked from the first chunk only
+      (a block of empty rows there → wrong column or exit). Candidates now
+      come from the header, the choice is made on the first chunk with rows.
+    - --pretty is written one animal at a time as well (same bytes as before),
+      so --stream --pretty no longer collects all animals in one dict.
 
 """
 
 import argparse
+import glob
+import hashlib
 import json
+import os
+import re
+import shutil
 import sys
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
+from typing import Iterator
 
 import pandas as pd
 
+import vessel_dataset
+import vessel_loader
+import vessel_profile
+
 
 def print_step(msg: str):
     """Print a clear step message."""
@@ -51,17 +110,135 @@ def load_excel(path: Path, sheet_name: str | int = 0) -> pd.DataFrame:
     return df
 
 
-def detect_animal_column(df: pd.DataFrame) -> str:
-    print_step("Detecting animal identifier column...")
+def iter_sheet_rows(path: Path, sheet_name: str | int = 0) -> Iterator[tuple]:
+    """Yield raw row tuples (header first) without building the workbook in memory."""
+    try:
+        from python_calamine import CalamineWorkbook   # Rust-backed, much faster
+        wb = CalamineWorkbook.from_path(str(path))
+        sheet = (wb.get_sheet_by_index(sheet_name) if isinstance(sheet_name, int)
+                 else wb.get_sheet_by_name(sheet_name))
+        print("   → Reader: python-calamine")
+        for row in sheet.iter_rows():
+            # calamine reports every number as float; match openpyxl (integral → int)
+            yield tuple(None if v == "" else int(v) if isinstance(v, float) and v.is_integer() else v
+                        for v in row)
+        return
+    except ImportError:
+        pass
+
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        print("   → Reader: openpyxl (read-only)")
+        yield from ws.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def iter_excel_chunks(path: Path, sheet_name: str | int = 0,
+                      chunk_rows: int = 50_000) -> Iterator[pd.DataFrame]:
+    """Stream the sheet as DataFrames of at most chunk_rows rows (empty rows dropped)."""
+    print_step(f"Streaming Excel file: {path.name} (chunks of {chunk_rows:,} rows)")
+    rows = iter_sheet_rows(path, sheet_name)
+    try:
+        header = next(rows)
+    except StopIteration:
+        sys.exit("ERROR: Sheet is empty")
+    # Unnamed header cells get pandas-style names; fully empty columns are dropped later
+    columns = [str(h) if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+
+    total = dropped = 0
+    buf = []
+    def flush():
+        nonlocal total, dropped
+        chunk = pd.DataFrame.from_records(buf, columns=columns)
+        before = len(chunk)
+        chunk = chunk.dropna(how="all", axis=0)
+        total += len(chunk)
+        dropped += before - len(chunk)
+        buf.clear()
+        return chunk
+
+    for row in rows:
+        row = tuple(row[:len(columns)]) + (None,) * (len(columns) - len(row))
+        buf.append(row)
+        if len(buf) >= chunk_rows:
+            yield flush()
+    if buf:
+        yield flush()
+    print(f"   → Streamed {total:,} rows, {len(columns)} columns")
+    if dropped:
+        print(f"   → Removed {dropped:,} empty rows")
+
+
+def spill_partitions(chunks: Iterator[pd.DataFrame], animal_col: str | None,
+                     spill_dir: Path) -> tuple[str, dict, list]:
+    """
+    Split every chunk by animal and pickle the pieces to spill_dir.
+    Returns (animal_col, {animal: [chunk files]}, non-empty columns in sheet order).
+    """
+    parts = defaultdict(list)
+    ids = {}
+    seen = None        # columns with at least one value so far
+    order = None
+    for i, chunk in enumerate(chunks):
+        if order is None:
+            order = list(chunk.columns)        # = the sheet header
+            seen = set()
+            if animal_col is None:
+                header = pd.DataFrame(columns=order)
+                if pick_animal_column(header) is None:
+                    detect_animal_column(header)           # exits: no candidate name in the header
+            elif animal_col not in chunk.columns:
+                sys.exit(f"ERROR: Animal column '{animal_col}' not found")
+        if animal_col is None:
+            # candidates come from the header; pick among them on the first chunk with
+            # rows (a leading block of empty rows must not decide — or empty — the choice)
+            if chunk.empty:
+                continue
+            animal_col = detect_animal_column(chunk.dropna(how="all", axis=1))
+        seen.update(chunk.columns[chunk.notna().any()])
+        for animal, group in chunk.groupby(animal_col):
+            f = spill_dir / f"animal{ids.setdefault(animal, len(ids))}_chunk{i:05d}.pkl"
+            group.to_pickle(f)
+            parts[animal].append(f)
+    if order is None:
+        sys.exit("ERROR: No data rows found")
+    non_empty = [c for c in order if c in seen]
+    empty = len(order) - len(non_empty)
+    if empty:
+        print(f"   → Dropped {empty} empty column(s)")
+    return animal_col, parts, non_empty
+
+
+def iter_partitions(parts: dict, columns: list) -> Iterator[tuple[object, pd.DataFrame]]:
+    """Yield (animal, DataFrame) one animal at a time, in sorted animal order."""
+    try:
+        keys = sorted(parts)
+    except TypeError:
+        keys = sorted(parts, key=str)
+    for animal in keys:
+        group = pd.concat([pd.read_pickle(f) for f in parts[animal]], ignore_index=True)
+        yield animal, group[columns]
+
+
+def pick_animal_column(df: pd.DataFrame) -> str | None:
+    """Column named like subject/id/animal with the fewest unique values, or None."""
     candidates = [
         col for col in df.columns
-        if "subject" in col.lower() or "id" in col.lower() or "animal" in col.lower()
+        if "subject" in str(col).lower() or "id" in str(col).lower() or "animal" in str(col).lower()
     ]
     if not candidates:
-        sys.exit("ERROR: No column with 'subject', 'id', or 'animal' found. Use --animal-col")
+        return None
+    return min(candidates, key=lambda c: df[c].nunique(dropna=True))
+
 
-    # Pick column with fewest unique values
-    col = min(candidates, key=lambda c: df[c].nunique(dropna=True))
+def detect_animal_column(df: pd.DataFrame) -> str:
+    print_step("Detecting animal identifier column...")
+    col = pick_animal_column(df)
+    if col is None:
+        sys.exit("ERROR: No column with 'subject', 'id', or 'animal' found. Use --animal-col")
     unique_count = df[col].nunique(dropna=True)
     print(f"   → Using column: '{col}' ({unique_count:,} unique animals)")
     if unique_count > 100:
@@ -69,58 +246,355 @@ def detect_animal_column(df: pd.DataFrame) -> str:
     return col
 
 
-def build_nested(df: pd.DataFrame, animal_col: str) -> dict:
-    print_step(f"Grouping data by '{animal_col}' and nesting vessels...")
-    nested = {}
-    total_vessels = 0
+def json_records(frame: pd.DataFrame) -> list:
+    """Rows as dicts of JSON-native values. NaN/NaT → None, converted per column."""
+    columns = []
+    for col in frame.columns:
+        s = frame[col]
+        if pd.api.types.is_datetime64_any_dtype(s):
+            s = s.dt.strftime("%Y-%m-%dT%H:%M:%S")
+        values = s.to_numpy(dtype=object)     # numpy scalars → Python int/float/bool
+        values[s.isna().to_numpy()] = None
+        columns.append(values)
+    keys = list(frame.columns)
+    return [dict(zip(keys, row)) for row in zip(*columns)]
 
-    for animal, group in df.groupby(animal_col):
-        animal_key = str(animal)
-        vessels = group.drop(columns=[animal_col]).to_dict(orient="records")
-        total_vessels += len(vessels)
+
+def _mean(series: pd.Series):
+    m = series.mean()
+    return None if pd.isna(m) else round(float(m), 3)
+
+
+def iter_nested(groups: Iterator[tuple[object, pd.DataFrame]], animal_col: str) -> Iterator[tuple[str, dict]]:
+    """One (animal, {"vessels": [...], "summary": {...}}) entry at a time."""
+    for animal, group in groups:
+        vessels = json_records(group.drop(columns=[animal_col]))
 
         # Optional summary stats
         summary = {
             "n_vessels": len(vessels),
         }
         if "SO2_start" in group.columns:
-            summary["mean_SO2_start"] = round(group["SO2_start"].mean(), 3)
+            summary["mean_SO2_start"] = _mean(group["SO2_start"])
         if "SO2_end" in group.columns:
-            summary["mean_SO2_end"] = round(group["SO2_end"].mean(), 3)
+            summary["mean_SO2_end"] = _mean(group["SO2_end"])
 
-        nested[animal_key] = {
+        yield str(animal), {
             "vessels": vessels,
             "summary": summary
         }
 
-    print(f"   → Created {len(nested):,} animal entries with {total_vessels:,} total vessel records")
-    return nested
 
-
-def save_json(nested_data: dict, output_dir: Path):
-    json_path = output_dir / "data.json"
+def save_json(entries: Iterator[tuple[str, dict]], output_dir: Path,
+              pretty: bool = False, compress: str = None) -> tuple[Path, int, int]:
+    """
+    Write data.json[.gz|.zst] → (path, animals, vessels).
+    One animal serialized and written at a time: compact by default,
+    --pretty: the old indent=2 layout.
+    """
+    json_path = vessel_loader.json_path_for(output_dir, compress)
     print_step(f"Saving nested JSON to: {json_path}")
+    n_animals = n_vessels = 0
     try:
-        with open(json_path, "w", encoding="utf-8") as f:
-            # json.dump(nested_data, f, indent=2, ensure_ascii=False)
-            json.dump(nested, f, indent=2, ensure_ascii=False, default=lambda x: None if pd.isna(x) else x)
+        with vessel_loader.open_json(json_path, "w") as f:
+            # {"animal": entry, ...} written one entry at a time; --pretty gives the
+            # same bytes as json.dump(nested, indent=2) (strings never hold a raw newline)
+            sep, colon, close = (",\n  ", ": ", "\n}") if pretty else (",", ":", "}")
+            f.write("{")
+            for animal, entry in entries:
+                f.write(sep if n_animals else sep.lstrip(","))
+                f.write(json.dumps(animal, ensure_ascii=False))
+                f.write(colon)
+                if pretty:
+                    text = json.dumps(entry, indent=2, ensure_ascii=False, allow_nan=False)
+                    f.write(text.replace("\n", "\n  "))
+                else:
+                    f.write(json.dumps(entry, separators=(",", ":"), ensure_ascii=False, allow_nan=False))
+                n_animals += 1
+                n_vessels += len(entry["vessels"])
+            f.write(close if n_animals else "}")
+        print(f"   → {n_animals:,} animal entries with {n_vessels:,} total vessel records")
         print(f"   → JSON saved successfully! ({json_path})")
     except Exception as e:
         sys.exit(f"ERROR: Failed to write JSON: {e}")
+    # data.json ↔ data.json.gz/.zst from an earlier run would be stale next to the new file
+    for compress in [None, *vessel_loader.COMPRESSION_SUFFIX]:
+        old = vessel_loader.json_path_for(output_dir, compress)
+        if old != json_path and old.exists():
+            old.unlink()
+            print(f"   → Removed stale {old.name} (replaced by {json_path.name})")
+    return json_path, n_animals, n_vessels
+
+
+# —————————————————————————————————————————————————————————————————————
+# Batch ingest (v0.5)
+# —————————————————————————————————————————————————————————————————————
+SOURCES_DIR = "sources"
+MANIFEST_FILE = "_manifest.json"
+DEDUP_KEYS = ["vid_name", "vessel_nr"]      # + the workbook (source_key) and the animal column
+
+
+def expand_inputs(items: list[str]) -> list[Path]:
+    """Files, directories (their *.xlsx) and glob patterns → sorted unique workbooks."""
+    paths = []
+    for item in items:
+        p = Path(item)
+        if p.is_dir():
+            paths += p.glob("*.xlsx")
+        elif glob.has_magic(item):
+            paths += (Path(m) for m in glob.glob(item))
+        else:
+            paths.append(p)
+    # skip Excel lock files (~$name.xlsx) of open workbooks
+    return sorted({p.resolve() for p in paths if not p.name.startswith("~$")})
+
+
+def workbook_date(path: Path) -> str | None:
+    """Export date from the file name (..._20250226 → '2025-02-26'), if any."""
+    for digits in re.findall(r"(?<!\d)(\d{8})(?!\d)", path.stem):
+        try:
+            return datetime.strptime(digits, "%Y%m%d").date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def source_key(path: Path) -> str:
+    """Manifest/store key of a workbook: its name + a hash of its full path.
+    Same-named exports from different folders stay separate sources."""
+    digest = hashlib.blake2b(str(path.resolve()).encode(), digest_size=4).hexdigest()
+    return f"{path.stem}-{digest}"
+
+
+def excel_engine() -> str:
+    try:
+        import python_calamine  # noqa: F401   Rust-backed, much faster
+        return "calamine"
+    except ImportError:
+        return "openpyxl"
+
+
+def sheet_names(path: Path) -> list[str]:
+    with pd.ExcelFile(path, engine=excel_engine()) as book:
+        return list(book.sheet_names)
+
+
+def _read_sheet(job: tuple) -> dict:
+    """
+    Worker: one sheet → tagged frame pickled to out_file. Never exits the pool.
+    "error": the sheet could not be read (retried next run); "skipped": it was
+    read but holds no vessel rows (empty / no animal column).
+    """
+    path, sheet, animal_col, out_file = job
+    info = {"sheet": sheet, "file": out_file.name, "rows": 0, "animal_col": None,
+            "error": None, "skipped": None}
+    try:
+        df = pd.read_excel(path, sheet_name=sheet, engine=excel_engine())
+    except Exception as e:
+        info["error"] = f"unreadable: {e}"
+        return info
+    df = df.dropna(how="all", axis=0).dropna(how="all", axis=1)
+    if df.empty:
+        info["skipped"] = "empty"
+        return info
+    col = animal_col if animal_col in df.columns else pick_animal_column(df)
+    if col is None:
+        info["skipped"] = "no animal column"
+        return info
+    df.insert(0, "source", path.stem)
+    df.insert(1, "sheet", sheet)
+    df.insert(2, "date", workbook_date(path))
+    df.to_pickle(out_file)
+    info.update(rows=len(df), animal_col=col)
+    return info
+
+
+def ingest_workbooks(paths: list[Path], store: Path, animal_col: str | None,
+                     workers: int, force: bool = False) -> dict:
+    """
+    Parse new/changed workbooks (all sheets, in parallel) into store.
+    Returns the manifest entries of `paths` only, keyed by source_key().
+    Entries of workbooks that no longer exist (or of an older key scheme)
+    are pruned from the manifest together with their cached sheets.
+    """
+    manifest_path = store / MANIFEST_FILE
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    for key, entry in list(manifest.items()):
+        path = Path(entry.get("path", ""))
+        if not path.is_file() or source_key(path) != key:
+            del manifest[key]
+            shutil.rmtree(store / key, ignore_errors=True)
+
+    jobs, stamps = [], {}
+    for path in paths:
+        key = source_key(path)
+        stat = path.stat()
+        stamp = {"path": str(path.resolve()), "size": stat.st_size, "mtime": stat.st_mtime,
+                 "animal_col": animal_col}
+        old = manifest.get(key)
+        if (not force and old and not old.get("failed")
+                and all(old.get(k) == v for k, v in stamp.items())):
+            print(f"   → {path.name}: unchanged, cached")
+            continue
+        folder = store / key
+        folder.mkdir(parents=True, exist_ok=True)
+        for f in folder.glob("*.pkl"):
+            f.unlink()                      # changed workbook → replace all its sheets
+        stamps[key] = dict(stamp, source=path.stem, date=workbook_date(path), sheets=[], failed=[])
+        for i, sheet in enumerate(sheet_names(path)):
+            jobs.append((path, sheet, animal_col, folder / f"sheet{i:03d}.pkl"))
+
+    if jobs:
+        print_step(f"Parsing {len(jobs)} sheet(s) from {len(stamps)} workbook(s) "
+                   f"on {min(workers, len(jobs))} worker(s)...")
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                results = list(pool.map(_read_sheet, jobs))
+        else:
+            results = [_read_sheet(job) for job in jobs]
+        for (path, sheet, _, _), info in zip(jobs, results):
+            entry = stamps[source_key(path)]
+            if info["error"]:
+                # the workbook is not marked as ingested → parsed again next run
+                print(f"   ⚠️  {path.name} [{sheet}]: failed ({info['error']}), retried next run")
+                entry["failed"].append(sheet)
+            elif info["skipped"]:
+                print(f"   → {path.name} [{sheet}]: skipped ({info['skipped']})")
+            else:
+                print(f"   → {path.name} [{sheet}]: {info['rows']:,} rows, animal column '{info['animal_col']}'")
+                entry["sheets"].append(info)
+
+    manifest.update(stamps)
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+    return {source_key(path): manifest[source_key(path)] for path in paths}
+
+
+def combine_sources(store: Path, manifest: dict, animal_col: str | None) -> tuple[pd.DataFrame, str]:
+    """Cached sheets of the manifest's workbooks → one frame, animal columns unified, duplicates dropped."""
+    sheets = [(key, info) for key, entry in sorted(manifest.items(),
+                                                   key=lambda kv: (kv[1].get("date") or "", kv[0]))
+              for info in entry["sheets"]]
+    if not sheets:
+        sys.exit("ERROR: No sheet with vessel rows found")
+    target = animal_col or sheets[0][1]["animal_col"]
+    frames, workbook = [], []
+    for key, info in sheets:
+        frame = pd.read_pickle(store / key / info["file"])
+        if info["animal_col"] != target:
+            frame = frame.rename(columns={info["animal_col"]: target})
+        frames.append(frame)
+        workbook += [key] * len(frame)
+    df = pd.concat(frames, ignore_index=True)
+
+    # duplicates only within one workbook: `source` (the file name) is shown, not unique
+    keys = [k for k in DEDUP_KEYS if k in df.columns] + [target]
+    before = len(df)
+    dup = df.assign(_workbook=workbook).duplicated(subset=["_workbook"] + keys, keep="first")
+    df = df[~dup.to_numpy()].reset_index(drop=True)
+    print(f"   → {before:,} rows from {len(sheets)} sheet(s) of {len(manifest)} workbook(s); "
+          f"{before - len(df):,} duplicate(s) on (workbook, {', '.join(keys)}) dropped")
+    return df, target
+
+
+def run_batch(args, inputs: list[Path]):
+    output_dir = args.output or inputs[0].parent / "combined"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    print_step(f"Batch ingest of {len(inputs)} workbook(s) → {output_dir}")
+    store = output_dir / SOURCES_DIR
+    store.mkdir(exist_ok=True)
+
+    vessel_profile.start(args, "excel_to_nested_json", output_dir)
+
+    with vessel_profile.stage("parse sheets"):
+        manifest = ingest_workbooks(inputs, store, args.animal_col, args.workers, args.force)
+    print_step("Combining all sources...")
+    with vessel_profile.stage("combine"):
+        df, animal_col = combine_sources(store, manifest, args.animal_col)
+
+    writer = None
+    if not args.no_dataset:
+        if vessel_dataset.available():
+            writer = vessel_dataset.DatasetWriter(output_dir / vessel_dataset.DATASET_DIR,
+                                                  source=", ".join(e["path"] for e in manifest.values()))
+        else:
+            print("   ⚠️  pyarrow not installed → skipping columnar dataset (pip install pyarrow)")
+    groups = vessel_dataset.write_partitions(df.groupby(animal_col), writer, animal_col)
+    print_step(f"Grouping data by '{animal_col}' and nesting vessels...")
+    with vessel_profile.stage("nest + write"):
+        json_path, n_animals, n_vessels = save_json(
+            iter_nested(groups, animal_col), output_dir, args.pretty, args.compress)
+        if writer is not None:
+            writer.close()
+    if writer is not None:
+        print_step(f"Columnar dataset: {writer.root} ({writer.rows:,} rows, {len(writer.animals)} partitions)")
+
+    print("\n" + "="*60)
+    print("BATCH INGEST COMPLETE!")
+    print(f"   Workbooks   : {len(manifest):,}")
+    print(f"   Output Dir  : {output_dir}")
+    print(f"   JSON File   : {json_path}")
+    print(f"   Animals     : {n_animals:,}")
+    print(f"   Total Rows  : {n_vessels:,}")
+    print("="*60)
 
 
 def main():
     parser = argparse.ArgumentParser(
         description="Convert Excel → Nested JSON (grouped by animal) with auto folder output"
     )
-    parser.add_argument("excel", type=Path, help="Path to input .xlsx file")
+    parser.add_argument("excel", nargs="+",
+                        help="Input .xlsx file; or a directory / glob / several files → batch mode")
     parser.add_argument(
         "-s", "--sheet", default=0, help="Sheet name or index (default: 0)"
     )
     parser.add_argument(
         "-a", "--animal-col", default=None, help="Animal column name (auto-detected if omitted)"
     )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="Bounded-memory ingest of a single workbook: read in chunks, spill per-animal partitions to disk"
+    )
+    parser.add_argument(
+        "--chunk-rows", type=int, default=50_000, help="Rows per chunk with --stream (default: 50000)"
+    )
+    parser.add_argument(
+        "--no-dataset", action="store_true", help="Skip the columnar Parquet dataset"
+    )
+    parser.add_argument(
+        "--pretty", action="store_true", help="Indented JSON (old format; slower, larger)"
+    )
+    parser.add_argument(
+        "--compress", choices=sorted(vessel_loader.COMPRESSION_SUFFIX), default=None,
+        help="Write data.json.gz (gzip) or data.json.zst (zstd, needs zstandard)"
+    )
+    parser.add_argument(
+        "-o", "--output", type=Path, default=None,
+        help="Batch mode: combined output folder (default: <input dir>/combined)"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=os.cpu_count() or 1,
+        help="Batch mode: processes parsing sheets (default: all cores)"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Batch mode: re-parse unchanged workbooks too"
+    )
+    vessel_profile.add_arguments(parser)
     args = parser.parse_args()
+    if isinstance(args.sheet, str) and args.sheet.isdigit():
+        args.sheet = int(args.sheet)
+    if args.compress == "zstd" and vessel_loader.zstandard is None:
+        sys.exit("ERROR: --compress zstd needs the zstandard package (pip install zstandard)")
+
+    if len(args.excel) > 1 or Path(args.excel[0]).is_dir() or glob.has_magic(args.excel[0]):
+        if args.stream:
+            sys.exit("ERROR: --stream reads a single workbook; batch mode parses whole sheets "
+                     "in worker processes (lower -w to use less memory)")
+        inputs = expand_inputs(args.excel)
+        if not inputs:
+            sys.exit(f"ERROR: No .xlsx files found in: {' '.join(args.excel)}")
+        run_batch(args, inputs)
+        return
+    args.excel = Path(args.excel[0])
 
     # Validate input
     if not args.excel.exists():
@@ -128,32 +602,60 @@ def main():
     if not args.excel.suffix.lower() == ".xlsx":
         print(f"WARNING: File extension is '{args.excel.suffix}', expected .xlsx")
 
-    # Load data
-    df = load_excel(args.excel, args.sheet)
-
-    # Detect or use animal column
-    animal_col = args.animal_col or detect_animal_column(df)
-
-    # Build nested structure
-    nested = build_nested(df, animal_col)
-
     # Create output folder: same as Excel name (without .xlsx)
     base_name = args.excel.stem  # e.g., "MyExperiment_v2" → folder name
     output_dir = args.excel.parent / base_name
     output_dir.mkdir(exist_ok=True)
     print_step(f"Output folder: {output_dir}")
+    vessel_profile.start(args, "excel_to_nested_json", output_dir)
+
+    writer = None
+    if not args.no_dataset:
+        if vessel_dataset.available():
+            writer = vessel_dataset.DatasetWriter(output_dir / vessel_dataset.DATASET_DIR,
+                                                  source=str(args.excel))
+        else:
+            print("   ⚠️  pyarrow not installed → skipping columnar dataset (pip install pyarrow)")
+
+    if args.stream:
+        with tempfile.TemporaryDirectory(prefix="excel_spill_") as spill:
+            chunks = iter_excel_chunks(args.excel, args.sheet, args.chunk_rows)
+            with vessel_profile.stage("read + spill"):
+                animal_col, parts, columns = spill_partitions(chunks, args.animal_col, Path(spill))
+            groups = vessel_dataset.write_partitions(iter_partitions(parts, columns), writer, animal_col)
+            print_step(f"Grouping data by '{animal_col}' and nesting vessels...")
+            with vessel_profile.stage("nest + write"):
+                json_path, n_animals, n_vessels = save_json(
+                    iter_nested(groups, animal_col), output_dir, args.pretty, args.compress)
+    else:
+        # Load data
+        with vessel_profile.stage("read excel"):
+            df = load_excel(args.excel, args.sheet)
+
+        # Detect or use animal column
+        animal_col = args.animal_col or detect_animal_column(df)
+
+        # Nest + save JSON animal by animal (+ one Parquet partition per animal)
+        groups = vessel_dataset.write_partitions(df.groupby(animal_col), writer, animal_col)
+        print_step(f"Grouping data by '{animal_col}' and nesting vessels...")
+        with vessel_profile.stage("nest + write"):
+            json_path, n_animals, n_vessels = save_json(
+                iter_nested(groups, animal_col), output_dir, args.pretty, args.compress)
 
-    # Save JSON
-    save_json(nested, output_dir)
+    # Dataset schema is written last → the dataset counts as newer than data.json
+    if writer is not None:
+        with vessel_profile.stage("close dataset"):
+            writer.close()
+        print_step(f"Columnar dataset: {writer.root} ({writer.rows:,} rows, {len(writer.animals)} partitions)")
 
     # Final summary
     print("\n" + "="*60)
     print("CONVERSION COMPLETE!")
     print(f"   Input Excel : {args.excel}")
     print(f"   Output Dir  : {output_dir}")
-    print(f"   JSON File   : {output_dir / 'data.json'}")
-    print(f"   Animals     : {len(nested):,}")
-    print(f"   Total Rows  : {sum(len(a['vessels']) for a in nested.values()):,}")
+    print(f"   JSON File   : {json_path}")
+    print(f"   Animals     : {n_animals:,}")
+    print(f"   Total Rows  : {n_vessels:,}")
     print("="*60)
 
 
@@ -17,55 +17,90 @@ v0.6 (2025-11-10) – **CURRENT**
     • FULL NARRATIVE RESTORED (per-animal, sessions, violations, diameter, etc.)
     • NEW PDF: Oxygen_Extraction_PerAnimal.pdf → one page per rat (full 6-panel)
     • All plots: swarm/jitter/inset → no overlap, perfect clarity
+v0.7 (2026-10-18)
+    • PDF pages rendered in parallel (process pool, Agg) and merged in order
+      → --workers N (default: all cores, 1 = serial, needs pypdf)
+    • Own binned beeswarm instead of sns.swarmplot → true point plots up to
+      5,000 values (was 800), no overlap warnings
+    • Large-n mode: rasterized point layers > 2,000 points, hexbin density
+      for SO₂ in/out and length–volume > 10,000 points
+    • Page render cache (.render_cache/): only pages whose data subset or
+      plotting code changed are redrawn → --no-cache to redraw everything
+    • report.txt: VESSEL NETWORK section (corresp chains, cumulative ΔSO₂,
+      see vessel_network.py)
+    • ΔSO₂ statistics table (vessel_stats.py → delta_so2_stats.csv): bootstrap
+      95% CI + paired t / Wilcoxon per animal, session and size group; the
+      narrative reads its numbers from this table
+    • Summary stage (vessel_summary.py → summary_cube.csv): report.txt is
+      rendered from the saved aggregates → --summary-only rewrites it
+      without loading the vessel rows (and without PDFs)
+    • --outputs summary txt overview peranimal detailed: produce only some
+      outputs (run_pipeline.py runs them as separate, concurrent stages)
+    • --profile [--cprofile]: wall/CPU time + memory per stage and per PDF
+      page → table + profile_generate_report.json (vessel_profile.py)
+    • --txt-only (--summary-only still works): matplotlib/seaborn and the
+      plot/render modules are imported only when a PDF page is drawn →
+      report.txt-only runs take ≈0.6 s instead of ≈1.9 s (sample study).
+      A missing/stale summary is rebuilt once first (cube + bootstrap,
+      ≈1.7 s on 12k vessels) and the run says so
 =====================================================================
 
 Outputs:
 - report.txt                        → Full narrative
+- delta_so2_stats.csv               → ΔSO₂ statistics per animal/session/size group
+- summary_cube.csv                  → Aggregates behind report.txt (--summary-only)
 - Oxygen_Extraction_Report.pdf      → 6-panel overview (all data)
 - Oxygen_Extraction_Detailed.pdf    → One full plot per metric
 - Oxygen_Extraction_PerAnimal.pdf   → One 6-panel page per animal
 """
 
-import json
+import argparse
+import os
+from functools import lru_cache
 from pathlib import Path
 import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib.backends.backend_pdf import PdfPages
 from datetime import datetime
 
-sns.set(style="whitegrid", font_scale=1.2)
-
-# —————————————————————————————————————————————————————————————————————
-# Load & Flatten
-# —————————————————————————————————————————————————————————————————————
-def load_json(p: Path) -> dict:
-    with open(p) as f:
-        return json.load(f)
-
-def flatten(data: dict) -> pd.DataFrame:
-    rows = []
-    for animal, info in data.items():
-        for v in info["vessels"]:
-            v = v.copy()
-            v["animal"] = animal
-            rows.append(v)
-    return pd.DataFrame(rows)
+import vessel_loader
+import vessel_metrics
+import vessel_profile
+import vessel_stats
+import vessel_summary
+
+# Columns this script uses (only these are read from the columnar dataset)
+COLUMNS = ["animal", "vid_name", "vessel_nr", "vessel_type", "corresp",
+           "SO2_start", "SO2_end", "OD", "length", "volume"] + vessel_metrics.DERIVED
+
+@lru_cache(maxsize=None)
+def _plotting():
+    """
+    matplotlib + seaborn, imported and styled on the first drawn page (in
+    every process that draws one). report.txt never needs them: importing
+    them up front was most of a --txt-only run.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    sns.set(style="whitegrid", font_scale=1.2)
+    return plt, sns
 
 # —————————————————————————————————————————————————————————————————————
 # FULL NARRATIVE TEXT REPORT (RESTORED)
 # —————————————————————————————————————————————————————————————————————
-def write_txt(df: pd.DataFrame, out_path: Path):
+def write_txt(summary: vessel_summary.Summary, out_path: Path):
+    """Narrative from the summary stage only (no vessel rows needed)."""
+    cube, stats, meta = summary
+    columns = set(meta['columns'])
     lines = []
     now = datetime.now().strftime("%B %d, %Y at %I:%M %p")
     lines.append(f"OXYGEN EXTRACTION IN MICROVASCULAR NETWORK\n")
     lines.append(f"Analysis Report – Generated on {now}\n")
     lines.append("="*80 + "\n\n")
 
-    n_animals = df['animal'].nunique()
-    n_vessels = len(df)
+    animals = vessel_summary.rows(cube, "animal")
+    n_animals = len(animals)
+    n_vessels = int(vessel_summary.value(cube, "all", "n"))
     lines.append(
         f"This study analyzed microvascular oxygen dynamics in {n_animals} animal(s), "
         f"yielding a total of {n_vessels:,} individual blood vessel segments. "
@@ -75,12 +110,11 @@ def write_txt(df: pd.DataFrame, out_path: Path):
 
     # PER-ANIMAL OVERVIEW
     lines.append("PER-ANIMAL OVERVIEW\n")
-    for animal in sorted(df['animal'].unique()):
-        sub = df[df['animal'] == animal]
-        n_sub = len(sub)
-        cap_sub = sub['vessel_type'].value_counts().get(0, 0) if 'vessel_type' in sub.columns else 0
-        ven_sub = sub['vessel_type'].value_counts().get(1, 0) if 'vessel_type' in sub.columns else 0
-        sess_sub = sub['vid_name'].nunique() if 'vid_name' in sub.columns else 0
+    sessions = vessel_summary.rows(cube, "animal_session")
+    for animal, n_sub in zip(animals['animal'], animals['n']):
+        cap_sub = vessel_summary.value(cube, "animal_type", "n", animal=animal, vessel_type=0)
+        ven_sub = vessel_summary.value(cube, "animal_type", "n", animal=animal, vessel_type=1)
+        sess_sub = int((sessions['animal'] == animal).sum())
 
         lines.append(
             f"Animal ID {animal}:\n"
@@ -88,13 +122,13 @@ def write_txt(df: pd.DataFrame, out_path: Path):
             f"  • {cap_sub:,} capillaries (Type 0), {ven_sub:,} venules (Type 1)\n"
         )
 
-        if {'SO2_start', 'SO2_end'}.issubset(sub.columns):
-            meas_sub = sub.dropna(subset=['SO2_start', 'SO2_end'])
-            if len(meas_sub):
-                delta_sub = meas_sub['SO2_start'] - meas_sub['SO2_end']
-                mean_delta = delta_sub.mean()
+        if {'SO2_start', 'SO2_end'}.issubset(columns):
+            row = vessel_stats.lookup(stats, "animal", animal=animal)
+            if row is not None and row['n']:
                 lines.append(
-                    f"  • Oxygen extraction: average ΔSO₂ = {mean_delta:+.4f} (n={len(meas_sub)} measured)\n"
+                    f"  • Oxygen extraction: average ΔSO₂ = {row['mean']:+.4f} "
+                    f"({vessel_stats.format_ci(row)}, paired t-test {vessel_stats.format_p(row['p_t'])}; "
+                    f"n={row['n']} measured)\n"
                 )
             else:
                 lines.append("  • No SO₂ measurements available\n")
@@ -104,9 +138,9 @@ def write_txt(df: pd.DataFrame, out_path: Path):
 
     # VESSEL POPULATION
     lines.append("VESSEL POPULATION AND CLASSIFICATION (ALL ANIMALS)\n")
-    if 'vessel_type' in df.columns:
-        cap_count = df['vessel_type'].value_counts().get(0, 0)
-        ven_count = df['vessel_type'].value_counts().get(1, 0)
+    if 'vessel_type' in columns:
+        cap_count = vessel_summary.value(cube, "vessel_type", "n", vessel_type=0)
+        ven_count = vessel_summary.value(cube, "vessel_type", "n", vessel_type=1)
         cap_pct = cap_count / n_vessels * 100
         ven_pct = ven_count / n_vessels * 100
         lines.append(
@@ -121,14 +155,15 @@ def write_txt(df: pd.DataFrame, out_path: Path):
 
     # SESSIONS
     lines.append("EXPERIMENTAL SESSIONS AND CONDITIONS\n")
-    if 'vid_name' in df.columns:
-        sess_count = df['vid_name'].nunique()
-        top_sess = df['vid_name'].value_counts().head(3)
+    if 'vid_name' in columns:
+        sess = vessel_summary.rows(cube, "session").dropna(subset=['vid_name'])
+        sess_count = len(sess)
+        top_sess = sess.sort_values('n', ascending=False, kind="stable").head(3)
         lines.append(
             f"Data was acquired in {sess_count} distinct imaging sessions. "
             f"The three most sampled sessions were:\n"
         )
-        for name, count in top_sess.items():
+        for name, count in zip(top_sess['vid_name'], top_sess['n']):
             lines.append(f"  • '{name}' with {count:,} vessels\n")
         lines.append(
             f"Each session corresponds to a unique combination of camera, time point, "
@@ -139,24 +174,22 @@ def write_txt(df: pd.DataFrame, out_path: Path):
 
     # OXYGEN EXTRACTION
     lines.append("OXYGEN EXTRACTION AND TISSUE METABOLISM\n")
-    if {'SO2_start', 'SO2_end'}.issubset(df.columns):
-        meas = df.dropna(subset=['SO2_start', 'SO2_end']).copy()
-        meas['delta_SO2'] = meas['SO2_start'] - meas['SO2_end']
-        n_meas = len(meas)
+    if {'SO2_start', 'SO2_end'}.issubset(columns):
+        overall = vessel_stats.lookup(stats, "all")
+        n_meas = int(vessel_summary.value(cube, "all", "n_measured"))
         pct_meas = n_meas / n_vessels * 100
-        mean_delta = meas['delta_SO2'].mean()
-        median_delta = meas['delta_SO2'].median()
-        std_delta = meas['delta_SO2'].std()
-        viol = meas[meas['delta_SO2'] < 0]
-        n_viol = len(viol)
+        mean_delta, median_delta, std_delta = overall['mean'], overall['median'], overall['std']
+        n_viol = int(vessel_summary.value(cube, "all", "n_violations"))
         pct_viol = n_viol / n_meas * 100 if n_meas else 0
 
         lines.append(
             f"Oxygen extraction was successfully measured in {n_meas:,} vessels "
             f"({pct_meas:.1f}% of total). On average, tissue extracted "
             f"{mean_delta:+.4f} units of SO₂ per vessel (median {median_delta:+.4f}, "
-            f"standard deviation {std_delta:.4f}). This small positive drop indicates "
-            f"normal oxygen consumption by surrounding tissue.\n\n"
+            f"standard deviation {std_delta:.4f}; {vessel_stats.format_ci(overall)}, "
+            f"paired t-test SO₂ entrance vs exit {vessel_stats.format_p(overall['p_t'])}, "
+            f"Wilcoxon {vessel_stats.format_p(overall['p_wilcoxon'])}). This small positive drop "
+            f"indicates normal oxygen consumption by surrounding tissue.\n\n"
         )
 
         if n_viol > 0:
@@ -166,7 +199,7 @@ def write_txt(df: pd.DataFrame, out_path: Path):
                 f"These violations are likely due to sensor noise, motion artifacts, or "
                 f"misaligned vessel tracking. The first three examples are:\n"
             )
-            for _, row in viol[['animal', 'vid_name', 'vessel_nr', 'SO2_start', 'SO2_end']].head(3).iterrows():
+            for row in meta['violation_examples']:
                 lines.append(
                     f"  • Animal {row['animal']}, session '{row['vid_name']}', "
                     f"vessel {row['vessel_nr']}: "
@@ -175,27 +208,25 @@ def write_txt(df: pd.DataFrame, out_path: Path):
             lines.append("\n")
 
         lines.append("Session-level extraction varied significantly:\n")
-        for sess, g in meas.groupby('vid_name'):
-            m = g['delta_SO2'].mean()
-            lines.append(f"  • {sess}: average ΔSO₂ = {m:+.4f} (n={len(g)} vessels)\n")
+        for _, row in stats[stats['level'] == "session"].iterrows():
+            lines.append(f"  • {row['vid_name']}: average ΔSO₂ = {row['mean']:+.4f} "
+                         f"({vessel_stats.format_ci(row)}; n={row['n']} vessels)\n")
         lines.append("\n")
     else:
         lines.append("SO₂ entrance and exit values were not available for extraction analysis.\n\n")
 
     # VESSEL DIMENSIONS
     lines.append("VESSEL DIMENSIONS AND CAPILLARY CONFIRMATION\n")
-    if {'volume', 'length'}.issubset(df.columns):
-        valid = df.dropna(subset=['volume', 'length'])
-        valid = valid[valid['length'] > 0]
-        if len(valid):
-            diam = 2 * np.sqrt(valid['volume'] / (np.pi * valid['length']))
-            mean_d = diam.mean()
-            median_d = diam.median()
-            cap_count = (diam <= 10).sum()
-            cap_pct = cap_count / len(valid) * 100
+    if {'volume', 'length'}.issubset(columns):
+        n_valid = int(vessel_summary.value(cube, "all", "n_diameter"))
+        if n_valid:
+            mean_d = vessel_summary.value(cube, "all", "diameter_mean")
+            median_d = vessel_summary.value(cube, "all", "diameter_median")
+            cap_count = vessel_summary.value(cube, "size_group", "n", size_group=vessel_metrics.SMALL)
+            cap_pct = cap_count / n_valid * 100
             lines.append(
                 f"Physical vessel diameter was estimated from volume and length assuming "
-                f"cylindrical geometry. Across {len(valid):,} valid vessels, the average "
+                f"cylindrical geometry. Across {n_valid:,} valid vessels, the average "
                 f"diameter was {mean_d:.2f} µm (median {median_d:.2f} µm).\n\n"
                 f"Using the standard physiological threshold, {cap_count:,} vessels "
                 f"({cap_pct:.1f}%) had diameters ≤ 10 µm and are confirmed as true capillaries.\n"
@@ -204,34 +235,31 @@ def write_txt(df: pd.DataFrame, out_path: Path):
 
     # SATURATION vs DIAMETER
     lines.append("OXYGEN SATURATION IN RELATION TO VESSEL DIAMETER\n")
-    if {'SO2_start', 'SO2_end', 'volume', 'length'}.issubset(df.columns):
-        full = df.dropna(subset=['SO2_start', 'SO2_end', 'volume', 'length'])
-        full = full[full['length'] > 0]
-        if len(full):
-            full['diameter'] = 2 * np.sqrt(full['volume'] / (np.pi * full['length']))
-            cap = full[full['diameter'] <= 10]
-            ven = full[full['diameter'] > 10]
-
-            if len(cap):
-                cap_in = cap['SO2_start'].mean()
-                cap_out = cap['SO2_end'].mean()
+    if {'SO2_start', 'SO2_end', 'volume', 'length'}.issubset(columns):
+        if vessel_summary.value(cube, "all", "n_measured_diameter"):
+            n_cap = vessel_summary.value(cube, "size_group", "n_measured", size_group=vessel_metrics.SMALL)
+            n_ven = vessel_summary.value(cube, "size_group", "n_measured", size_group=vessel_metrics.LARGE)
+
+            if n_cap:
+                cap_in = vessel_summary.value(cube, "size_group", "so2_in_mean", size_group=vessel_metrics.SMALL)
+                cap_out = vessel_summary.value(cube, "size_group", "so2_out_mean", size_group=vessel_metrics.SMALL)
                 cap_delta = cap_in - cap_out
                 lines.append(
-                    f"In true capillaries (≤ 10 µm, n={len(cap):,}), "
+                    f"In true capillaries (≤ 10 µm, n={n_cap:,}), "
                     f"average SO₂ was {cap_in:.1f}% at entrance and {cap_out:.1f}% at exit, "
                     f"resulting in an oxygen extraction of {cap_delta:+.3f} units. "
                     f"This confirms efficient gas exchange in the smallest vessels.\n"
                 )
-            if len(ven):
-                ven_in = ven['SO2_start'].mean()
-                ven_out = ven['SO2_end'].mean()
+            if n_ven:
+                ven_in = vessel_summary.value(cube, "size_group", "so2_in_mean", size_group=vessel_metrics.LARGE)
+                ven_out = vessel_summary.value(cube, "size_group", "so2_out_mean", size_group=vessel_metrics.LARGE)
                 ven_delta = ven_in - ven_out
                 lines.append(
-                    f"In larger vessels (> 10 µm, n={len(ven):,}), "
+                    f"In larger vessels (> 10 µm, n={n_ven:,}), "
                     f"SO₂ was {ven_in:.1f}% at entrance and {ven_out:.1f}% at exit, "
                     f"with extraction of {ven_delta:+.3f} units — typically lower due to less surface-area-to-volume ratio.\n"
                 )
-            if len(cap) and len(ven):
+            if n_cap and n_ven:
                 lines.append(
                     f"Capillaries extracted {cap_delta - ven_delta:+.3f} more SO₂ per vessel than larger vessels, "
                     f"highlighting their dominant role in tissue oxygenation.\n"
@@ -240,6 +268,11 @@ def write_txt(df: pd.DataFrame, out_path: Path):
             lines.append("Insufficient data to correlate saturation with diameter.\n")
     else:
         lines.append("Required columns for saturation-diameter analysis are missing.\n")
+
+    # VESSEL NETWORK
+    if meta.get('network'):
+        lines.append("VESSEL NETWORK (corresp links, per animal)\n")
+        lines.append(" ".join(meta['network']) + "\n")
     lines.append("\n" + "="*80 + "\n")
     lines.append("END OF REPORT\n")
 
@@ -250,6 +283,8 @@ def write_txt(df: pd.DataFrame, out_path: Path):
 # Smart Point Plotter (NO RUGS)
 # —————————————————————————————————————————————————————————————————————
 def plot_individual_points(ax, data: pd.Series, title: str):
+    from vessel_plots import SWARM_MAX, beeswarm
+    _, sns = _plotting()
     data = data.replace([np.inf, -np.inf], np.nan).dropna()
     n = len(data)
     if n == 0:
@@ -257,13 +292,9 @@ def plot_individual_points(ax, data: pd.Series, title: str):
         ax.set_title(title)
         return
 
-    if n <= 800:
-        try:
-            sns.swarmplot(data=data, ax=ax, color="purple", size=4.5, alpha=0.85)
-            method = "Swarm"
-        except Exception:
-            sns.stripplot(data=data, ax=ax, color="purple", jitter=0.3, size=4.5, alpha=0.85)
-            method = "Jitter"
+    if n <= SWARM_MAX:
+        beeswarm(ax, data, color="purple", size=4.5, alpha=0.85)
+        method = "Swarm"
     else:
         sample = data.sample(n=1000, random_state=42)
         sns.stripplot(data=sample, ax=ax, color="purple", jitter=0.35, size=4.5, alpha=0.85)
@@ -276,12 +307,14 @@ def plot_individual_points(ax, data: pd.Series, title: str):
         inset.tick_params(axis='both', labelsize=6)
 
     ax.set_title(f"{title}\n({method}, n={n:,})", fontsize=14, pad=20)
-    ax.set_xlabel("Value")
+    ax.set_ylabel("Value")
 
 # —————————————————————————————————————————————————————————————————————
 # 6-Panel Page (Reusable)
 # —————————————————————————————————————————————————————————————————————
 def plot_six_panel(pdf, sub_df, title):
+    from vessel_plots import geometry_scatter, so2_scatter
+    plt, sns = _plotting()
     fig = plt.figure(figsize=(16, 11))
     gs = fig.add_gridspec(2, 3, hspace=0.4, wspace=0.3)
     fig.suptitle(title, fontsize=18, fontweight="bold", y=0.98)
@@ -304,25 +337,22 @@ def plot_six_panel(pdf, sub_df, title):
 
     # 3. ΔSO₂
     ax3 = fig.add_subplot(gs[0, 2])
-    meas = sub_df.dropna(subset=["SO2_start", "SO2_end"]).copy()
+    meas = vessel_metrics.measured(sub_df)
     if len(meas):
-        meas["delta"] = meas["SO2_start"] - meas["SO2_end"]
-        sns.histplot(meas["delta"], bins=40, ax=ax3, color="salmon")
+        sns.histplot(meas["delta_SO2"], bins=40, ax=ax3, color="salmon")
         ax3.axvline(0, color="black", ls="--")
-        ax3.axvline(meas["delta"].mean(), color="blue", ls="--",
-                    label=f"Mean = {meas['delta'].mean():+.4f}")
+        ax3.axvline(meas["delta_SO2"].mean(), color="blue", ls="--",
+                    label=f"Mean = {meas['delta_SO2'].mean():+.4f}")
         ax3.legend()
     ax3.set_title("ΔSO₂")
 
     # 4. SO₂ scatter
     ax4 = fig.add_subplot(gs[1, 0])
     if len(meas):
-        scatter = ax4.scatter(meas["SO2_end"], meas["SO2_start"],
-                              c=meas["delta"], cmap="RdYlGn", s=30, alpha=0.7)
+        so2_scatter(ax4, meas, s=30, alpha=0.7)
         mn = meas[["SO2_start","SO2_end"]].min().min()
         mx = meas[["SO2_start","SO2_end"]].max().max()
         ax4.plot([mn,mx], [mn,mx], "k--")
-        plt.colorbar(scatter, ax=ax4, label="ΔSO₂")
     ax4.set_xlabel("Exit"); ax4.set_ylabel("Entrance")
     ax4.set_title("SO₂ In vs Out")
 
@@ -330,21 +360,18 @@ def plot_six_panel(pdf, sub_df, title):
     ax5 = fig.add_subplot(gs[1, 1])
     palette = {0: "lightblue", 1: "orange"}
     if 'vessel_type' in sub_df.columns:
-        sns.scatterplot(data=sub_df, x="length", y="volume", hue="vessel_type",
-                        palette=palette, ax=ax5, alpha=0.6, legend="full")
-        handles, labels = ax5.get_legend_handles_labels()
-        labels = [l.replace("0", "Cap").replace("1", "Ven") for l in labels]
-        ax5.legend(handles, labels, title="Type")
+        if not geometry_scatter(ax5, sub_df, palette=palette, alpha=0.6, legend="full"):
+            handles, labels = ax5.get_legend_handles_labels()
+            labels = [l.replace("0", "Cap").replace("1", "Ven") for l in labels]
+            ax5.legend(handles, labels, title="Type")
     ax5.set_title("Geometry")
 
     # 6. Diameter
     ax6 = fig.add_subplot(gs[1, 2])
     if {'volume','length'}.issubset(sub_df.columns):
-        valid = sub_df.dropna(subset=['volume','length'])
-        valid = valid[valid['length']>0]
+        valid = vessel_metrics.with_diameter(sub_df)
         if len(valid):
-            diam = 2*np.sqrt(valid['volume']/(np.pi*valid['length']))
-            sns.histplot(diam, bins=50, ax=ax6, color="green")
+            sns.histplot(valid['diameter'], bins=50, ax=ax6, color="green")
             ax6.axvline(10, color="red", ls="--")
     ax6.set_title("Est. Diameter")
 
@@ -356,9 +383,9 @@ def plot_six_panel(pdf, sub_df, title):
 # Detailed Full-Page Plots
 # —————————————————————————————————————————————————————————————————————
 def plot_detailed(pdf, sub_df, prefix):
-    meas = sub_df.dropna(subset=["SO2_start", "SO2_end"]).copy()
-    if len(meas):
-        meas["delta"] = meas["SO2_start"] - meas["SO2_end"]
+    from vessel_plots import so2_scatter
+    plt, _ = _plotting()
+    meas = vessel_metrics.measured(sub_df)
 
     # OD
     fig, ax = plt.subplots(figsize=(10, 6))
@@ -368,18 +395,17 @@ def plot_detailed(pdf, sub_df, prefix):
     # ΔSO₂
     fig, ax = plt.subplots(figsize=(10, 6))
     if len(meas):
-        plot_individual_points(ax, meas["delta"], "Oxygen Extraction (ΔSO₂)")
+        plot_individual_points(ax, meas["delta_SO2"], "Oxygen Extraction (ΔSO₂)")
     pdf.savefig(fig); plt.close()
 
     # SO₂ scatter
     fig, ax = plt.subplots(figsize=(10, 8))
     if len(meas):
-        scatter = ax.scatter(meas["SO2_end"], meas["SO2_start"], c=meas["delta"], cmap="RdYlGn", s=60, alpha=0.9)
+        so2_scatter(ax, meas, s=60, alpha=0.9)
         mn = meas[["SO2_start","SO2_end"]].min().min()
         mx = meas[["SO2_start","SO2_end"]].max().max()
         ax.plot([mn,mx], [mn,mx], "k--", linewidth=2)
-        plt.colorbar(scatter, ax=ax, label="ΔSO₂")
-        viol = meas[meas["delta"] < 0].sort_values("delta").head(15)
+        viol = meas[meas["delta_SO2"] < 0].sort_values("delta_SO2").head(15)
         for _, row in viol.iterrows():
             ax.annotate(f"V{row['vessel_nr']}", (row["SO2_end"], row["SO2_start"]),
                         xytext=(8, 8), textcoords="offset points", fontsize=9, color="red")
@@ -389,65 +415,114 @@ def plot_detailed(pdf, sub_df, prefix):
     # Diameter
     fig, ax = plt.subplots(figsize=(10, 6))
     if {'volume','length'}.issubset(sub_df.columns):
-        valid = sub_df.dropna(subset=['volume','length'])
-        valid = valid[valid['length']>0]
+        valid = vessel_metrics.with_diameter(sub_df)
         if len(valid):
-            diam = 2*np.sqrt(valid['volume']/(np.pi*valid['length']))
-            plot_individual_points(ax, diam, "Estimated Diameter (µm)")
-            ax.axvline(10, color="red", ls="--", label="Capillary ≤10µm")
+            plot_individual_points(ax, valid['diameter'], "Estimated Diameter (µm)")
+            ax.axhline(10, color="red", ls="--", label="Capillary ≤10µm")
             ax.legend()
     pdf.savefig(fig); plt.close()
 
 # —————————————————————————————————————————————————————————————————————
 # Write All PDFs
 # —————————————————————————————————————————————————————————————————————
-def write_pdfs(df: pd.DataFrame, out_dir: Path):
-    # 1. Overview (all data)
-    overview_path = out_dir / "Oxygen_Extraction_Report.pdf"
-    with PdfPages(overview_path) as pdf:
-        plot_six_panel(pdf, df, "ALL DATA – 6-Panel Overview")
-    print(f"→ Overview PDF: {overview_path}")
-
-    # 2. Per-Animal Full 6-Panel
-    per_animal_path = out_dir / "Oxygen_Extraction_PerAnimal.pdf"
-    with PdfPages(per_animal_path) as pdf:
-        for animal in sorted(df["animal"].unique()):
-            sub = df[df["animal"] == animal]
-            plot_six_panel(pdf, sub, f"Animal ID: {animal}")
-    print(f"→ Per-Animal PDF: {per_animal_path}")
-
-    # 3. Detailed Full-Page
-    detailed_path = out_dir / "Oxygen_Extraction_Detailed.pdf"
-    with PdfPages(detailed_path) as pdf:
-        for animal in sorted(df["animal"].unique()):
-            sub = df[df["animal"] == animal]
-            plot_detailed(pdf, sub, f"Animal {animal}")
-        for vid in sorted(df["vid_name"].unique()):
-            sub = df[df["vid_name"] == vid]
-            plot_detailed(pdf, sub, f"Session {vid}")
-    print(f"→ Detailed PDF: {detailed_path}")
+# --outputs choices → file (None: the three summary files)
+OUTPUTS = {
+    "summary": None,
+    "txt": "report.txt",
+    "overview": "Oxygen_Extraction_Report.pdf",
+    "peranimal": "Oxygen_Extraction_PerAnimal.pdf",
+    "detailed": "Oxygen_Extraction_Detailed.pdf",
+}
+PDFS = ["overview", "peranimal", "detailed"]
+
+def report_pages(df: pd.DataFrame) -> list:
+    """Every page of the three PDFs, in output order."""
+    from vessel_render import Page
+    animals = sorted(df["animal"].unique())
+    pages = [Page("Oxygen_Extraction_Report.pdf", plot_six_panel, None, "ALL DATA – 6-Panel Overview")]
+    pages += [Page("Oxygen_Extraction_PerAnimal.pdf", plot_six_panel, ("animal", a), f"Animal ID: {a}")
+              for a in animals]
+    pages += [Page("Oxygen_Extraction_Detailed.pdf", plot_detailed, ("animal", a), f"Animal {a}")
+              for a in animals]
+    pages += [Page("Oxygen_Extraction_Detailed.pdf", plot_detailed, ("vid_name", v), f"Session {v}")
+              for v in sorted(df["vid_name"].unique())]
+    return pages
+
+def write_pdfs(df: pd.DataFrame, out_dir: Path, workers: int = 1, cache: bool = True,
+               pdfs: list = PDFS):
+    from vessel_render import render_pages      # matplotlib: only when PDFs are written
+    names = {OUTPUTS[p] for p in pdfs}
+    pages = [page for page in report_pages(df) if page.pdf in names]
+    outputs = render_pages(df, pages, out_dir, workers, cache)
+    for label, name in [("Overview", "Oxygen_Extraction_Report.pdf"),
+                        ("Per-Animal", "Oxygen_Extraction_PerAnimal.pdf"),
+                        ("Detailed", "Oxygen_Extraction_Detailed.pdf")]:
+        if name in outputs:
+            print(f"→ {label} PDF: {outputs[name]}")
 
 # —————————————————————————————————————————————————————————————————————
 # Main
 # —————————————————————————————————————————————————————————————————————
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python generate_report.py path/to/data.json")
-    json_path = Path(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Full narrative report + 3 PDFs")
+    parser.add_argument("json", type=Path, help="path/to/data.json")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes rendering PDF pages (default: all cores; 1 = serial)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Redraw every page (ignore/skip the .render_cache/ page cache)")
+    parser.add_argument("--txt-only", "--summary-only", action="store_true",
+                        help="Only report.txt, from the saved summary (no vessel rows, no plotting imports; "
+                             "a missing/stale summary is rebuilt once)")
+    parser.add_argument("--outputs", nargs="+", choices=list(OUTPUTS), default=list(OUTPUTS),
+                        help="Produce only these outputs (default: all)")
+    vessel_profile.add_arguments(parser)
+    args = parser.parse_args()
+    json_path = args.json
     if not json_path.exists():
         sys.exit(f"File not found: {json_path}")
-
-    data = load_json(json_path)
-    df   = flatten(data)
     out_dir = json_path.parent
 
-    write_txt(df, out_dir / "report.txt")
-    write_pdfs(df, out_dir)
-
+    if args.txt_only:
+        args.outputs = ["txt"]      # from the saved summary, rebuilt only if stale
+    partial = args.outputs != list(OUTPUTS)
+    vessel_profile.start(args, "generate_report", out_dir, tag="-".join(args.outputs) if partial else None)
+
+    summary = None
+    build = "summary" in args.outputs
+    if "txt" in args.outputs and not build:
+        with vessel_profile.stage("load summary"):
+            summary = vessel_summary.load(json_path)
+        if summary is None:
+            print("   No current summary → building it from the vessel rows once")
+            build = True
+    pdfs = [o for o in args.outputs if o in PDFS]
+
+    df = None
+    if build or pdfs:
+        with vessel_profile.stage("load"):
+            df = vessel_loader.load_vessels(json_path, COLUMNS)
+    if build:
+        with vessel_profile.stage("summary"):
+            summary = vessel_summary.build(df, args.workers)
+            vessel_summary.save(summary, out_dir)
+    if "txt" in args.outputs:
+        with vessel_profile.stage("narrative"):
+            write_txt(summary, out_dir / "report.txt")
+        if args.txt_only and build:
+            print("   Note: slow --txt-only run — the summary was missing or stale and was rebuilt "
+                  "from the vessel rows (saved; the next --txt-only run reads it)")
+    if pdfs:
+        with vessel_profile.stage("pdfs"):
+            write_pdfs(df, out_dir, args.workers, cache=not args.no_cache, pdfs=pdfs)
+
+    if partial:
+        sys.exit(0)
     print("\n" + "="*70)
-    print("ALL DONE! 4 FILES GENERATED:")
+    print("ALL DONE! 6 FILES GENERATED:")
     print("   1. report.txt → Full narrative")
-    print("   2. Oxygen_Extraction_Report.pdf → All data overview")
-    print("   3. Oxygen_Extraction_PerAnimal.pdf → One rat per page")
-    print("   4. Oxygen_Extraction_Detailed.pdf → Full clarity per plot")
+    print("   2. delta_so2_stats.csv → ΔSO₂ mean/CI/tests per animal, session, size group")
+    print("   3. summary_cube.csv → Aggregates per animal × session × type × size group")
+    print("   4. Oxygen_Extraction_Report.pdf → All data overview")
+    print("   5. Oxygen_Extraction_PerAnimal.pdf → One rat per page")
+    print("   6. Oxygen_Extraction_Detailed.pdf → Full clarity per plot")
     print("="*70)
\ No newline at end of file
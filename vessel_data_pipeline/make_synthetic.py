@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+make_synthetic.py
+Author: G.M
+Date: 18-10-2026
+Version: 0.1
+
+Synthetic vessel studies of any size, in the same format as a converted
+export (data.json + dataset/, optionally the .xlsx itself), for testing and
+benchmarking at 10× / 100× the real study (benchmark.py).
+
+    python make_synthetic.py data/synth_100k --vessels 100000
+    python make_synthetic.py data/synth --animals 12 --sessions 24 --vessels 50000 --xlsx
+
+Columns as in the oxy-cam exports: subject_id, vid_name, vessel_nr,
+vessel_type, SO2_start, SO2_end, OD, length, volume, corresp.
+
+    vid_name     cam{1,2}_t{0..}_fio2_{10,21,100} (sessions cycle through
+                 camera × time point × FiO₂; --sessions of them per animal)
+    vessel_nr    0… per animal
+    vessel_type  ~10% venules (1), rest capillaries (0)
+    length       log-normal, median ≈ 55 µm
+    volume       from a log-normal diameter (capillaries ≈ 6 µm, venules
+                 ≈ 14 µm) → the diameter/size group split is realistic
+    SO2_start    by FiO₂ (10% → ≈50, 21% → ≈60, 100% → ≈72) + animal
+                 offset + vessel noise, clipped to 5–99
+    SO2_end      SO2_start − extraction (mean ≈ 2, sd ≈ 2.5 → ~20% negative
+                 ΔSO₂ "violations")
+    OD           normal ≈ 0.3 ± 0.1 (a few negative values)
+    corresp      ~50% of vessels link to a vessel further along a random
+                 chain in the same animal + session (trees, no cycles);
+                 1% dangling references
+
+Missing values: ~30% of vessels without SO₂ (both ends), 1% with only one
+end, 1% without length/volume, 0.5% without OD. Same --seed → same data.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import vessel_dataset
+from excel_to_nested_json import iter_nested, print_step, save_json
+
+ANIMAL_COL = "subject_id"
+PARAMS_FILE = "_synthetic.json"
+FIO2_SO2 = {10: 50.0, 21: 60.0, 100: 72.0}
+XLSX_MAX_ROWS = 1_048_575           # Excel sheet limit minus the header
+
+
+def session_names(n: int) -> list:
+    names = [f"cam{cam}_t{t}_fio2_{fio2}"
+             for t in range(max(1, -(-n // 6))) for cam in (1, 2) for fio2 in FIO2_SO2]
+    return names[:n]
+
+
+def generate(n_vessels: int, n_animals: int = 5, n_sessions: int = 24, seed: int = 0) -> pd.DataFrame:
+    """One flat table like the Excel export (rows in random order)."""
+    rng = np.random.default_rng(seed)
+    n = n_vessels
+    sessions = np.array(session_names(n_sessions))
+
+    animal = rng.integers(1, n_animals + 1, n)
+    animal[:n_animals] = np.arange(1, n_animals + 1)[:n]        # every animal present
+    session = rng.integers(0, len(sessions), n)
+    fio2 = np.array([int(s.rsplit("_", 1)[1]) for s in sessions])[session]
+
+    # vessel_nr: 0… within each animal
+    order = np.argsort(animal, kind="stable")
+    counts = np.bincount(animal, minlength=n_animals + 1)
+    starts = np.r_[0, np.cumsum(counts)][animal[order]]
+    vessel_nr = np.empty(n, dtype=np.int64)
+    vessel_nr[order] = np.arange(n) - starts
+
+    vessel_type = (rng.random(n) < 0.10).astype(np.int64)
+    length = rng.lognormal(np.log(55), 0.55, n)
+    diameter = np.where(vessel_type == 1, rng.lognormal(np.log(14), 0.35, n),
+                        rng.lognormal(np.log(6), 0.35, n))
+    volume = np.pi * (diameter / 2) ** 2 * length
+
+    animal_offset = rng.normal(0, 3, n_animals + 1)[animal]
+    so2_start = np.vectorize(FIO2_SO2.get)(fio2) + animal_offset + rng.normal(0, 8, n)
+    so2_start = np.clip(so2_start, 5, 99)
+    so2_end = np.clip(so2_start - rng.normal(2.0, 2.5, n), 1, 99)
+    od = rng.normal(0.3, 0.1, n)
+
+    df = pd.DataFrame({
+        ANIMAL_COL: animal,
+        "vid_name": sessions[session],
+        "vessel_nr": vessel_nr,
+        "vessel_type": vessel_type,
+        "SO2_start": so2_start,
+        "OD": od,
+        "length": length,
+        "corresp": corresp_links(animal, session, vessel_nr, rng),
+        "SO2_end": so2_end,
+        "volume": volume,
+    })
+
+    # missing values
+    no_so2 = rng.random(n) < 0.30
+    df.loc[no_so2, ["SO2_start", "SO2_end"]] = np.nan
+    one_end = ~no_so2 & (rng.random(n) < 0.01)
+    df.loc[one_end & (rng.random(n) < 0.5), "SO2_start"] = np.nan
+    df.loc[one_end & ~df["SO2_start"].isna(), "SO2_end"] = np.nan
+    df.loc[rng.random(n) < 0.01, ["length", "volume"]] = np.nan
+    df.loc[rng.random(n) < 0.005, "OD"] = np.nan
+    return df
+
+
+def corresp_links(animal, session, vessel_nr, rng) -> np.ndarray:
+    """
+    Random downstream chains per animal + session: in a shuffled order every
+    vessel may link to one a few places further on (→ trees, never cycles).
+    """
+    n = len(animal)
+    order = np.lexsort((rng.random(n), session, animal))
+    group = animal[order] * 10_000 + session[order]
+    first = np.r_[True, group[1:] != group[:-1]]
+    start = np.maximum.accumulate(np.where(first, np.arange(n), 0))
+    size = np.diff(np.r_[np.flatnonzero(first), n])[np.cumsum(first) - 1]
+    pos = np.arange(n) - start
+    target = pos + rng.geometric(0.4, n)
+    linked = (rng.random(n) < 0.5) & (target < size)
+
+    corresp = np.full(n, np.nan)
+    corresp[order[linked]] = vessel_nr[order[start[linked] + target[linked]]]
+    dangling = rng.random(n) < 0.01
+    corresp[dangling] = vessel_nr.max() + 1 + rng.integers(0, 1000, dangling.sum())
+    return corresp
+
+
+def write_study(df: pd.DataFrame, out_dir: Path, dataset: bool = True, compress: str = None) -> Path:
+    """data.json (+ dataset/) exactly as excel_to_nested_json.py writes them."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    writer = None
+    if dataset and vessel_dataset.available():
+        writer = vessel_dataset.DatasetWriter(out_dir / vessel_dataset.DATASET_DIR, source="make_synthetic.py")
+    groups = vessel_dataset.write_partitions(df.groupby(ANIMAL_COL), writer, ANIMAL_COL)
+    json_path, _, _ = save_json(iter_nested(groups, ANIMAL_COL), out_dir, compress=compress)
+    if writer is not None:
+        writer.close()
+    return json_path
+
+
+def make_study(out_dir: Path, n_vessels: int, n_animals: int = 5, n_sessions: int = 24,
+               seed: int = 0, xlsx: bool = False, dataset: bool = True) -> Path:
+    """Generate + write unless out_dir already holds the same study; returns data.json."""
+    params = {"vessels": n_vessels, "animals": n_animals, "sessions": n_sessions, "seed": seed,
+              "xlsx": xlsx, "version": 1}
+    params_path = out_dir / PARAMS_FILE
+    json_path = out_dir / "data.json"
+    if params_path.exists() and json.loads(params_path.read_text()) == params and json_path.exists():
+        print_step(f"Synthetic study up to date: {out_dir}")
+        return json_path
+
+    if xlsx and n_vessels > XLSX_MAX_ROWS:
+        sys.exit(f"ERROR: {n_vessels:,} rows do not fit in one Excel sheet (max {XLSX_MAX_ROWS:,})")
+    print_step(f"Generating {n_vessels:,} vessels ({n_animals} animals × {n_sessions} sessions)...")
+    df = generate(n_vessels, n_animals, n_sessions, seed)
+    json_path = write_study(df, out_dir, dataset)
+    if xlsx:
+        print_step(f"Writing {out_dir.name}.xlsx...")
+        df.to_excel(out_dir / f"{out_dir.name}.xlsx", index=False)
+    params_path.write_text(json.dumps(params, indent=2))
+    return json_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic vessel study → data.json + dataset (+ .xlsx)")
+    parser.add_argument("out", type=Path, help="Output folder")
+    parser.add_argument("-n", "--vessels", type=int, default=12_000, help="Vessels (rows) in total")
+    parser.add_argument("--animals", type=int, default=5, help="Animals (default: 5)")
+    parser.add_argument("--sessions", type=int, default=24, help="Sessions per animal (default: 24)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--xlsx", action="store_true", help="Also write the flat table as <out>/<out>.xlsx")
+    parser.add_argument("--no-dataset", action="store_true", help="Skip the columnar Parquet dataset")
+    args = parser.parse_args()
+
+    json_path = make_study(args.out, args.vessels, args.animals, args.sessions, args.seed,
+                           args.xlsx, not args.no_dataset)
+    print(f"→ Synthetic study: {json_path}")
+
+
+if __name__ == "__main__":
+    main()
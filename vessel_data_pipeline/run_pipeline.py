@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+run_pipeline.py
+Author: G.M
+Date: 18-10-2026
+Version: 0.1
+
+One entry point for the whole pipeline, make-style. Every stage runs one of
+the existing scripts; stages form a DAG through their files:
+
+    workbook(s) ─ingest─► data.json + dataset/
+                            ├─summary──► summary_cube.csv, delta_so2_stats.csv, summary_meta.json
+                            │              └─txt──► report.txt
+                            ├─analysis─► analyze_so2.txt        (terminal output of analyze_so2.py)
+                            ├─overview─► Oxygen_Extraction_Report.pdf
+                            ├─peranimal► Oxygen_Extraction_PerAnimal.pdf
+                            ├─detailed─► Oxygen_Extraction_Detailed.pdf
+                            └─redesign─► output_redesign/
+
+Up-to-date check: a stage's key hashes the contents of its input files, the
+source of the scripts/modules it runs and its arguments. A stage is skipped
+when its key equals the one of its last successful run and its outputs are
+unchanged on disk. Content hashes, not timestamps: a workbook copied in
+again or re-saved without changes triggers nothing, and a stage whose
+upstream reran but wrote identical files stays skipped. File hashes are
+memoised by size + mtime, so a no-op run only stats the files.
+
+    <out>/.pipeline/state.json     ← keys + output hashes of the last runs
+    <out>/.pipeline/<stage>.log    ← output of the last run of each stage
+
+Stages whose inputs are ready run concurrently (-j, default: all cores); the
+page workers of the PDF stages share the cores (-w). --profile is passed on
+to every stage that runs; their profile_*.json files are summed up in one
+table at the end (not part of the stage keys).
+
+    python run_pipeline.py data/raw_data.xlsx              # → data/raw_data/…
+    python run_pipeline.py data/exports/ -o data/study     # batch ingest
+    python run_pipeline.py data/study/data.json            # no ingest
+    python run_pipeline.py data/raw_data.xlsx --only txt   # + what it needs
+    python run_pipeline.py data/raw_data.xlsx --dry-run    # show what would run
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+import vessel_profile
+
+HERE = Path(__file__).resolve().parent
+STATE_DIR = ".pipeline"
+STATE_FILE = "state.json"
+JSON_SUFFIXES = (".json", ".json.gz", ".json.zst")
+DATASET_DIR = "dataset"           # vessel_dataset.DATASET_DIR (not imported: keeps startup instant)
+
+LOADING = ["vessel_loader", "vessel_dataset", "vessel_metrics"]
+PLOTTING = ["vessel_plots", "vessel_render"]
+
+
+class Stage(NamedTuple):
+    name: str
+    script: str                    # script in this folder
+    args: List[str]
+    inputs: List[Path]             # files/folders read
+    code: List[str]                # modules whose source is part of the key
+    outputs: List[Path]
+    parallel: bool = False         # takes -w (page/sheet workers)
+    stdout: bool = False           # terminal output is outputs[0]
+    profile_tag: Optional[str] = None   # vessel_profile tag of the script's run
+
+
+# —————————————————————————————————————————————————————————————————————
+# Stages
+# —————————————————————————————————————————————————————————————————————
+def ingest_stage(items: List[str], output: Optional[Path]) -> Optional[Stage]:
+    """Workbook(s) → data.json + dataset (None: input is already JSON)."""
+    first = Path(items[0])
+    if len(items) == 1 and first.name.endswith(JSON_SUFFIXES):
+        return None
+    batch = len(items) > 1 or first.is_dir() or glob.has_magic(items[0])
+    if batch:
+        from excel_to_nested_json import expand_inputs     # pandas; only needed here
+        books = expand_inputs(items)
+        if not books:
+            sys.exit(f"ERROR: No .xlsx files found in: {' '.join(items)}")
+        out_dir = output or books[0].parent / "combined"
+        args = [str(b) for b in books] + ["-o", str(out_dir)]
+    else:
+        if output is not None:
+            sys.exit("ERROR: -o is for batch ingest; a single workbook is written to <name>/ next to it")
+        books = [first.resolve()]
+        out_dir = books[0].parent / books[0].stem
+        args = [str(books[0])]
+    return Stage("ingest", "excel_to_nested_json.py", args, books,
+                 ["excel_to_nested_json", "vessel_dataset", "vessel_loader"],
+                 [out_dir / "data.json", out_dir / DATASET_DIR], parallel=batch)
+
+
+def build_stages(json_path: Path, ingest: Optional[Stage]) -> List[Stage]:
+    out = json_path.parent
+    data = [json_path, out / DATASET_DIR]
+    summary = [out / f for f in ("summary_cube.csv", "delta_so2_stats.csv", "summary_meta.json")]
+    js = str(json_path)
+
+    def report(name, outputs, *extra):
+        return Stage(name, "generate_report.py", [js, "--outputs", name], data,
+                     ["generate_report", *extra], outputs, parallel=True, profile_tag=name)
+
+    stages = [ingest] if ingest else []
+    stages += [
+        report("summary", summary, "vessel_summary", "vessel_stats", "vessel_network", *LOADING),
+        Stage("txt", "generate_report.py", [js, "--outputs", "txt"], [json_path] + summary,
+              ["generate_report", "vessel_summary", "vessel_stats"], [out / "report.txt"],
+              profile_tag="txt"),
+        Stage("analysis", "analyze_so2.py", [js], data, ["analyze_so2", "vessel_stats", *LOADING],
+              [out / "analyze_so2.txt"], stdout=True),
+        report("overview", [out / "Oxygen_Extraction_Report.pdf"], *PLOTTING, *LOADING),
+        report("peranimal", [out / "Oxygen_Extraction_PerAnimal.pdf"], *PLOTTING, *LOADING),
+        report("detailed", [out / "Oxygen_Extraction_Detailed.pdf"], *PLOTTING, *LOADING),
+        Stage("redesign", "visualize_oxygen_redesigned.py", [js], data,
+              ["visualize_oxygen_redesigned", "vessel_plots", "vessel_stats", *LOADING],
+              [out / "output_redesign"]),
+    ]
+    return stages
+
+
+def dependencies(stages: List[Stage]) -> Dict[str, set]:
+    """Stage → stages producing one of its inputs."""
+    producer = {p: s.name for s in stages for p in s.outputs}
+    return {s.name: {producer[p] for p in s.inputs if p in producer} - {s.name} for s in stages}
+
+
+def select(stages: List[Stage], deps: Dict[str, set], only: List[str]) -> List[Stage]:
+    """The requested stages + everything upstream of them."""
+    keep, todo = set(), list(only)
+    while todo:
+        name = todo.pop()
+        if name not in keep:
+            keep.add(name)
+            todo += deps[name]
+    return [s for s in stages if s.name in keep]
+
+
+# —————————————————————————————————————————————————————————————————————
+# Content hashes
+# —————————————————————————————————————————————————————————————————————
+class Hasher:
+    """blake2b of files/folders, memoised on (size, mtime) across runs."""
+
+    def __init__(self, memo: dict):
+        self.memo = memo
+
+    def file(self, path: Path) -> str:
+        st = path.stat()
+        sig = [st.st_size, st.st_mtime_ns]
+        hit = self.memo.get(str(path))
+        if hit and hit[0] == sig:
+            return hit[1]
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        self.memo[str(path)] = [sig, h.hexdigest()]
+        return h.hexdigest()
+
+    def __call__(self, path: Path) -> str:
+        if not path.exists():
+            return "missing"
+        if path.is_file():
+            return self.file(path)
+        h = hashlib.blake2b(digest_size=16)
+        for f in sorted(p for p in path.rglob("*") if p.is_file()):
+            if not any(part.startswith(".") for part in f.relative_to(path).parts):
+                h.update(f"{f.relative_to(path)}={self.file(f)};".encode())
+        return h.hexdigest()
+
+
+def stage_key(stage: Stage, digest: Hasher) -> str:
+    parts = {
+        "script": stage.script,
+        "args": stage.args,
+        "inputs": {str(p): digest(p) for p in stage.inputs},
+        "code": {m: digest(HERE / f"{m}.py") for m in stage.code},
+    }
+    return hashlib.blake2b(json.dumps(parts, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+def up_to_date(stage: Stage, key: str, state: dict, digest: Hasher) -> bool:
+    last = state["stages"].get(stage.name)
+    return bool(last) and last["key"] == key and \
+        all(last["outputs"].get(str(p)) == digest(p) for p in stage.outputs)
+
+
+# —————————————————————————————————————————————————————————————————————
+# Run
+# —————————————————————————————————————————————————————————————————————
+def log_path(stage: Stage, state_dir: Path) -> Path:
+    return state_dir / f"{stage.name}.log"
+
+
+def execute(stage: Stage, state_dir: Path, workers: int, profile: bool = False) -> int:
+    cmd = [sys.executable, str(HERE / stage.script), *stage.args]
+    if stage.parallel:
+        cmd += ["-w", str(workers)]
+    if profile:
+        cmd += ["--profile"]
+    env = dict(os.environ, MPLBACKEND="Agg", PYTHONUNBUFFERED="1")
+    state_dir.mkdir(parents=True, exist_ok=True)
+    with open(log_path(stage, state_dir), "w", encoding="utf-8") as log:
+        if stage.stdout:        # terminal output → the output file, warnings/profile → the log
+            with open(stage.outputs[0], "w", encoding="utf-8") as out:
+                return subprocess.run(cmd, stdout=out, stderr=log, env=env, cwd=HERE).returncode
+        return subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT, env=env, cwd=HERE).returncode
+
+
+def profile_table(stages: List[Stage], ran: set, out_dir: Path) -> List[str]:
+    """One line per stage that ran, from its profile_*.json."""
+    lines = [f"   {'stage':<12} {'wall s':>8} {'cpu s':>8} {'RSS MB':>8}  slowest step"]
+    for stage in stages:
+        path = vessel_profile.profile_path(out_dir, Path(stage.script).stem, stage.profile_tag)
+        if stage.name not in ran or not path.exists():
+            continue
+        prof = json.loads(path.read_text(encoding="utf-8"))
+        total = prof["total"]
+        top = max((s for s in prof["stages"] if s["depth"] == 0), key=lambda s: s["wall_s"], default=None)
+        slowest = f"{top['stage']} ({top['wall_s']:.2f} s)" if top else ""
+        lines.append(f"   {stage.name:<12} {total['wall_s']:>8.2f} {total['cpu_s']:>8.2f} "
+                     f"{total['rss_peak_mb']:>8.0f}  {slowest}")
+    return lines
+
+
+def run(stages: List[Stage], state_dir: Path, jobs: int, workers: int,
+        force: bool = False, dry_run: bool = False, profile: bool = False) -> bool:
+    state_path = state_dir / STATE_FILE
+    state = json.loads(state_path.read_text()) if state_path.exists() else {}
+    state.setdefault("stages", {})
+    digest = Hasher(state.setdefault("hashes", {}))
+    deps = dependencies(stages)
+    n_parallel = max(1, min(jobs, sum(s.parallel for s in stages)))
+    share = max(1, workers // n_parallel)          # page workers per concurrent PDF stage
+
+    def save():
+        state_dir.mkdir(parents=True, exist_ok=True)
+        tmp = state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state, indent=1))
+        tmp.replace(state_path)
+
+    pending = {s.name: s for s in stages}
+    done, failed, ran = set(), set(), set()
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if deps[name] & failed:
+                    print(f"   ✗ {name}: skipped (upstream failed)")
+                    failed.add(name)
+                elif deps[name] <= done:
+                    key = stage_key(stage, digest)
+                    stale = dry_run and deps[name] & ran      # upstream would rerun first
+                    if not force and not stale and up_to_date(stage, key, state, digest):
+                        print(f"   ✓ {name}: up to date")
+                        done.add(name)
+                    elif dry_run:
+                        print(f"   → {name}: would run ({stage.script} {' '.join(stage.args)})")
+                        done.add(name); ran.add(name)
+                    else:
+                        print(f"   ▶ {name}: running {stage.script}")
+                        future = pool.submit(execute, stage, state_dir, share, profile)
+                        running[future] = (stage, key, time.perf_counter())
+                else:
+                    continue
+                del pending[name]
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, key, t0 = running.pop(future)
+                seconds = time.perf_counter() - t0
+                if future.result() == 0:
+                    # outputs rewritten → hash them now, so the next run can trust the memo
+                    state["stages"][stage.name] = {
+                        "key": stage_key(stage, digest),
+                        "outputs": {str(p): digest(p) for p in stage.outputs},
+                    }
+                    done.add(stage.name); ran.add(stage.name)
+                    print(f"   ✔ {stage.name}: done in {seconds:.1f} s")
+                else:
+                    log = log_path(stage, state_dir)
+                    tail = log.read_text(encoding="utf-8", errors="replace").splitlines()[-15:]
+                    print(f"   ✗ {stage.name}: failed after {seconds:.1f} s (log: {log})")
+                    for line in tail:
+                        print(f"     | {line}")
+                    failed.add(stage.name)
+                save()
+    if not dry_run:
+        save()
+    if profile and ran and not dry_run:
+        print("\n[PROFILE] per stage (details: profile_*.json, .pipeline/<stage>.log)")
+        print("\n".join(profile_table(stages, ran, state_dir.parent)))
+    return not failed
+
+
+# —————————————————————————————————————————————————————————————————————
+# CLI
+# —————————————————————————————————————————————————————————————————————
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Excel → dataset → analysis → report + PDFs, "
+                                                 "rerunning only what changed")
+    parser.add_argument("input", nargs="+",
+                        help="Workbook (.xlsx), folder/glob/several workbooks (batch), or data.json")
+    parser.add_argument("-o", "--output", type=Path, default=None,
+                        help="Batch ingest: combined output folder (default: <input dir>/combined)")
+    parser.add_argument("--only", nargs="+", default=None,
+                        choices=["ingest", "summary", "txt", "analysis", "overview", "peranimal",
+                                 "detailed", "redesign"],
+                        help="Run only these stages (+ the stages they depend on)")
+    parser.add_argument("-j", "--jobs", type=int, default=cores,
+                        help="Stages running at the same time (default: all cores)")
+    parser.add_argument("-w", "--workers", type=int, default=cores,
+                        help="Page/sheet worker processes, shared by concurrent stages (default: all cores)")
+    parser.add_argument("--force", action="store_true", help="Rerun every selected stage")
+    parser.add_argument("--dry-run", action="store_true", help="Only show which stages would run")
+    parser.add_argument("--profile", action="store_true",
+                        help="Run the stages with --profile and show their times at the end")
+    args = parser.parse_args()
+
+    ingest = ingest_stage(args.input, args.output)
+    json_path = ingest.outputs[0] if ingest else Path(args.input[0]).resolve()
+    if ingest is None and not json_path.exists():
+        sys.exit(f"File not found: {json_path}")
+    if ingest is not None:
+        missing = [p for p in ingest.inputs if not p.exists()]
+        if missing:
+            sys.exit(f"File not found: {missing[0]}")
+
+    stages = build_stages(json_path, ingest)
+    if args.only:
+        if "ingest" in args.only and ingest is None:
+            sys.exit("ERROR: --only ingest needs workbook input")
+        stages = select(stages, dependencies(stages), args.only)
+
+    print(f"[PIPELINE] {len(stages)} stage(s) → {json_path.parent}")
+    t0 = time.perf_counter()
+    ok = run(stages, json_path.parent / STATE_DIR, args.jobs, args.workers, args.force, args.dry_run,
+             args.profile)
+    print(f"[PIPELINE] {'done' if ok else 'FAILED'} in {time.perf_counter() - t0:.1f} s")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+vessel_dataset.py
+Author: G.M
+Date: 18-10-2026
+Version: 0.1
+
+Columnar (Parquet) copy of the vessel data, partitioned by animal:
+
+    <folder>/data.json                       ← nested JSON (unchanged)
+    <folder>/dataset/
+        animal=<id>/part-0.parquet           ← one file per animal
+        _common_metadata                     ← dataset schema (written last)
+        _meta.json                           ← source, rows, animals
+
+Proper dtypes instead of JSON text: ids → int32, strings → dictionary
+(pandas category), measurements → float64. Readers load only the columns
+they need, in milliseconds. The derived metrics from vessel_metrics.py
+(delta_SO2, diameter, size_group, masks) are stored alongside.
+
+Requires pyarrow; without it the scripts silently keep using data.json.
+"""
+
+import json
+import re
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import pandas as pd
+
+import vessel_metrics
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:          # optional dependency
+    pa = None
+
+DATASET_DIR = "dataset"
+SCHEMA_FILE = "_common_metadata"
+META_FILE = "_meta.json"
+
+# Integral id-like columns → compact int32 (nullable in Arrow)
+INT_COLUMNS = {"vessel_nr", "vessel_type", "corresp"}
+
+
+def available() -> bool:
+    return pa is not None
+
+
+def dataset_dir(json_path: Path) -> Path:
+    return json_path.parent / DATASET_DIR
+
+
+# —————————————————————————————————————————————————————————————————————
+# Write
+# —————————————————————————————————————————————————————————————————————
+def _field_for(name: str, s: pd.Series) -> "pa.Field":
+    if pd.api.types.is_bool_dtype(s):
+        return pa.field(name, pa.bool_())
+    if pd.api.types.is_numeric_dtype(s):
+        if name in INT_COLUMNS or pd.api.types.is_integer_dtype(s):
+            return pa.field(name, pa.int32() if name in INT_COLUMNS else pa.int64())
+        return pa.field(name, pa.float64())
+    return pa.field(name, pa.dictionary(pa.int32(), pa.string()))
+
+
+def _widen(field: "pa.Field") -> "pa.Field":
+    """Next more permissive type: int → float64 → string."""
+    if pa.types.is_integer(field.type) or pa.types.is_boolean(field.type):
+        return pa.field(field.name, pa.float64())
+    return pa.field(field.name, pa.string())
+
+
+class DatasetWriter:
+    """Write one Parquet partition per animal as groups stream past."""
+
+    def __init__(self, root: Path, source: str = ""):
+        self.root = root
+        self.source = source
+        self.schema = None
+        self.rows = 0
+        self.animals = []
+        if root.exists():
+            shutil.rmtree(root)
+        root.mkdir(parents=True)
+
+    def _column(self, i: int, s: pd.Series) -> "pa.Array":
+        while True:
+            field = self.schema.field(i)
+            if pa.types.is_string(field.type) or pa.types.is_dictionary(field.type):
+                s = s.map(lambda v: v if v is None or isinstance(v, str) or pd.isna(v) else str(v))
+            try:
+                return pa.array(s, type=field.type, from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                if pa.types.is_string(field.type):
+                    raise
+                # e.g. a fractional value in an int column → widen; the final schema
+                # in _common_metadata casts earlier partitions on read
+                self.schema = self.schema.set(i, _widen(field))
+
+    def add(self, animal, group: pd.DataFrame):
+        df = vessel_metrics.add_metrics(group.reset_index(drop=True))
+        df.insert(0, "animal", str(animal))
+        if self.schema is None:
+            self.schema = pa.schema([_field_for(c, df[c]) for c in df.columns])
+        for c in df.columns:
+            if self.schema.get_field_index(c) < 0:
+                self.schema = self.schema.append(_field_for(c, df[c]))
+        arrays = []
+        for i, name in enumerate(self.schema.names):
+            col = df[name] if name in df.columns else pd.Series([None] * len(df))
+            arrays.append(self._column(i, col))
+        table = pa.Table.from_arrays(arrays, schema=self.schema)
+
+        safe = re.sub(r"[^\w.-]", "_", str(animal))
+        part = self.root / f"animal={safe}"
+        part.mkdir(exist_ok=True)
+        pq.write_table(table, part / "part-0.parquet")
+        self.rows += len(df)
+        self.animals.append(str(animal))
+
+    def close(self):
+        """Write the schema last: a dataset without it is incomplete and ignored."""
+        (self.root / META_FILE).write_text(json.dumps({
+            "source": self.source,
+            "rows": self.rows,
+            "animals": self.animals,
+            "created": datetime.now().isoformat(timespec="seconds"),
+        }, indent=2))
+        if self.schema is not None:
+            pq.write_metadata(self.schema, self.root / SCHEMA_FILE)
+
+
+def write_partitions(groups: Iterable, writer: Optional[DatasetWriter], animal_col: str) -> Iterator:
+    """Pass (animal, group) pairs through unchanged, writing each one to the dataset."""
+    for animal, group in groups:
+        if writer is not None:
+            writer.add(animal, group.drop(columns=[animal_col]))
+        yield animal, group
+
+
+# —————————————————————————————————————————————————————————————————————
+# Read
+# —————————————————————————————————————————————————————————————————————
+def find_dataset(json_path: Path) -> Optional[Path]:
+    """Dataset next to data.json, if complete and not older than the JSON."""
+    if pa is None:
+        return None
+    root = dataset_dir(json_path)
+    schema_file = root / SCHEMA_FILE
+    if not schema_file.exists():
+        return None
+    if json_path.exists() and schema_file.stat().st_mtime < json_path.stat().st_mtime:
+        return None   # JSON was rewritten/edited after the dataset → stale
+    return root
+
+
+def read_dataset(root: Path, columns: Optional[list] = None,
+                 animals: Optional[list] = None) -> pd.DataFrame:
+    """Load the flat vessel frame; only `columns` (+ animal) are read from disk."""
+    schema = pq.read_schema(root / SCHEMA_FILE)
+    dset = ds.dataset(root, format="parquet", schema=schema)
+    if columns is not None:
+        columns = ["animal"] + [c for c in columns if c != "animal" and c in schema.names]
+    flt = ds.field("animal").isin([str(a) for a in animals]) if animals else None
+    df = dset.to_table(columns=columns, filter=flt).to_pandas()
+    # Sorted categories → groupby/sort order identical to plain string columns
+    for c in df.select_dtypes("category").columns:
+        df[c] = df[c].cat.set_categories(sorted(df[c].cat.categories))
+    return df
+
+
+def load_from_dataset(json_path: Path, columns: Optional[list] = None) -> Optional[pd.DataFrame]:
+    """Flat frame from the columnar dataset, or None → caller falls back to data.json."""
+    root = find_dataset(json_path)
+    if root is None:
+        return None
+    df = read_dataset(root, columns)
+    print(f"[LOAD] Columnar dataset: {root} ({len(df):,} vessels, {len(df.columns)} columns)")
+    return df
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+vessel_loader.py
+Author: G.M
+Date: 18-10-2026
+Version: 0.3
+
+Shared loader for all analysis/plot scripts:
+
+    load_vessels(json_path, columns) → flat DataFrame, one row per vessel
+
+Sources, fastest first:
+  1. dataset/ (Parquet, see vessel_dataset.py) → only `columns` are read
+  2. .vessel_cache/<json name>.<hash>.pkl       → data.json parsed before
+  3. data.json itself                           → parsed, then cached
+With `columns`, every source returns those columns (+ derived metrics asked
+for) plus KEY_COLUMNS (animal, vid_name), in the same order.
+
+Large JSON files (≥ STREAM_MIN_BYTES on disk) are parsed incrementally when
+ijson is installed: animal → vessels[] events go straight into typed column
+buffers, so the nested dict is never built and peak memory stays close to
+the final columns (json.load + flatten needs ~3x that).
+
+The flat frame has categorical `animal`/`vid_name` (+ batch source/sheet/date tags,
+sorted categories),
+downcast integer columns and the derived metrics of vessel_metrics.py. The cache key is the content hash of the JSON, so
+an edited or rewritten file is always re-parsed.
+
+data.json can be plain or compressed:
+
+    data.json       → plain text
+    data.json.gz    → gzip (standard library)
+    data.json.zst   → zstd (needs: pip install zstandard)
+
+The compression is picked from the file suffix.
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import vessel_dataset
+import vessel_metrics
+import vessel_profile
+
+try:
+    import zstandard
+except ImportError:          # optional dependency
+    zstandard = None
+
+try:
+    import ijson
+except ImportError:          # optional dependency
+    ijson = None
+
+COMPRESSION_SUFFIX = {"gzip": ".gz", "zstd": ".zst"}
+
+CACHE_DIR = ".vessel_cache"
+CACHE_VERSION = "3"          # bump when the flat frame layout changes
+CATEGORICAL = ["animal", "vid_name", "source", "sheet", "date"]   # batch tags
+STREAM_MIN_BYTES = 64 * 1024 * 1024
+KEY_COLUMNS = ["animal", "vid_name"]    # always returned by load_vessels(columns=...)
+
+
+def json_path_for(output_dir: Path, compress: str = None) -> Path:
+    return output_dir / ("data.json" + COMPRESSION_SUFFIX.get(compress, ""))
+
+
+def open_json(path: Path, mode: str = "r"):
+    """Text handle for data.json / data.json.gz / data.json.zst ('r' or 'w')."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".gz":
+        # level 6: ~same size as 9 on this data, a lot faster
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=6)
+    if suffix == ".zst":
+        if zstandard is None:
+            sys.exit("ERROR: .zst needs the zstandard package (pip install zstandard)")
+        raw = open(path, mode + "b")
+        if mode == "w":
+            stream = zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def open_json_bytes(path: Path):
+    """Binary, decompressed read handle (for the incremental parser)."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".gz":
+        return gzip.open(path, "rb")
+    if suffix == ".zst":
+        if zstandard is None:
+            sys.exit("ERROR: .zst needs the zstandard package (pip install zstandard)")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return open(path, "rb")
+
+
+def load_json(path: Path) -> dict:
+    with open_json(path) as f:
+        return json.load(f)
+
+
+# —————————————————————————————————————————————————————————————————————
+# Flat frame
+# —————————————————————————————————————————————————————————————————————
+def flatten(data: dict) -> pd.DataFrame:
+    """Nested {animal: {"vessels": [...]}} → one row per vessel, built per animal."""
+    frames = []
+    for animal, info in data.items():
+        frame = pd.DataFrame(info["vessels"])
+        frame["animal"] = animal
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame()
+    # all-null columns in one animal come out as object → back to numeric
+    return pd.concat(frames, ignore_index=True).infer_objects()
+
+
+class ColumnBuffer:
+    """
+    One column, grown geometrically while rows stream in.
+    Numbers → float64 (NaN = missing), strings → int32 codes + dictionary
+    (-1 = missing), anything else / mixed → object.
+    """
+
+    def __init__(self):
+        self.kind = None        # None until the first non-null value
+        self.data = None
+        self.codes = {}         # str → code
+        self.count = 0          # non-null values
+        self.integral = True    # only JSON ints so far
+
+    def _alloc(self, kind: str, size: int):
+        self.kind = kind
+        if kind == "num":
+            self.data = np.full(size, np.nan)
+        elif kind == "str":
+            self.data = np.full(size, -1, dtype=np.int32)
+        else:
+            self.data = np.full(size, np.nan, dtype=object)
+
+    def _to_object(self):
+        old, kind = self.data, self.kind
+        self._alloc("obj", len(old))
+        if kind == "num":
+            mask = ~np.isnan(old)
+            self.data[mask] = old[mask]
+        else:
+            labels = np.array(list(self.codes), dtype=object)
+            mask = old >= 0
+            self.data[mask] = labels[old[mask]]
+
+    def append(self, row: int, value):
+        if value is None:
+            return
+        kind = "str" if isinstance(value, str) else \
+            "num" if isinstance(value, (int, float)) and not isinstance(value, bool) else "obj"
+        if self.kind is None:
+            self._alloc(kind, max(1024, 2 * row))
+        elif kind != self.kind and self.kind != "obj":
+            self._to_object()
+        if row >= len(self.data):                      # double → amortized O(1) appends
+            old = self.data
+            self._alloc(self.kind, max(row + 1, 2 * len(old)))
+            self.data[:len(old)] = old
+        if self.kind == "str":
+            value = self.codes.setdefault(value, len(self.codes))
+        elif self.kind == "num" and not isinstance(value, int):
+            self.integral = False
+        self.data[row] = value
+        self.count += 1
+
+    def finish(self, n: int, categorical: bool):
+        if self.kind is None:
+            return np.full(n, np.nan)
+        if len(self.data) < n:
+            old = self.data
+            self._alloc(self.kind, n)
+            self.data[:len(old)] = old
+        data = self.data[:n].copy()
+        self.data = None
+        if self.kind == "num" and self.integral and self.count == n:
+            return data.astype(np.int64)
+        if self.kind == "str":
+            labels = list(self.codes)
+            if categorical:
+                return pd.Categorical.from_codes(data, categories=labels)
+            out = np.array(labels, dtype=object)[np.maximum(data, 0)]
+            out[data < 0] = np.nan
+            return out
+        return data
+
+
+def read_columns(json_path: Path) -> pd.DataFrame:
+    """Flat frame straight from parser events (needs ijson); no nested dict in memory."""
+    columns = {}
+    animals = ColumnBuffer()
+    depth, row = 0, -1
+    animal = field = None
+    in_vessels = False
+    with open_json_bytes(json_path) as f:
+        for _, event, value in ijson.parse(f, use_float=True):
+            if event == "map_key":
+                if depth == 1:
+                    animal = value
+                elif depth == 2:
+                    in_vessels = value == "vessels"
+                elif depth == 4:
+                    field = value
+            elif event in ("start_map", "start_array"):
+                if depth == 3 and in_vessels and event == "start_map":
+                    row += 1                              # next vessel
+                    animals.append(row, animal)
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+            elif depth == 4 and in_vessels:
+                if field not in columns:
+                    columns[field] = ColumnBuffer()
+                columns[field].append(row, value)
+    n = row + 1
+    columns["animal"] = animals
+    return pd.DataFrame({name: col.finish(n, name in CATEGORICAL) for name, col in columns.items()},
+                        copy=False)
+
+
+def compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Categorical ids/session names, smallest integer dtype for integer columns."""
+    for c in CATEGORICAL:
+        if c in df.columns:
+            df[c] = df[c].astype("category")
+            df[c] = df[c].cat.set_categories(sorted(df[c].cat.categories))
+    for c in df.select_dtypes("integer").columns:
+        df[c] = pd.to_numeric(df[c], downcast="integer")
+    return df
+
+
+# —————————————————————————————————————————————————————————————————————
+# Cache
+# —————————————————————————————————————————————————————————————————————
+def file_hash(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def cache_path(json_path: Path, digest: str) -> Path:
+    return json_path.parent / CACHE_DIR / f"{json_path.name}.{digest}.v{CACHE_VERSION}.pkl"
+
+
+def write_cache(json_path: Path, path: Path, df: pd.DataFrame):
+    """Store the frame; caches of earlier contents of the same JSON are removed."""
+    path.parent.mkdir(exist_ok=True)
+    prefix = json_path.name + "."
+    for old in path.parent.glob(prefix + "*.pkl"):
+        if old != path and old.name[len(prefix):].count(".") == 2:     # <digest>.v<N>.pkl, not data.json.gz.…
+            old.unlink(missing_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")      # scripts may load the same JSON concurrently
+    df.to_pickle(tmp)
+    tmp.replace(path)
+
+
+# —————————————————————————————————————————————————————————————————————
+# Entry point for the scripts
+# —————————————————————————————————————————————————————————————————————
+def _select(df: pd.DataFrame, columns: Optional[list]) -> pd.DataFrame:
+    """The requested columns + KEY_COLUMNS — same result from dataset, cache or JSON."""
+    if columns is None:
+        return df
+    keys = [c for c in KEY_COLUMNS if c in df.columns]
+    return df[keys + [c for c in df.columns if c in columns and c not in keys]]
+
+
+def load_vessels(json_path: Path, columns: Optional[list] = None,
+                 use_cache: bool = True) -> pd.DataFrame:
+    json_path = Path(json_path)
+    with vessel_profile.stage("dataset"):
+        df = vessel_dataset.load_from_dataset(
+            json_path, None if columns is None else list(dict.fromkeys(KEY_COLUMNS + list(columns))))
+    if df is not None:
+        return _select(vessel_metrics.ensure_metrics(df), columns)
+
+    with vessel_profile.stage("hash json"):
+        digest = file_hash(json_path) if use_cache else None
+    cached = cache_path(json_path, digest) if use_cache else None
+    if cached is not None and cached.exists():
+        with vessel_profile.stage("read cache"):
+            df = pd.read_pickle(cached)
+        print(f"[LOAD] Cache: {cached} ({len(df):,} vessels)")
+    else:
+        print(f"[LOAD] Reading: {json_path}")
+        streamed = ijson is not None and json_path.stat().st_size >= STREAM_MIN_BYTES
+        try:
+            if streamed:
+                with vessel_profile.stage("parse json (incremental)"):
+                    df = read_columns(json_path)
+                animals = list(df["animal"].cat.categories) if len(df) else []
+            else:
+                with vessel_profile.stage("parse json"):
+                    data = load_json(json_path)
+                animals = list(data.keys())
+                with vessel_profile.stage("flatten"):
+                    df = flatten(data)
+                del data
+        except Exception as e:
+            sys.exit(f"ERROR: {e}")
+        print(f"   → {len(animals)} animal(s){' (incremental parse)' if streamed else ''}: "
+              f"{', '.join(animals)}")
+        with vessel_profile.stage("metrics"):
+            df = vessel_metrics.add_metrics(compact(df))
+        print(f"   → {len(df):,} vessels")
+        if cached is not None:
+            try:
+                with vessel_profile.stage("write cache"):
+                    write_cache(json_path, cached, df)
+            except OSError as e:
+                print(f"   ⚠️  Cache not written: {e}")
+
+    return _select(df, columns)
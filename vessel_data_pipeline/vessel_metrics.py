@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+vessel_metrics.py
+Author: G.M
+Date: 18-10-2026
+Version: 0.1
+
+Derived per-vessel metrics, computed once (vectorized) and shared by every
+report and plot:
+
+    delta_SO2     SO2_start - SO2_end               (NaN unless both measured)
+    diameter      2·√(volume / (π·length))  [µm]    (cylinder; NaN unless valid)
+    size_group    "Small (≤10 µm)" / "Large (>10 µm)" (NaN without diameter)
+    has_SO2       mask: SO2_start and SO2_end present
+    has_diameter  mask: volume and length present, length > 0
+
+Written into the Parquet dataset and the load cache, so the scripts read
+them instead of recomputing.
+"""
+
+import numpy as np
+import pandas as pd
+
+CAPILLARY_MAX_UM = 10.0
+SMALL = "Small (≤10 µm)"
+LARGE = "Large (>10 µm)"
+SIZE_GROUPS = [LARGE, SMALL]     # sorted, same order as the dataset's categories
+
+DERIVED = ["delta_SO2", "diameter", "size_group", "has_SO2", "has_diameter"]
+SOURCES = ["SO2_start", "SO2_end", "volume", "length"]
+
+
+def _column(df: pd.DataFrame, name: str) -> pd.Series:
+    if name in df.columns:
+        return pd.to_numeric(df[name], errors="coerce")
+    return pd.Series(np.nan, index=df.index)
+
+
+def add_metrics(df: pd.DataFrame) -> pd.DataFrame:
+    """Add the DERIVED columns in place (and return df)."""
+    start, end = _column(df, "SO2_start"), _column(df, "SO2_end")
+    volume, length = _column(df, "volume"), _column(df, "length")
+
+    has_so2 = start.notna() & end.notna()
+    has_diam = volume.notna() & length.notna() & (length > 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        diameter = 2 * np.sqrt(volume.where(has_diam) / (np.pi * length.where(has_diam)))
+
+    df["delta_SO2"] = (start - end).where(has_so2)
+    df["diameter"] = diameter
+    df["size_group"] = pd.Categorical(
+        np.where(diameter <= CAPILLARY_MAX_UM, SMALL, np.where(diameter > CAPILLARY_MAX_UM, LARGE, None)),
+        categories=SIZE_GROUPS)
+    df["has_SO2"] = has_so2
+    df["has_diameter"] = has_diam
+    return df
+
+
+def ensure_metrics(df: pd.DataFrame) -> pd.DataFrame:
+    """Frames from older datasets/caches: compute whatever is missing."""
+    if all(c in df.columns for c in DERIVED):
+        return df
+    return add_metrics(df)
+
+
+def measured(df: pd.DataFrame) -> pd.DataFrame:
+    """Vessels with both SO₂ values (→ valid delta_SO2)."""
+    return df[df["has_SO2"]]
+
+
+def with_diameter(df: pd.DataFrame) -> pd.DataFrame:
+    """Vessels with a valid volume/length (→ diameter defined, may be NaN for volume < 0)."""
+    return df[df["has_diameter"]]
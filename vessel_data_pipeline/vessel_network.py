@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+vessel_network.py
+Author: G.M
+Date: 18-10-2026
+Version: 0.1
+
+Vessel network built from the `corresp` links, for path-level oxygen
+extraction instead of single hops.
+
+Every vessel (row) is a node; `corresp` gives its one downstream vessel
+(same animal, or same animal + session with by=BY_SESSION). Dangling
+references, self-references and missing values → no edge. Duplicate
+vessel numbers resolve to their first row (as in the connection report).
+
+    upstream → … → vessel → corresp → … → chain end (root)
+
+With one outgoing link per vessel every component is a tree rooted at its
+chain end, or contains one cycle. All chains are walked at once by
+pointer jumping (successor of successor, log2(longest chain) numpy steps),
+so 100k-vessel networks take milliseconds.
+
+Columns added by add_network() (NETWORK):
+
+    net_component      weakly connected component id (whole frame)
+    net_size           vessels in the component
+    net_upstream       vessels linking directly into this one
+    net_depth          links from the vessel down to its chain end (0 = end, -1 = cycle)
+    net_root           vessel_nr of the chain end (-1 = cycle)
+    net_cum_delta_SO2  ΔSO₂ summed from the vessel down to the chain end
+                       (measured vessels only; NaN if none / cycle)
+    net_measured       vessels with ΔSO₂ on that path
+
+    python vessel_network.py data/data.json [--per-session] [--profile]
+        → vessel_network.csv next to data.json + summary in the terminal
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import NamedTuple, Sequence
+
+import numpy as np
+import pandas as pd
+import vessel_loader
+import vessel_metrics
+import vessel_profile
+
+BY_ANIMAL = ("animal",)
+BY_SESSION = ("animal", "vid_name")
+
+NETWORK = ["net_component", "net_size", "net_upstream", "net_depth", "net_root",
+           "net_cum_delta_SO2", "net_measured"]
+
+COLUMNS = ["animal", "vid_name", "vessel_nr", "corresp"] + vessel_metrics.DERIVED
+
+
+class VesselGraph(NamedTuple):
+    succ: np.ndarray             # downstream row position per row, -1 = none
+    adjacency: "csr_matrix"      # n × n, row → successor (scipy.sparse)
+    n_dangling: int              # corresp set, no such vessel
+    n_self: int                  # corresp == own vessel_nr
+
+
+# —————————————————————————————————————————————————————————————————————
+# Graph
+# —————————————————————————————————————————————————————————————————————
+def successors(df: pd.DataFrame, by: Sequence[str] = BY_ANIMAL):
+    """Row position of each vessel's corresp within its group (-1 = none), + dangling count."""
+    by = list(by)
+    n = len(df)
+    nodes = df[by].reset_index(drop=True)
+    nodes["vessel_nr"] = pd.to_numeric(df["vessel_nr"], errors="coerce").to_numpy(dtype=float)
+    nodes["_row"] = np.arange(n)
+    targets = nodes.drop_duplicates(subset=by + ["vessel_nr"])
+
+    refs = df[by].reset_index(drop=True)
+    refs["vessel_nr"] = pd.to_numeric(df["corresp"], errors="coerce").to_numpy(dtype=float)
+    # left join on unique targets → same length and order as refs
+    hit = refs.merge(targets, on=by + ["vessel_nr"], how="left")["_row"].to_numpy()
+    succ = np.where(np.isnan(hit), -1, hit).astype(np.int64)
+    n_dangling = int(refs["vessel_nr"].notna().sum() - (succ >= 0).sum())
+    return succ, n_dangling
+
+
+def build_graph(df: pd.DataFrame, by: Sequence[str] = BY_ANIMAL) -> VesselGraph:
+    succ, n_dangling = successors(df, by)
+    own = succ == np.arange(len(succ))
+    succ[own] = -1                      # self-reference → chain end, not a cycle
+    src = np.flatnonzero(succ >= 0)
+    from scipy.sparse import csr_matrix          # only when a network is built (not for report.txt)
+    adjacency = csr_matrix((np.ones(len(src), dtype=np.int8), (src, succ[src])),
+                           shape=(len(succ), len(succ)))
+    return VesselGraph(succ, adjacency, n_dangling, int(own.sum()))
+
+
+def walk_chains(succ: np.ndarray, weight: np.ndarray):
+    """
+    Pointer jumping along the successor links.
+    Returns (depth, root, path sum of `weight`, path count of non-NaN weight);
+    vessels on or leading into a cycle get depth/root -1 and NaN sums.
+    """
+    n = len(succ)
+    jump = succ.copy()
+    depth = (succ >= 0).astype(np.int64)
+    root = np.where(succ >= 0, succ, np.arange(n))
+    total = np.nan_to_num(weight)
+    count = (~np.isnan(weight)).astype(np.int64)
+
+    for _ in range(max(1, int(np.ceil(np.log2(max(n, 2))))) + 1):
+        active = np.flatnonzero(jump >= 0)
+        if len(active) == 0:
+            break
+        nxt = jump[active]
+        # all right-hand sides read the previous round's values
+        depth[active], total[active], count[active], root[active], jump[active] = (
+            depth[active] + depth[nxt], total[active] + total[nxt],
+            count[active] + count[nxt], root[nxt], jump[nxt])
+
+    cyclic = jump >= 0                  # still moving after log2(n) rounds
+    depth[cyclic] = root[cyclic] = -1
+    total = np.where(cyclic | (count == 0), np.nan, total)
+    return depth, root, total, count
+
+
+def add_network(df: pd.DataFrame, by: Sequence[str] = BY_ANIMAL) -> pd.DataFrame:
+    """Add the NETWORK columns in place (and return df)."""
+    from scipy.sparse.csgraph import connected_components
+    graph = build_graph(df, by)
+    n_comp, labels = connected_components(graph.adjacency, directed=True, connection="weak")
+    if "delta_SO2" not in df.columns:
+        vessel_metrics.add_metrics(df)
+    delta = df["delta_SO2"].to_numpy(dtype=float)
+    depth, root, total, count = walk_chains(graph.succ, delta)
+    linked = graph.succ >= 0
+
+    df["net_component"] = labels
+    df["net_size"] = np.bincount(labels, minlength=n_comp)[labels]
+    df["net_upstream"] = np.bincount(graph.succ[linked], minlength=len(df))
+    df["net_depth"] = depth
+    df["net_root"] = np.where(root >= 0, df["vessel_nr"].to_numpy()[np.maximum(root, 0)], -1)
+    df["net_cum_delta_SO2"] = total
+    df["net_measured"] = count
+    df.attrs["network"] = {"links": int(linked.sum()), "dangling": graph.n_dangling,
+                           "self": graph.n_self, "by": list(by)}
+    return df
+
+
+def summary(df: pd.DataFrame) -> dict:
+    """Network totals for the reports (df must have the NETWORK columns)."""
+    sizes = df.drop_duplicates("net_component")["net_size"]
+    # full paths: chain starts (nothing upstream) that lead somewhere
+    starts = df[(df["net_upstream"] == 0) & (df["net_depth"] > 0)]
+    return {
+        "vessels": len(df),
+        "networks": int((sizes > 1).sum()),
+        "isolated": int((sizes == 1).sum()),
+        "largest": int(sizes.max()) if len(sizes) else 0,
+        "longest_chain": int(df["net_depth"].max()) if len(df) else 0,
+        "on_cycle": int((df["net_depth"] < 0).sum()),
+        "paths": len(starts),
+        "path_delta_SO2": starts["net_cum_delta_SO2"].mean(),
+        **df.attrs.get("network", {}),
+    }
+
+
+def summary_lines(info: dict) -> list:
+    lines = [
+        f"{info['links']:,} corresp link(s) → {info['networks']:,} connected network(s) "
+        f"(largest {info['largest']:,} vessels, longest chain {info['longest_chain']} link(s)); "
+        f"{info['isolated']:,} unconnected vessel(s).",
+        f"Ignored: {info['dangling']:,} dangling reference(s), {info['self']:,} self-reference(s); "
+        f"{info['on_cycle']:,} vessel(s) on or leading into a cycle.",
+    ]
+    if info["paths"] and not np.isnan(info["path_delta_SO2"]):
+        lines.append(f"Mean cumulative ΔSO₂ along {info['paths']:,} full upstream→downstream "
+                     f"path(s): {info['path_delta_SO2']:+.4f}.")
+    return lines
+
+
+# —————————————————————————————————————————————————————————————————————
+# CLI
+# —————————————————————————————————————————————————————————————————————
+def main():
+    parser = argparse.ArgumentParser(description="Vessel network from corresp links")
+    parser.add_argument("json", type=Path, help="Path to data.json")
+    parser.add_argument("--per-session", action="store_true",
+                        help="Link vessels within animal + session (default: within animal)")
+    vessel_profile.add_arguments(parser)
+    args = parser.parse_args()
+    if not args.json.exists():
+        sys.exit(f"File not found: {args.json}")
+    vessel_profile.start(args, "vessel_network", args.json.parent)
+
+    with vessel_profile.stage("load"):
+        df = vessel_loader.load_vessels(args.json, COLUMNS)
+    missing = {"vessel_nr", "corresp"} - set(df.columns)
+    if missing:
+        sys.exit(f"ERROR: column(s) missing: {', '.join(sorted(missing))}")
+    with vessel_profile.stage("network"):
+        add_network(df, BY_SESSION if args.per_session else BY_ANIMAL)
+
+    for line in summary_lines(summary(df)):
+        print(f"   {line}")
+    out_path = args.json.parent / "vessel_network.csv"
+    keep = [c for c in ["animal", "vid_name", "vessel_nr", "corresp", "delta_SO2"] if c in df.columns]
+    with vessel_profile.stage("write csv"):
+        df[keep + NETWORK].to_csv(out_path, index=False)
+    print(f"→ Network table saved: {out_path}")
+
+
+if __name__ == "__main__":
+    main()
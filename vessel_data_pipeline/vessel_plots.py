@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+vessel_plots.py
+Author: G.M
+Date: 18-10-2026
+Version: 0.3
+
+Shared plotting helpers for the report/visualization scripts.
+
+beeswarm(): fast replacement for sns.swarmplot. Values are binned by one
+marker diameter along the value axis; inside a bin the points are placed
+side by side (0, +1, −1, +2, …) in sorted order. One sort + one cumulative
+count → thousands of points in milliseconds, no overlap warnings. When a
+bin is wider than the axes, the row is squeezed instead of dropping points.
+
+Large-n mode, so PDF size and render time stay bounded for any vessel count:
+  • n > RASTER_MIN  → point layers are rasterized (axes/text stay vector)
+  • n > DENSITY_MIN → scatters become hexbin density (so2_scatter: mean ΔSO₂
+    per hexagon, geometry_scatter: vessel count per hexagon, log colour)
+
+paired_lines(): all inlet→outlet lines of a group as one LineCollection
+(segments built as one (n, 2, 2) array) instead of one Line2D per vessel.
+"""
+
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from matplotlib.collections import LineCollection
+
+SWARM_MAX = 5000            # above this: 1k-sample strip plot + histogram inset
+RASTER_MIN = 2000           # rasterize point layers above this many points
+DENSITY_MIN = 10000         # hexbin instead of scatter above this many points
+HEX_GRIDSIZE = 60
+
+
+def beeswarm_offsets(values: np.ndarray, bin_width: float) -> np.ndarray:
+    """Side offsets (in marker diameters) for each value, same order as `values`."""
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n == 0:
+        return np.zeros(0)
+    order = np.argsort(values, kind="stable")
+    if bin_width > 0:
+        bins = np.floor((values[order] - values[order[0]]) / bin_width).astype(np.int64)
+    else:
+        bins = np.zeros(n, dtype=np.int64)
+    # rank inside each bin: position − index of the bin's first element
+    starts = np.r_[0, np.flatnonzero(np.diff(bins)) + 1]
+    first = np.repeat(starts, np.diff(np.r_[starts, n]))
+    rank = np.arange(n) - first
+    side = np.where(rank % 2 == 1, 1.0, -1.0)
+    offsets = np.empty(n)
+    offsets[order] = side * ((rank + 1) // 2)
+    return offsets
+
+
+def beeswarm(ax, data: pd.Series, color="purple", size: float = 4.5, alpha: float = 0.85):
+    """Swarm of `data` on the y axis (like sns.swarmplot(data=series)), markers `size` pt wide."""
+    values = np.asarray(data, dtype=float)
+    fig = ax.figure
+    box = ax.get_position()
+    height_pt = box.height * fig.get_figheight() * 72
+    width_pt = box.width * fig.get_figwidth() * 72
+
+    lo, hi = values.min(), values.max()
+    span = (hi - lo) or 1.0
+    pad = 0.05 * span
+    bin_width = (span + 2 * pad) * size / height_pt
+
+    offsets = beeswarm_offsets(values, bin_width)
+    half_width = max(width_pt / size / 2, np.abs(offsets).max() + 1)   # squeeze if too wide
+    ax.scatter(offsets, values, s=size ** 2, color=color, alpha=alpha, linewidths=0,
+               rasterized=len(values) > RASTER_MIN)
+    ax.set_xlim(-half_width, half_width)
+    ax.set_ylim(lo - pad, hi + pad)
+    ax.set_xticks([])
+    return offsets
+
+
+def so2_scatter(ax, meas: pd.DataFrame, s: float = 30, alpha: float = 0.7, colorbar: bool = True):
+    """SO₂ entrance (y) vs exit (x), coloured by ΔSO₂; mean-ΔSO₂ hexbin for large n."""
+    n = len(meas)
+    if n > DENSITY_MIN:
+        art = ax.hexbin(meas["SO2_end"], meas["SO2_start"], C=meas["delta_SO2"],
+                        reduce_C_function=np.mean, gridsize=HEX_GRIDSIZE, cmap="RdYlGn", mincnt=1)
+        label = "mean ΔSO₂"
+    else:
+        art = ax.scatter(meas["SO2_end"], meas["SO2_start"], c=meas["delta_SO2"], cmap="RdYlGn",
+                         s=s, alpha=alpha, rasterized=n > RASTER_MIN)
+        label = "ΔSO₂"
+    if colorbar:
+        ax.figure.colorbar(art, ax=ax, label=label)
+    return art
+
+
+def geometry_scatter(ax, df: pd.DataFrame, palette=None, alpha: float = 0.6, **kwargs) -> bool:
+    """
+    Length vs volume coloured by vessel_type (kwargs → sns.scatterplot).
+    Returns True if drawn as a density hexbin (no per-type legend then).
+    """
+    valid = df.dropna(subset=["length", "volume"])
+    if len(valid) > DENSITY_MIN:
+        art = ax.hexbin(valid["length"], valid["volume"], gridsize=HEX_GRIDSIZE, bins="log",
+                        cmap="viridis", mincnt=1)
+        ax.figure.colorbar(art, ax=ax, label="vessels")
+        ax.set_xlabel("length"); ax.set_ylabel("volume")
+        return True
+    sns.scatterplot(data=df, x="length", y="volume", hue="vessel_type", palette=palette,
+                    ax=ax, alpha=alpha, rasterized=len(valid) > RASTER_MIN, **kwargs)
+    return False
+
+
+def paired_lines(ax, start, end, jitter, color, alpha: float = 0.25, linewidth: float = 1):
+    """One line per vessel from (jitter, start) to (1 + jitter, end), drawn as a single artist."""
+    start = np.asarray(start, dtype=float)
+    segments = np.empty((len(start), 2, 2))
+    segments[:, 0, 0] = jitter
+    segments[:, 1, 0] = 1 + np.asarray(jitter)
+    segments[:, 0, 1] = start
+    segments[:, 1, 1] = end
+    # same look as ax.plot: projecting caps, round joins, line zorder
+    lines = LineCollection(segments, colors=color, alpha=alpha, linewidths=linewidth,
+                           capstyle="projecting", joinstyle="round", zorder=2)
+    ax.add_collection(lines)
+    return lines
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+vessel_profile.py
+Author: G.M
+Date: 18-10-2026
+Version: 0.1
+
+--profile for all pipeline scripts: where do the seconds and megabytes go?
+
+    python generate_report.py data/data.json --profile
+    python generate_report.py data/data.json --profile --trace-memory --cprofile
+
+Per stage (nested stages are named "load/flatten"):
+
+    wall_s       elapsed time
+    cpu_s        CPU time of this process + of worker processes that ended
+                 during the stage (page/sheet/bootstrap pools)
+    py_peak_mb   peak Python allocations during the stage (tracemalloc,
+                 only with --trace-memory)
+    rss_peak_mb  process peak RSS at the end of the stage (high-water mark,
+                 never goes down)
+
+Per rendered PDF page (vessel_render.py), measured in the worker that drew
+it: wall_s, cpu_s, py_peak_mb, rss_peak_mb of that worker, pid.
+
+At exit a table is printed (stderr, so captured terminal output stays
+clean) and everything is written to <output folder>/profile_<script>.json
+(profile_<script>.<tag>.json when a script runs only part of its outputs).
+With --cprofile every top-level stage
+is also dumped to <output folder>/profile/<script>.<stage>.prof
+(python -m pstats, snakeviz); pages drawn in worker processes are not in
+those dumps (use -w 1 to include them), and the profiled process itself
+runs about 2× slower.
+
+--profile alone costs next to nothing. --trace-memory (tracemalloc) makes
+matplotlib-heavy code ≈4× slower (sample study: 15 s → 61 s), so take
+times from a run without it.
+
+Library code marks stages with `with vessel_profile.stage("name"):`; that
+is a no-op unless a script called start().
+"""
+
+import atexit
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+try:
+    import resource
+except ImportError:          # Windows: no peak RSS
+    resource = None
+
+MB = 1024 * 1024
+SLOWEST_PAGES = 5
+
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / MB if sys.platform == "darwin" else peak / 1024     # bytes on macOS, KiB on Linux
+
+
+def children_cpu() -> float:
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _traced_peak() -> int:
+    return tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+
+
+class Profiler:
+    def __init__(self, script: str, out_dir: Path, cprofile: bool = False,
+                 trace_memory: bool = False, tag: Optional[str] = None):
+        self.script = script
+        self.tag = tag
+        self.out_dir = Path(out_dir)
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+        self.stages: List[dict] = []
+        self.pages: List[dict] = []
+        self.cached_pages = 0
+        self._stack: List[dict] = []
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.process_time() + children_cpu()
+        if trace_memory:
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str):
+        if self._stack:
+            # a nested stage resets the peak counter → keep the parent's peak so far
+            parent = self._stack[-1]
+            parent["peak"] = max(parent["peak"], _traced_peak())
+        frame = {"name": "/".join([f["name"] for f in self._stack] + [name]), "peak": 0}
+        record = {"stage": frame["name"], "depth": len(self._stack)}
+        self.stages.append(record)          # in start order: parents before their children
+        self._stack.append(frame)
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        prof = cProfile.Profile() if self.cprofile and len(self._stack) == 1 else None
+        t0, cpu0 = time.perf_counter(), time.process_time() + children_cpu()
+        if prof is not None:
+            prof.enable()
+        try:
+            yield
+        finally:
+            if prof is not None:
+                prof.disable()
+            wall, cpu = time.perf_counter() - t0, time.process_time() + children_cpu() - cpu0
+            self._stack.pop()
+            peak = max(frame["peak"], _traced_peak())
+            if self._stack:
+                self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+            record.update(wall_s=round(wall, 4), cpu_s=round(cpu, 4),
+                          py_peak_mb=round(peak / MB, 2), rss_peak_mb=round(peak_rss_mb(), 1))
+            if prof is not None:
+                folder = self.out_dir / "profile"
+                folder.mkdir(parents=True, exist_ok=True)
+                prof.dump_stats(folder / f"{self.script}.{name.replace(' ', '_')}.prof")
+
+    def add_pages(self, records: List[dict], cached: int = 0):
+        """Page records from vessel_render (see measure())."""
+        self.pages += records
+        self.cached_pages += cached
+
+    # —————————————————————————————————————————————————————————————————
+    # Output
+    # —————————————————————————————————————————————————————————————————
+    def result(self) -> dict:
+        by_pdf = {}
+        for p in self.pages:
+            agg = by_pdf.setdefault(p["pdf"], {"pages": 0, "wall_s": 0.0, "cpu_s": 0.0, "py_peak_mb": 0.0})
+            agg["pages"] += 1
+            agg["wall_s"] = round(agg["wall_s"] + p["wall_s"], 4)
+            agg["cpu_s"] = round(agg["cpu_s"] + p["cpu_s"], 4)
+            agg["py_peak_mb"] = max(agg["py_peak_mb"], p["py_peak_mb"])
+        return {
+            "script": self.script,
+            "argv": sys.argv[1:],
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "pid": os.getpid(),
+            "cpus": os.cpu_count(),
+            "trace_memory": self.trace_memory,
+            "total": {
+                "wall_s": round(time.perf_counter() - self._t0, 4),
+                "cpu_s": round(time.process_time() + children_cpu() - self._cpu0, 4),
+                "rss_peak_mb": round(peak_rss_mb(), 1),
+            },
+            "stages": [s for s in self.stages if "wall_s" in s],
+            "pdfs": by_pdf,
+            "pages": self.pages,
+            "cached_pages": self.cached_pages,
+        }
+
+    def table(self, result: dict) -> List[str]:
+        total = result["total"]
+        py = self.trace_memory
+        lines = [f"PROFILE {self.script}: {total['wall_s']:.2f} s wall, {total['cpu_s']:.2f} s CPU, "
+                 f"peak RSS {total['rss_peak_mb']:.0f} MB",
+                 f"   {'stage':<34} {'wall s':>8} {'cpu s':>8} {'RSS MB':>8}" + (f" {'py MB':>8}" if py else "")]
+        for s in result["stages"]:
+            label = "  " * s["depth"] + s["stage"].rsplit("/", 1)[-1]
+            lines.append(f"   {label:<34} {s['wall_s']:>8.2f} {s['cpu_s']:>8.2f} {s['rss_peak_mb']:>8.0f}"
+                         + (f" {s['py_peak_mb']:>8.1f}" if py else ""))
+        if result["pdfs"] or result["cached_pages"]:
+            workers = len({p["pid"] for p in self.pages})
+            lines.append(f"   pages: {len(self.pages)} rendered on {workers} process(es), "
+                         f"{result['cached_pages']} from cache")
+            for pdf, agg in result["pdfs"].items():
+                lines.append(f"     {pdf:<32} {agg['pages']:>4} page(s) {agg['wall_s']:>8.2f} s"
+                             + (f" (max py {agg['py_peak_mb']:.1f} MB)" if py else ""))
+            for p in sorted(self.pages, key=lambda p: -p["wall_s"])[:SLOWEST_PAGES]:
+                lines.append(f"     slowest: {p['title'][:40]:<40} {p['wall_s']:>6.2f} s")
+        return lines
+
+    def finish(self):
+        result = self.result()
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        out_path = profile_path(self.out_dir, self.script, self.tag)
+        out_path.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+        sys.stdout.flush()
+        print("\n" + "\n".join(self.table(result)), file=sys.stderr)
+        print(f"→ Profile saved: {out_path}", file=sys.stderr)
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+@contextmanager
+def measure(record: dict):
+    """
+    Time one block into `record` (wall_s, cpu_s, py_peak_mb, rss_peak_mb, pid):
+    PDF pages, in a worker or inside a stage of this process.
+    """
+    outer = _ACTIVE._stack[-1] if _ACTIVE is not None and _ACTIVE._stack else None
+    if outer is not None:
+        outer["peak"] = max(outer["peak"], _traced_peak())
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    t0, cpu0 = time.perf_counter(), time.process_time()
+    try:
+        yield record
+    finally:
+        peak = _traced_peak()
+        if outer is not None:
+            outer["peak"] = max(outer["peak"], peak)
+        record.update(wall_s=round(time.perf_counter() - t0, 4),
+                      cpu_s=round(time.process_time() - cpu0, 4),
+                      py_peak_mb=round(peak / MB, 2), rss_peak_mb=round(peak_rss_mb(), 1),
+                      pid=os.getpid())
+
+
+def profile_path(out_dir: Path, script: str, tag: Optional[str] = None) -> Path:
+    return Path(out_dir) / f"profile_{script}{'.' + tag if tag else ''}.json"
+
+
+# —————————————————————————————————————————————————————————————————————
+# Module-level switch
+# —————————————————————————————————————————————————————————————————————
+_ACTIVE: Optional[Profiler] = None
+
+
+def active() -> Optional[Profiler]:
+    return _ACTIVE
+
+
+def stage(name: str):
+    """Context manager timing one stage; no-op without start()."""
+    return _ACTIVE.stage(name) if _ACTIVE is not None else nullcontext()
+
+
+def add_arguments(parser):
+    parser.add_argument("--profile", action="store_true",
+                        help="Wall/CPU time + peak RSS per stage and per PDF page → table + profile_<script>.json")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="With --profile: also peak Python allocations (tracemalloc; ≈4× slower)")
+    parser.add_argument("--cprofile", action="store_true",
+                        help="With --profile: also dump cProfile stats per stage to profile/")
+
+
+def start(args, script: str, out_dir: Path, tag: Optional[str] = None) -> Optional[Profiler]:
+    """Enable profiling if --profile was given; the report is written at exit."""
+    global _ACTIVE
+    if not getattr(args, "profile", False):
+        return None
+    _ACTIVE = Profiler(script, out_dir, cprofile=args.cprofile, trace_memory=args.trace_memory, tag=tag)
+    atexit.register(_ACTIVE.finish)
+    return _ACTIVE
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+vessel_render.py
+Author: G.M
+Date: 18-10-2026
+Version: 0.3
+
+Parallel PDF page rendering for the reports.
+
+A report is a list of Page(pdf, plot, subset, title) entries. Every page is
+drawn by `plot(pdf, sub_df, title)` (the existing plot functions) into its
+own small PDF in a worker process (Agg backend), then the parts are merged
+into the final PDFs in list order:
+
+    pages → process pool → part-00000.pdf, part-00001.pdf, … → pypdf merge
+
+Render cache (<out_dir>/.render_cache/<key>.pdf): a page's key hashes its
+data subset (values, columns, dtypes), plot function, title and the source
+of the plotting code. On rerun only pages whose key changed are drawn; the
+PDFs are reassembled from cached parts. Adding one session → a handful of
+new pages instead of the whole study. Parts are named <pdf stem>.<key>.pdf
+and only the rendered PDFs' stale parts are pruned, so processes rendering
+different PDFs into the same folder (run_pipeline.py) can share the cache.
+
+Without pypdf, pages are drawn serially straight into the final PDFs (the
+old behaviour, no cache).
+
+Every drawn page is timed (wall, CPU, memory of the process that drew it);
+with --profile the records go to vessel_profile.py.
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import matplotlib
+import matplotlib.pyplot as plt
+import pandas as pd
+from matplotlib.backends.backend_pdf import PdfPages
+
+import vessel_profile
+
+try:
+    import pypdf
+except ImportError:          # optional dependency
+    pypdf = None
+
+CACHE_DIR = ".render_cache"
+CODE_MODULES = ["vessel_plots", "vessel_metrics", "vessel_render"]   # + the plot's own module
+
+
+class Page(NamedTuple):
+    pdf: str                                  # output file name
+    plot: Callable                            # plot(pdf, sub_df, title)
+    subset: Optional[Tuple[str, object]]      # (column, value) or None = all rows
+    title: str
+
+
+def select(df: pd.DataFrame, subset: Optional[Tuple[str, object]]) -> pd.DataFrame:
+    if subset is None:
+        return df
+    col, value = subset
+    return df[df[col] == value]
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+# —————————————————————————————————————————————————————————————————————
+# Page keys
+# —————————————————————————————————————————————————————————————————————
+_code_hashes: Dict[str, bytes] = {}
+
+
+def _code_hash(module: str) -> bytes:
+    if module not in _code_hashes:
+        path = getattr(sys.modules.get(module), "__file__", None)
+        data = Path(path).read_bytes() if path else module.encode()
+        _code_hashes[module] = hashlib.blake2b(data, digest_size=16).digest()
+    return _code_hashes[module]
+
+
+def page_key(df: pd.DataFrame, page: Page) -> str:
+    """Content hash of everything that determines how the page looks."""
+    sub = select(df, page.subset)
+    h = hashlib.blake2b(digest_size=20)
+    h.update(pd.util.hash_pandas_object(sub, index=False).to_numpy().tobytes())
+    h.update(repr([(c, str(t)) for c, t in sub.dtypes.items()]).encode())
+    # module *source* (not name): run as script (__main__) or imported → same key
+    h.update(f"{page.plot.__qualname__}|{page.title}|"
+             f"{matplotlib.__version__}".encode())
+    for module in [page.plot.__module__] + CODE_MODULES:
+        h.update(_code_hash(module))
+    return h.hexdigest()
+
+
+# —————————————————————————————————————————————————————————————————————
+# Worker side
+# —————————————————————————————————————————————————————————————————————
+_DF = None
+
+
+def _init_worker(df: pd.DataFrame, trace_memory: bool = False):
+    global _DF
+    _DF = df
+    plt.switch_backend("Agg")
+    if trace_memory:
+        tracemalloc.start()
+
+
+def _render(job: Tuple[Page, str]) -> dict:
+    page, path = job
+    tmp = path + ".tmp"      # a crash never leaves a half-written cache entry
+    with vessel_profile.measure({"pdf": page.pdf, "title": page.title}) as record:
+        with PdfPages(tmp) as pdf:
+            page.plot(pdf, select(_DF, page.subset), page.title)
+        plt.close("all")
+    os.replace(tmp, path)
+    return record
+
+
+# —————————————————————————————————————————————————————————————————————
+# Main side
+# —————————————————————————————————————————————————————————————————————
+def _render_serial(df: pd.DataFrame, pages: List[Page], out_dir: Path) -> Dict[str, Path]:
+    outputs, records = {}, []
+    for name in dict.fromkeys(p.pdf for p in pages):
+        outputs[name] = out_dir / name
+        with PdfPages(outputs[name]) as pdf:
+            for page in pages:
+                if page.pdf == name:
+                    with vessel_profile.measure({"pdf": page.pdf, "title": page.title}) as record:
+                        page.plot(pdf, select(df, page.subset), page.title)
+                    records.append(record)
+    if vessel_profile.active():
+        vessel_profile.active().add_pages(records)
+    return outputs
+
+
+def merge(parts: List[Path], out_path: Path):
+    writer = pypdf.PdfWriter()
+    for part in parts:
+        writer.append(str(part))
+    with open(out_path, "wb") as f:
+        writer.write(f)
+
+
+def render_pages(df: pd.DataFrame, pages: List[Page], out_dir: Path,
+                 workers: int = 1, cache: bool = True) -> Dict[str, Path]:
+    """Render all pages, return {pdf name: path} in first-seen order."""
+    if pypdf is None:
+        if workers > 1 or cache:
+            print("   ⚠️  pypdf not installed → rendering serially, no page cache (pip install pypdf)")
+        return _render_serial(df, pages, out_dir)
+
+    with tempfile.TemporaryDirectory(prefix="report_pages_", dir=out_dir) as tmp:
+        if cache:
+            part_dir = out_dir / CACHE_DIR
+            part_dir.mkdir(exist_ok=True)
+            with vessel_profile.stage("page keys"):
+                names = [f"{Path(page.pdf).stem}.{page_key(df, page)}.pdf" for page in pages]
+        else:
+            part_dir = Path(tmp)
+            names = [f"part-{i:05d}.pdf" for i in range(len(pages))]
+        parts = [part_dir / name for name in names]
+
+        todo = {}
+        for page, part in zip(pages, parts):
+            if not part.exists():
+                todo.setdefault(str(part), page)
+        jobs = [(page, path) for path, page in todo.items()]
+        workers = max(1, min(workers, len(jobs)))
+        if cache:
+            print(f"   Pages: {len(pages) - len(jobs)} cached, {len(jobs)} to render")
+        profiler = vessel_profile.active()
+        with vessel_profile.stage("render"):
+            if workers > 1:
+                print(f"   Rendering {len(jobs)} page group(s) on {workers} worker(s)...")
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                         initargs=(df, profiler is not None and profiler.trace_memory)) as pool:
+                    # chunksize 1: page costs vary a lot (overview vs. one session)
+                    records = list(pool.map(_render, jobs))
+            else:
+                global _DF
+                _DF = df
+                try:
+                    records = [_render(job) for job in jobs]
+                finally:
+                    _DF = None
+        if profiler is not None:
+            profiler.add_pages(records, cached=len(pages) - len(jobs) if cache else 0)
+
+        outputs = {}
+        with vessel_profile.stage("merge"):
+            for name in dict.fromkeys(p.pdf for p in pages):
+                outputs[name] = out_dir / name
+                merge([part for page, part in zip(pages, parts) if page.pdf == name], outputs[name])
+
+    if cache:
+        keep = set(names)
+        mine = {Path(name).stem for name in outputs}
+        for old in part_dir.glob("*.pdf"):
+            owner = old.name.split(".")[0] if old.name.count(".") == 2 else None   # None: pre-0.3 name
+            if old.name not in keep and (owner in mine or owner is None):
+                old.unlink(missing_ok=True)     # pages of subsets that changed or disappeared
+    return outputs
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+vessel_stats.py
+Author: G.M
+Date: 18-10-2026
+Version: 0.1
+
+ΔSO₂ statistics for every cell of every grouping level, in one pass:
+
+    level            cells
+    all              whole study
+    animal           per animal
+    session          per vid_name (all animals)
+    size_group       Small / Large
+    animal_session   animal × vid_name
+    animal_size      animal × size group        (paired plots)
+    cell             animal × vid_name × size group
+
+Per cell: n, mean, median, std, sem, bootstrap CI of the mean (percentile,
+ci_low/ci_high), paired t-test of SO2_start vs SO2_end (t, p_t — same as
+scipy ttest_rel) and Wilcoxon signed-rank p (p_wilcoxon, normal
+approximation with tie correction, zero differences dropped).
+
+Bootstrap: per level, the rows of all cells are laid out back to back;
+each resample draws every cell's indices in one NumPy call and sums them
+with np.add.reduceat → (resamples × cells) means. Resamples are split into
+fixed chunks with their own spawned seeds (per level, per chunk), so the
+result is the same for any number of worker processes and any selection
+of levels.
+
+The reports read this table (delta_so2_stats.csv) instead of computing
+means/tests inline.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+import vessel_metrics
+
+LEVELS: Dict[str, tuple] = {
+    "all": (),
+    "animal": ("animal",),
+    "session": ("vid_name",),
+    "size_group": ("size_group",),
+    "animal_session": ("animal", "vid_name"),
+    "animal_size": ("animal", "size_group"),
+    "cell": ("animal", "vid_name", "size_group"),
+}
+KEYS = ["animal", "vid_name", "size_group"]
+
+N_BOOT = 2000
+CI = 95.0
+SEED = 0
+CHUNK_VALUES = 1 << 22      # resampled values per chunk (~32 MB of float64)
+
+
+# —————————————————————————————————————————————————————————————————————
+# Cell layout
+# —————————————————————————————————————————————————————————————————————
+def _layout(meas: pd.DataFrame, levels: Dict[str, tuple]):
+    """
+    Per level: cell code of every measured vessel + one label row per cell.
+    Vessels with a missing key (e.g. no volume → no size group) get code -1
+    and are left out of that level only.
+    """
+    out = {}
+    for level, keys in levels.items():
+        if not all(k in meas.columns for k in keys):
+            continue                              # e.g. no vid_name column
+        if keys:
+            grouped = meas.groupby(list(keys), observed=True, sort=True)
+            codes = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+            cells = grouped.size().index.to_frame(index=False)
+        else:
+            codes = np.zeros(len(meas), dtype=np.int64)
+            cells = pd.DataFrame(index=[0])
+        cells.insert(0, "level", level)
+        out[level] = (codes, cells)
+    return out
+
+
+# —————————————————————————————————————————————————————————————————————
+# Bootstrap
+# —————————————————————————————————————————————————————————————————————
+_DATA = {}          # level → (values sorted by cell, cell starts, cell sizes)
+
+
+def _init_worker(data):
+    global _DATA
+    _DATA = data
+
+
+def _boot_chunk(job) -> np.ndarray:
+    """(rows × cells) resampled means for one chunk of one level."""
+    level, rows, seed = job
+    values, starts, sizes = _DATA[level]
+    rng = np.random.default_rng(seed)
+    size_at = np.repeat(sizes, sizes)           # cell size for every position
+    start_at = np.repeat(starts, sizes)
+    out = np.empty((rows, len(sizes)))
+    for r in range(rows):
+        idx = start_at + (rng.random(len(values)) * size_at).astype(np.int64)
+        out[r] = np.add.reduceat(values[idx], starts)
+    return out / sizes
+
+
+def bootstrap_means(values: np.ndarray, codes: Dict[str, np.ndarray], n_boot: int = N_BOOT,
+                    seed: int = SEED, workers: int = 1) -> Dict[str, np.ndarray]:
+    """
+    {level: (n_boot × cells) bootstrap means}; every cell resampled within
+    itself. Each level has its own seed stream (by its position in LEVELS),
+    so a level's result does not depend on which other levels are computed.
+    Levels without a single usable vessel (e.g. no diameters → no size
+    group) are left out.
+    """
+    data, jobs = {}, []
+    rows = max(1, CHUNK_VALUES // max(len(values), 1))
+    for level, code in codes.items():
+        keep = code >= 0
+        if not keep.any():
+            continue
+        order = np.argsort(code[keep], kind="stable")
+        sizes = np.bincount(code[keep])
+        data[level] = (values[keep][order], np.r_[0, np.cumsum(sizes)[:-1]], sizes)
+        chunks = [min(rows, n_boot - i) for i in range(0, n_boot, rows)]
+        stream = np.random.SeedSequence(seed, spawn_key=(list(LEVELS).index(level),))
+        jobs += [(level, n, child) for n, child in zip(chunks, stream.spawn(len(chunks)))]
+
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_init_worker,
+                                 initargs=(data,)) as pool:
+            parts = list(pool.map(_boot_chunk, jobs))
+    else:
+        _init_worker(data)
+        parts = [_boot_chunk(job) for job in jobs]
+        _init_worker({})
+    return {level: np.vstack([part for job, part in zip(jobs, parts) if job[0] == level])
+            for level in data}
+
+
+# —————————————————————————————————————————————————————————————————————
+# Paired tests
+# —————————————————————————————————————————————————————————————————————
+def _wilcoxon_p(values: np.ndarray, cell: np.ndarray, n_cells: int) -> np.ndarray:
+    """Two-sided signed-rank p per cell (normal approximation, tie-corrected, zeros dropped)."""
+    keep = (values != 0) & (cell >= 0)
+    d = pd.DataFrame({"cell": cell[keep], "abs": np.abs(values[keep]), "pos": values[keep] > 0})
+    d["rank"] = d.groupby("cell")["abs"].rank()
+    n = np.bincount(d["cell"], minlength=n_cells).astype(float)
+    w_plus = np.bincount(d["cell"], weights=d["rank"] * d["pos"], minlength=n_cells)
+    ties = d.groupby(["cell", "abs"]).size()
+    tie_term = np.bincount(ties.index.get_level_values("cell"),
+                           weights=(ties ** 3 - ties).to_numpy(float), minlength=n_cells)
+    mu = n * (n + 1) / 4
+    var = n * (n + 1) * (2 * n + 1) / 24 - tie_term / 48
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (w_plus - mu) / np.sqrt(var)
+    from scipy.special import ndtr      # not scipy.stats: ≈0.5 s less import for report.txt runs
+    return np.where(var > 0, 2 * ndtr(-np.abs(z)), np.nan)           # = 2 · norm.sf(|z|)
+
+
+# —————————————————————————————————————————————————————————————————————
+# Table
+# —————————————————————————————————————————————————————————————————————
+def delta_stats(df: pd.DataFrame, levels: Optional[Sequence[str]] = None, n_boot: int = N_BOOT,
+                ci: float = CI, seed: int = SEED, workers: int = 1) -> pd.DataFrame:
+    """
+    One row per (level, cell) with ΔSO₂ statistics; key columns not used by a
+    level are NaN. n_boot=0 skips the bootstrap (ci_low/ci_high NaN).
+    """
+    levels = {name: LEVELS[name] for name in (levels or LEVELS)}
+    meas = vessel_metrics.measured(df)
+    values = meas["delta_SO2"].to_numpy(dtype=float)
+    layout = _layout(meas, levels)
+    codes = {level: code for level, (code, _) in layout.items()}
+    boot = bootstrap_means(values, codes, n_boot, seed, workers) if n_boot > 0 and len(values) else {}
+    alpha = (100 - ci) / 2
+
+    tables = []
+    for level, (code, table) in layout.items():
+        n_cells = len(table)
+        by_cell = pd.Series(values).groupby(code)
+        table["n"] = by_cell.size().reindex(range(n_cells), fill_value=0).to_numpy()
+        table["mean"] = by_cell.mean().reindex(range(n_cells)).to_numpy()
+        table["median"] = by_cell.median().reindex(range(n_cells)).to_numpy()
+        table["std"] = by_cell.std().reindex(range(n_cells)).to_numpy()
+        if level in boot:
+            table["ci_low"], table["ci_high"] = np.percentile(boot[level], [alpha, 100 - alpha], axis=0)
+        else:
+            table["ci_low"] = table["ci_high"] = np.nan
+        table["p_wilcoxon"] = _wilcoxon_p(values, code, n_cells) if len(values) else np.nan
+        tables.append(table)
+
+    table = pd.concat(tables, ignore_index=True)
+    for k in KEYS:
+        if k not in table.columns:
+            table[k] = np.nan
+    table["sem"] = table["std"] / np.sqrt(table["n"])
+    # paired t-test start vs end = one-sample t-test of ΔSO₂ against 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        table["t"] = table["mean"] / table["sem"]
+    from scipy.special import stdtr
+    table["p_t"] = np.where(table["n"] > 1, 2 * stdtr(table["n"] - 1, -np.abs(table["t"])), np.nan)
+    table = table[["level"] + KEYS + ["n", "mean", "median", "std", "sem", "ci_low", "ci_high",
+                                      "t", "p_t", "p_wilcoxon"]]
+    table.attrs.update(n_boot=n_boot, ci=ci, seed=seed)
+    return table
+
+
+def lookup(table: pd.DataFrame, level: str, **keys) -> Optional[pd.Series]:
+    """The row of one cell, e.g. lookup(t, "animal_size", animal="3", size_group=SMALL)."""
+    rows = table[table["level"] == level]
+    for k, v in keys.items():
+        rows = rows[rows[k].astype(str) == str(v)]
+    return rows.iloc[0] if len(rows) else None
+
+
+def format_ci(row: Optional[pd.Series], digits: int = 4, ci: float = CI) -> str:
+    """'95% CI [+0.0100, +0.0150]', or '' without bootstrap."""
+    if row is None or pd.isna(row["ci_low"]):
+        return ""
+    return f"{ci:g}% CI [{row['ci_low']:+.{digits}f}, {row['ci_high']:+.{digits}f}]"
+
+
+def format_p(p: float) -> str:
+    if pd.isna(p):
+        return "p = n/a"
+    return "p < 0.001" if p < 0.001 else f"p = {p:.3f}"
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+vessel_summary.py
+Author: G.M
+Date: 18-10-2026
+Version: 0.1
+
+Summary stage: everything the narrative report needs, aggregated once and
+saved next to data.json, so report.txt can be rendered without loading the
+vessel rows (generate_report.py --txt-only).
+
+    <folder>/summary_cube.csv      ← multi-level aggregate table (the cube)
+    <folder>/delta_so2_stats.csv   ← ΔSO₂ CIs + paired tests (vessel_stats.py)
+    <folder>/summary_meta.json     ← columns, violation examples, network text,
+                                     code version (written last = summary complete)
+
+A saved summary counts as current only if it is not older than data.json
+and was built by the same code: meta["code"] is a hash of the modules that
+compute it (CODE_MODULES). Edit one of them → the next report rebuilds it.
+
+Cube levels (one grouped pass each; `level` column, unused keys NaN):
+
+    cell             animal × vid_name × vessel_type × size_group
+    animal           animal_type     animal_session
+    session          vessel_type     size_group        all
+
+Per row: n, n_measured, n_violations (ΔSO₂ < 0), delta mean/median/std,
+SO₂ in/out means (measured vessels), n_diameter (valid volume/length),
+n_measured_diameter, diameter mean/median/std. Missing keys (no size
+group, no vessel_type) are kept as their own NaN group.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+import vessel_metrics
+import vessel_network
+import vessel_profile
+import vessel_stats
+
+CUBE_FILE = "summary_cube.csv"
+STATS_FILE = "delta_so2_stats.csv"
+META_FILE = "summary_meta.json"
+
+KEYS = ["animal", "vid_name", "vessel_type", "size_group"]
+LEVELS = {
+    "cell": KEYS,
+    "animal": ["animal"],
+    "animal_type": ["animal", "vessel_type"],
+    "animal_session": ["animal", "vid_name"],
+    "session": ["vid_name"],
+    "vessel_type": ["vessel_type"],
+    "size_group": ["size_group"],
+    "all": [],
+}
+N_EXAMPLES = 3          # violation examples kept for the narrative
+CODE_MODULES = ["vessel_summary", "vessel_stats", "vessel_network", "vessel_metrics"]
+
+
+class Summary(NamedTuple):
+    cube: pd.DataFrame
+    stats: pd.DataFrame
+    meta: dict
+
+
+# —————————————————————————————————————————————————————————————————————
+# Build
+# —————————————————————————————————————————————————————————————————————
+def code_version() -> str:
+    """blake2b of the CODE_MODULES sources (as run_pipeline keys its stages)."""
+    h = hashlib.blake2b(digest_size=16)
+    for name in CODE_MODULES:
+        h.update(name.encode())
+        h.update((Path(__file__).parent / f"{name}.py").read_bytes())
+    return h.hexdigest()
+
+
+def build_cube(df: pd.DataFrame) -> pd.DataFrame:
+    measured = df["has_SO2"].to_numpy(dtype=bool)
+    work = pd.DataFrame({
+        "delta": df["delta_SO2"],
+        "violation": df["delta_SO2"] < 0,
+        "so2_in": df["SO2_start"].where(measured) if "SO2_start" in df.columns else np.nan,
+        "so2_out": df["SO2_end"].where(measured) if "SO2_end" in df.columns else np.nan,
+        "has_diameter": df["has_diameter"],
+        "measured_diameter": df["has_diameter"] & measured,
+        "diameter": df["diameter"],
+    }, index=df.index)
+
+    levels = []
+    for level, keys in LEVELS.items():
+        keys = [k for k in keys if k in df.columns]
+        if len(keys) < len(LEVELS[level]):
+            continue
+        by = [df[k] for k in keys] if keys else np.zeros(len(df), dtype=np.int8)
+        agg = work.groupby(by, observed=True, dropna=False, sort=True).agg(
+            n=("delta", "size"),
+            n_measured=("delta", "count"),
+            n_violations=("violation", "sum"),
+            delta_mean=("delta", "mean"),
+            delta_median=("delta", "median"),
+            delta_std=("delta", "std"),
+            so2_in_mean=("so2_in", "mean"),
+            so2_out_mean=("so2_out", "mean"),
+            n_diameter=("has_diameter", "sum"),
+            n_measured_diameter=("measured_diameter", "sum"),
+            diameter_mean=("diameter", "mean"),
+            diameter_median=("diameter", "median"),
+            diameter_std=("diameter", "std"),
+        )
+        agg = agg.reset_index(drop=not keys)
+        agg.insert(0, "level", level)
+        levels.append(agg)
+
+    cube = pd.concat(levels, ignore_index=True)
+    for k in KEYS:
+        if k not in cube.columns:
+            cube[k] = np.nan
+    return cube[["level"] + KEYS + [c for c in cube.columns if c not in KEYS and c != "level"]]
+
+
+def build(df: pd.DataFrame, workers: int = 1) -> Summary:
+    """Cube + ΔSO₂ stats table + the few row-level facts the narrative quotes."""
+    meta = {
+        "columns": [c for c in df.columns],
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "code": code_version(),
+    }
+    viol = vessel_metrics.measured(df)
+    viol = viol[viol["delta_SO2"] < 0]
+    example_cols = [c for c in ["animal", "vid_name", "vessel_nr", "SO2_start", "SO2_end"] if c in df.columns]
+    meta["violation_examples"] = json.loads(viol[example_cols].head(N_EXAMPLES).to_json(orient="records"))
+
+    meta["network"] = None
+    if {"vessel_nr", "corresp"}.issubset(df.columns) and df["corresp"].notna().any():
+        with vessel_profile.stage("network"):
+            net = vessel_network.add_network(df[["animal", "vessel_nr", "corresp", "delta_SO2"]].copy())
+            meta["network"] = vessel_network.summary_lines(vessel_network.summary(net))
+
+    with vessel_profile.stage("cube"):
+        cube = build_cube(df)
+    with vessel_profile.stage("delta stats"):
+        stats = vessel_stats.delta_stats(df, workers=workers)
+    return Summary(cube, stats, meta)
+
+
+# —————————————————————————————————————————————————————————————————————
+# Save / load
+# —————————————————————————————————————————————————————————————————————
+def save(summary: Summary, folder: Path):
+    summary.cube.to_csv(folder / CUBE_FILE, index=False)
+    summary.stats.to_csv(folder / STATS_FILE, index=False)
+    (folder / META_FILE).write_text(json.dumps(summary.meta, indent=2, ensure_ascii=False),
+                                    encoding="utf-8")
+    print(f"→ Summary saved: {folder / CUBE_FILE} ({len(summary.cube):,} rows), {folder / STATS_FILE}")
+
+
+def _read(path: Path) -> pd.DataFrame:
+    return pd.read_csv(path, dtype={"animal": str, "vid_name": str, "size_group": str})
+
+
+def load(json_path: Path) -> Optional[Summary]:
+    """Summary next to data.json, or None if missing, older than the JSON or built by other code."""
+    folder = json_path.parent
+    meta_file = folder / META_FILE
+    if not all((folder / f).exists() for f in (CUBE_FILE, STATS_FILE, META_FILE)):
+        return None
+    if json_path.exists() and meta_file.stat().st_mtime < json_path.stat().st_mtime:
+        print(f"   Summary stale: {json_path.name} is newer")
+        return None
+    meta = json.loads(meta_file.read_text(encoding="utf-8"))
+    if meta.get("code") != code_version():
+        print(f"   Summary stale: built by other code ({', '.join(CODE_MODULES)})")
+        return None
+    print(f"[LOAD] Summary: {folder / CUBE_FILE}")
+    return Summary(_read(folder / CUBE_FILE), _read(folder / STATS_FILE), meta)
+
+
+# —————————————————————————————————————————————————————————————————————
+# Lookups for the reports
+# —————————————————————————————————————————————————————————————————————
+def rows(cube: pd.DataFrame, level: str) -> pd.DataFrame:
+    return cube[cube["level"] == level]
+
+
+def value(cube: pd.DataFrame, level: str, column: str, default=0, **keys):
+    """One number from the cube, e.g. value(cube, "animal_type", "n", animal="3", vessel_type=0)."""
+    sel = rows(cube, level)
+    for k, v in keys.items():
+        col = sel[k]
+        sel = sel[(col == v) | (col.astype(str) == str(v))]
+    return sel[column].iloc[0] if len(sel) else default
@@ -12,7 +12,7 @@ CHANGELOG
 v0.1 (2025-11-06) – Initial version: 6-panel PDF, basic stats
 v0.2 (2025-11-10) – Added rugplots + stripplot for real data points
 v0.3 (2025-11-10) – Fixed rug compression: smart layering (rug/strip/sample)
-v0.4 (2025-11-10) – **CURRENT**
+v0.4 (2025-11-10)
     • REMOVED RUGPLOTS ENTIRELY in detailed view
     • SPLIT INTO TWO PDFs:
         - Overview: 6-panel summary
@@ -20,6 +20,11 @@ v0.4 (2025-11-10) – **CURRENT**
     • Auto-swarm for n≤800, jitter for n>800
     • Inset histograms for n>1000
     • Clear versioned changelog in header
+v0.5 (2026-10-18) – **CURRENT**
+    • Binned beeswarm (vessel_plots.py) instead of sns.swarmplot
+      → swarm for n≤5000 (was 800), milliseconds, no overlap warnings
+    • Large-n mode: rasterized points > 2,000, hexbin density > 10,000
+    • --profile: time + memory per stage (vessel_profile.py)
 =====================================================================
 
 Creates:
@@ -27,7 +32,7 @@ Creates:
 2. Oxygen_Extraction_Detailed.pdf    → One full-page plot per metric
 """
 
-import json
+import argparse
 from pathlib import Path
 import sys
 import pandas as pd
@@ -36,28 +41,16 @@ import seaborn as sns
 from matplotlib.backends.backend_pdf import PdfPages
 import numpy as np
 
-sns.set(style="whitegrid", font_scale=1.2)
+import vessel_loader
+import vessel_metrics
+import vessel_profile
+from vessel_plots import SWARM_MAX, beeswarm, geometry_scatter, so2_scatter
 
-# —————————————————————————————————————————————————————————————————————
-# Load & Prep
-# —————————————————————————————————————————————————————————————————————
-def load_and_flatten(json_path: Path) -> pd.DataFrame:
-    with open(json_path) as f:
-        data = json.load(f)
-    rows = []
-    for animal, info in data.items():
-        for v in info["vessels"]:
-            v = v.copy()
-            v["animal"] = animal
-            rows.append(v)
-    return pd.DataFrame(rows)
-
-def estimated_diameter(df: pd.DataFrame) -> pd.Series:
-    valid = df.dropna(subset=["volume", "length"])
-    valid = valid[valid["length"] > 0]
-    if len(valid) == 0:
-        return pd.Series()
-    return 2 * np.sqrt(valid["volume"] / (np.pi * valid["length"]))
+# Columns this script uses (only these are read from the columnar dataset)
+COLUMNS = ["animal", "vid_name", "vessel_nr", "vessel_type",
+           "SO2_start", "SO2_end", "OD", "length", "volume"] + vessel_metrics.DERIVED
+
+sns.set(style="whitegrid", font_scale=1.2)
 
 # —————————————————————————————————————————————————————————————————————
 # Smart Point Plotter (NO RUGS!)
@@ -71,11 +64,8 @@ def plot_individual_points(ax, data: pd.Series, title: str):
         return
 
     # FULL SIZE PLOT → use swarm or jitter
-    if n <= 800:
-        try:
-            sns.swarmplot(data=data, ax=ax, color="purple", size=4, alpha=0.8)
-        except:
-            sns.stripplot(data=data, ax=ax, color="purple", jitter=0.3, size=4, alpha=0.8)
+    if n <= SWARM_MAX:
+        beeswarm(ax, data, color="purple", size=4, alpha=0.8)
         method = "Swarm"
     else:
         sample = data.sample(n=1000, random_state=42)
@@ -90,7 +80,7 @@ def plot_individual_points(ax, data: pd.Series, title: str):
         inset.tick_params(axis='both', which='major', labelsize=6)
 
     ax.set_title(f"{title}\n({method}, n={n:,})", fontsize=14, pad=20)
-    ax.set_xlabel("Value")
+    ax.set_ylabel("Value")
 
 # —————————————————————————————————————————————————————————————————————
 # 6-Panel Overview Page
@@ -110,16 +100,15 @@ def plot_overview_page(pdf, df_page, title):
     axes[0,1].set_title("OD")
 
     # 3. ΔSO₂
-    meas = df_page.dropna(subset=["SO2_start", "SO2_end"]).copy()
+    meas = vessel_metrics.measured(df_page)
     if len(meas):
-        meas["delta"] = meas["SO2_start"] - meas["SO2_end"]
-        sns.histplot(meas["delta"], bins=30, ax=axes[0,2], color="salmon")
+        sns.histplot(meas["delta_SO2"], bins=30, ax=axes[0,2], color="salmon")
         axes[0,2].axvline(0, color="black", ls="--")
     axes[0,2].set_title("ΔSO₂")
 
     # 4. SO₂ Scatter
     if len(meas):
-        axes[1,0].scatter(meas["SO2_end"], meas["SO2_start"], c=meas["delta"], cmap="RdYlGn", alpha=0.7, s=20)
+        so2_scatter(axes[1,0], meas, s=20, alpha=0.7, colorbar=False)
         mn = meas[["SO2_start","SO2_end"]].min().min()
         mx = meas[["SO2_start","SO2_end"]].max().max()
         axes[1,0].plot([mn,mx], [mn,mx], "k--")
@@ -127,11 +116,11 @@ def plot_overview_page(pdf, df_page, title):
     axes[1,0].set_title("SO₂ In vs Out")
 
     # 5. Length vs Volume
-    sns.scatterplot(data=df_page, x="length", y="volume", hue="vessel_type", ax=axes[1,1], alpha=0.6)
+    geometry_scatter(axes[1,1], df_page, alpha=0.6)
     axes[1,1].set_title("Geometry")
 
     # 6. Diameter
-    diam = estimated_diameter(df_page)
+    diam = vessel_metrics.with_diameter(df_page)["diameter"]
     if len(diam):
         sns.histplot(diam, bins=50, ax=axes[1,2], color="green")
     axes[1,2].set_title("Est. Diameter")
@@ -144,9 +133,7 @@ def plot_overview_page(pdf, df_page, title):
 # Full-Page Detailed Plots
 # —————————————————————————————————————————————————————————————————————
 def plot_detailed_pages(pdf, df_page, title_prefix):
-    meas = df_page.dropna(subset=["SO2_start", "SO2_end"]).copy()
-    if len(meas):
-        meas["delta"] = meas["SO2_start"] - meas["SO2_end"]
+    meas = vessel_metrics.measured(df_page)
 
     # 1. OD
     fig, ax = plt.subplots(figsize=(10, 6))
@@ -156,7 +143,7 @@ def plot_detailed_pages(pdf, df_page, title_prefix):
     # 2. ΔSO₂
     fig, ax = plt.subplots(figsize=(10, 6))
     if len(meas):
-        plot_individual_points(ax, meas["delta"], "Oxygen Extraction (ΔSO₂)")
+        plot_individual_points(ax, meas["delta_SO2"], "Oxygen Extraction (ΔSO₂)")
     else:
         ax.text(0.5, 0.5, "No SO₂ data", ha='center', va='center', transform=ax.transAxes)
         ax.set_title("ΔSO₂")
@@ -165,12 +152,11 @@ def plot_detailed_pages(pdf, df_page, title_prefix):
     # 3. SO₂ Scatter (full page)
     fig, ax = plt.subplots(figsize=(10, 8))
     if len(meas):
-        scatter = ax.scatter(meas["SO2_end"], meas["SO2_start"], c=meas["delta"], cmap="RdYlGn", s=50, alpha=0.8)
+        so2_scatter(ax, meas, s=50, alpha=0.8)
         mn = meas[["SO2_start","SO2_end"]].min().min()
         mx = meas[["SO2_start","SO2_end"]].max().max()
         ax.plot([mn,mx], [mn,mx], "k--", linewidth=2)
-        plt.colorbar(scatter, ax=ax, label="ΔSO₂")
-        viol = meas[meas["delta"] < 0]
+        viol = meas[meas["delta_SO2"] < 0]
         for _, row in viol.head(15).iterrows():
             ax.annotate(f"V{row['vessel_nr']}", (row["SO2_end"], row["SO2_start"]),
                         xytext=(8, 8), textcoords="offset points", fontsize=9, color="red")
@@ -179,11 +165,11 @@ def plot_detailed_pages(pdf, df_page, title_prefix):
     pdf.savefig(fig); plt.close()
 
     # 4. Diameter
-    diam = estimated_diameter(df_page)
+    diam = vessel_metrics.with_diameter(df_page)["diameter"]
     fig, ax = plt.subplots(figsize=(10, 6))
     if len(diam):
         plot_individual_points(ax, diam, "Estimated Diameter (µm)")
-        ax.axvline(10, color="red", ls="--", label="Capillary limit")
+        ax.axhline(10, color="red", ls="--", label="Capillary limit")
         ax.legend()
     pdf.savefig(fig); plt.close()
 
@@ -191,18 +177,22 @@ def plot_detailed_pages(pdf, df_page, title_prefix):
 # Main
 # —————————————————————————————————————————————————————————————————————
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python visualize_oxygen.py path/to/data.json")
-    json_path = Path(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Overview + detailed PDFs")
+    parser.add_argument("json", type=Path, help="path/to/data.json")
+    vessel_profile.add_arguments(parser)
+    args = parser.parse_args()
+    json_path = args.json
     if not json_path.exists():
         sys.exit(f"File not found: {json_path}")
-
-    df = load_and_flatten(json_path)
     out_dir = json_path.parent
+    vessel_profile.start(args, "visualize_oxygen", out_dir)
+
+    with vessel_profile.stage("load"):
+        df = vessel_loader.load_vessels(json_path, COLUMNS)
 
     # OVERVIEW PDF
     overview_pdf = out_dir / "Oxygen_Extraction_Report.pdf"
-    with PdfPages(overview_pdf) as pdf:
+    with vessel_profile.stage("overview pdf"), PdfPages(overview_pdf) as pdf:
         for animal in sorted(df["animal"].unique()):
             sub = df[df["animal"] == animal]
             plot_overview_page(pdf, sub, f"Animal {animal}")
@@ -214,7 +204,7 @@ def main():
 
     # DETAILED PDF
     detailed_pdf = out_dir / "Oxygen_Extraction_Detailed.pdf"
-    with PdfPages(detailed_pdf) as pdf:
+    with vessel_profile.stage("detailed pdf"), PdfPages(detailed_pdf) as pdf:
         for animal in sorted(df["animal"].unique()):
             sub = df[df["animal"] == animal]
             plot_detailed_pages(pdf, sub, f"Animal {animal}")
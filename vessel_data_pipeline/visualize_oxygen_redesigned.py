@@ -7,66 +7,71 @@ Date: 2025-11-10
 Creates redesigned per-animal figures with Panel 7 (Paired SO₂ In→Out)
 and exports additional standalone paired PDFs (all / small / large)
 plus a connection-table CSV derived from `corresp`.
+
+    python visualize_oxygen_redesigned.py data/data.json [--profile]
 """
 
-import json, sys
+import argparse
+import sys
 from pathlib import Path
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from matplotlib.backends.backend_pdf import PdfPages
-from scipy.stats import ttest_rel
+
+import vessel_loader
+import vessel_metrics
+import vessel_profile
+import vessel_stats
+from vessel_plots import paired_lines
+
+# Columns this script uses (only these are read from the columnar dataset)
+COLUMNS = ["animal", "vessel_nr", "corresp", "SO2_start", "SO2_end", "length", "volume"] \
+    + vessel_metrics.DERIVED
 
 sns.set(style="whitegrid", font_scale=1.3)
 
 # —————————————————————————————————————————————————————————————————————
 # Helpers
 # —————————————————————————————————————————————————————————————————————
-def load_and_flatten(json_path: Path) -> pd.DataFrame:
-    with open(json_path) as f:
-        data = json.load(f)
-    rows = []
-    for animal, info in data.items():
-        for v in info["vessels"]:
-            v = v.copy()
-            v["animal"] = animal
-            rows.append(v)
-    return pd.DataFrame(rows)
-
-def estimated_diameter(df: pd.DataFrame) -> pd.Series:
-    valid = df.dropna(subset=["volume", "length"])
-    valid = valid[valid["length"] > 0]
-    if len(valid) == 0:
-        return pd.Series(dtype=float)
-    return 2 * np.sqrt(valid["volume"] / (np.pi * valid["length"]))
-
 # —————————————————————————————————————————————————————————————————————
 # Connection-table report
 # —————————————————————————————————————————————————————————————————————
 def generate_connection_report(df: pd.DataFrame, out_dir: Path):
-    rows = []
-    for animal, sub in df.groupby("animal"):
-        sub_vessels = sub.drop_duplicates(subset="vessel_nr").set_index("vessel_nr")
-        for _, v in sub.iterrows():
-            corr = v.get("corresp")
-            if pd.notna(corr) and corr in sub_vessels.index:
-                start = v.get("SO2_start")
-                match = sub_vessels.loc[[corr]]
-                end = match["SO2_end"].iloc[0]
-                delta = (start - end) if pd.notna(start) and pd.notna(end) else np.nan
-                rows.append({
-                    "Animal": animal,
-                    "Vessel": v["vessel_nr"],
-                    "Connected_To": int(corr),
-                    "SO2_start": start,
-                    "SO2_end": end,
-                    "Delta_SO2": delta
-                })
-    if not rows:
+    """
+    One row per vessel whose `corresp` names a vessel of the same animal:
+    join (animal, corresp) → (animal, vessel_nr). Duplicate vessel numbers
+    resolve to their first row; unmatched references are counted as dangling.
+    """
+    keys = ["animal", "vessel_nr"]
+    dup = df.duplicated(subset=keys, keep=False)
+    n_dup = df.loc[dup, keys].drop_duplicates().shape[0]
+
+    refs = df.loc[df["corresp"].notna(), ["animal", "vessel_nr", "corresp", "SO2_start"]]
+    targets = df.drop_duplicates(subset=keys)[keys + ["SO2_end"]] \
+        .rename(columns={"vessel_nr": "corresp"})
+    # float keys on both sides: corresp is float whenever it has gaps
+    refs = refs.assign(corresp=refs["corresp"].astype(float))
+    targets = targets.assign(corresp=targets["corresp"].astype(float))
+    conn = refs.merge(targets, on=["animal", "corresp"], how="inner")     # keeps refs order
+    conn = conn.sort_values("animal", kind="stable")
+    n_dangling = len(refs) - len(conn)
+
+    print(f"→ Connections: {len(conn):,} matched, {n_dangling:,} dangling reference(s), "
+          f"{n_dup:,} duplicate vessel number(s)")
+    if conn.empty:
         print("⚠️  No valid vessel connections found (corresp empty or invalid).")
         return
-    conn_df = pd.DataFrame(rows)
+    conn_df = pd.DataFrame({
+        "Animal": conn["animal"].to_numpy(),
+        "Vessel": conn["vessel_nr"].to_numpy(),
+        "Connected_To": conn["corresp"].astype(np.int64).to_numpy(),
+        "SO2_start": conn["SO2_start"].to_numpy(),
+        "SO2_end": conn["SO2_end"].to_numpy(),
+        "Delta_SO2": (conn["SO2_start"] - conn["SO2_end"]).to_numpy(),
+    })
+    out_dir.mkdir(parents=True, exist_ok=True)
     out_path = out_dir / "Vessel_Connections_Report.csv"
     conn_df.to_csv(out_path, index=False)
     print(f"→ Connection table saved: {out_path}")
@@ -75,21 +80,18 @@ def generate_connection_report(df: pd.DataFrame, out_dir: Path):
 # —————————————————————————————————————————————————————————————————————
 # Panel 7 – Paired SO₂ plot
 # —————————————————————————————————————————————————————————————————————
-def plot_paired_vessels(sub_df: pd.DataFrame, ax, style="scientific"):
-    meas = sub_df.dropna(subset=["SO2_start", "SO2_end"]).copy()
+def plot_paired_vessels(sub_df: pd.DataFrame, ax, style="scientific", stats: pd.DataFrame = None):
+    meas = vessel_metrics.measured(sub_df)
     if len(meas) == 0:
         ax.text(0.5, 0.5, "No SO₂ data", ha="center", va="center",
                 transform=ax.transAxes, fontsize=14)
         ax.set_title("Paired SO₂ (In → Out)")
         return
 
-    meas["diam"] = estimated_diameter(meas)
-    meas["size_group"] = np.where(meas["diam"] <= 10,
-                                  "Small (≤10 µm)", "Large (>10 µm)")
-
-    palette = {"Small (≤10 µm)": "#1f77b4", "Large (>10 µm)": "#ff7f0e"} \
+    small, large = vessel_metrics.SMALL, vessel_metrics.LARGE
+    palette = {small: "#1f77b4", large: "#ff7f0e"} \
         if style == "scientific" else \
-        {"Small (≤10 µm)": "#4472C4", "Large (>10 µm)": "#ED7D31"}
+        {small: "#4472C4", large: "#ED7D31"}
 
     ax.set_xticks([0, 1])
     ax.set_xticklabels(["Inlet", "Outlet"])
@@ -97,19 +99,17 @@ def plot_paired_vessels(sub_df: pd.DataFrame, ax, style="scientific"):
     ax.set_ylabel("SO₂ (%)")
     ax.set_title("Paired SO₂ (Inlet → Outlet)", fontsize=13, pad=10)
 
+    if stats is None:       # p-values only → no bootstrap
+        stats = vessel_stats.delta_stats(sub_df, levels=["animal_size"], n_boot=0)
     ymin = meas[["SO2_start", "SO2_end"]].min().min()
     ymax = meas[["SO2_start", "SO2_end"]].max().max()
 
-    for g_idx, (grp, g) in enumerate(meas.groupby("size_group")):
+    for g_idx, (grp, g) in enumerate(meas.groupby("size_group", observed=True)):
         color = palette[grp]
-        g = g.reset_index(drop=True)
         jitter = np.random.normal(0, 0.02, size=len(g))
 
-        # individual lines
-        for i, row in g.iterrows():
-            ax.plot([0+jitter[i], 1+jitter[i]],
-                    [row["SO2_start"], row["SO2_end"]],
-                    color=color, alpha=0.25, linewidth=1)
+        # individual lines (one collection per group)
+        paired_lines(ax, g["SO2_start"], g["SO2_end"], jitter, color)
 
         # mean ± SEM
         mean_in, mean_out = g["SO2_start"].mean(), g["SO2_end"].mean()
@@ -119,12 +119,9 @@ def plot_paired_vessels(sub_df: pd.DataFrame, ax, style="scientific"):
                     fmt='o-', color=color, markersize=7,
                     linewidth=2, capsize=4, label=f"{grp} (n={len(g)})")
 
-        # p-value stacked vertically
-        try:
-            _, pval = ttest_rel(g["SO2_start"], g["SO2_end"], nan_policy='omit')
-            ptext = f"p = {pval:.3f}" if not np.isnan(pval) else "p = 0.05"
-        except Exception:
-            ptext = "p = 0.05"
+        # paired t-test p-value (from the stats table) stacked vertically
+        row = vessel_stats.lookup(stats, "animal_size", animal=g["animal"].iloc[0], size_group=grp)
+        ptext = vessel_stats.format_p(row["p_t"] if row is not None else np.nan)
         y_offset = (g_idx * 0.05) * (ymax - ymin)
         ax.text(0.5, ymax + 0.07*(ymax - ymin) - y_offset,
                 f"{grp}: {ptext}", color=color,
@@ -139,27 +136,22 @@ def plot_paired_vessels(sub_df: pd.DataFrame, ax, style="scientific"):
                 color="gray", va="top")
 
 # wrappers for small / large only
-def plot_small_vessels(sub_df, ax, style="scientific"):
-    sub = sub_df.copy()
-    sub["diam"] = estimated_diameter(sub)
-    sub = sub[sub["diam"] <= 10]
-    plot_paired_vessels(sub, ax, style=style)
+def plot_small_vessels(sub_df, ax, style="scientific", stats=None):
+    sub = sub_df[sub_df["size_group"] == vessel_metrics.SMALL]
+    plot_paired_vessels(sub, ax, style=style, stats=stats)
     ax.set_title("Small Vessels (≤10 µm) — Paired SO₂", fontsize=13)
 
-def plot_large_vessels(sub_df, ax, style="scientific"):
-    sub = sub_df.copy()
-    sub["diam"] = estimated_diameter(sub)
-    sub = sub[sub["diam"] > 10]
-    plot_paired_vessels(sub, ax, style=style)
+def plot_large_vessels(sub_df, ax, style="scientific", stats=None):
+    sub = sub_df[sub_df["size_group"] == vessel_metrics.LARGE]
+    plot_paired_vessels(sub, ax, style=style, stats=stats)
     ax.set_title("Large Vessels (>10 µm) — Paired SO₂", fontsize=13)
 
 # —————————————————————————————————————————————————————————————————————
 # Simplified redesign (only panel 7 here for brevity)
 # —————————————————————————————————————————————————————————————————————
-def plot_redesign(sub_df, title, style="scientific"):
-    meas = sub_df.dropna(subset=["SO2_start", "SO2_end"]).copy()
-    meas["delta"] = meas["SO2_start"] - meas["SO2_end"]
-    mean_delta = meas["delta"].mean() if len(meas) else np.nan
+def plot_redesign(sub_df, title, style="scientific", stats=None):
+    meas = vessel_metrics.measured(sub_df)
+    mean_delta = meas["delta_SO2"].mean() if len(meas) else np.nan
     n_vess = len(sub_df)
 
     fig = plt.figure(figsize=(16, 14))
@@ -175,7 +167,7 @@ def plot_redesign(sub_df, title, style="scientific"):
                  fontsize=18, fontweight="bold", color=title_col, y=0.98)
 
     ax7 = fig.add_subplot(gs[2,1])
-    plot_paired_vessels(sub_df, ax7, style=style)
+    plot_paired_vessels(sub_df, ax7, style=style, stats=stats)
 
     plt.tight_layout(rect=[0,0,1,0.96])
     return fig
@@ -184,15 +176,22 @@ def plot_redesign(sub_df, title, style="scientific"):
 # Main
 # —————————————————————————————————————————————————————————————————————
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python visualize_oxygen_redesigned_paired.py path/to/data.json")
-    json_path = Path(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Redesigned per-animal + paired SO₂ PDFs, connection table")
+    parser.add_argument("json", type=Path, help="path/to/data.json")
+    vessel_profile.add_arguments(parser)
+    args = parser.parse_args()
+    json_path = args.json
     if not json_path.exists():
         sys.exit(f"File not found: {json_path}")
-
-    df = load_and_flatten(json_path)
     out_base = json_path.parent / "output_redesign"
-    generate_connection_report(df, out_base)
+    vessel_profile.start(args, "visualize_oxygen_redesigned", json_path.parent)
+
+    with vessel_profile.stage("load"):
+        df = vessel_loader.load_vessels(json_path, COLUMNS)
+    with vessel_profile.stage("connections"):
+        generate_connection_report(df, out_base)
+    with vessel_profile.stage("stats"):
+        stats = vessel_stats.delta_stats(df, levels=["animal_size"], n_boot=0)
 
     for style in ["scientific", "modern"]:
         out_dir = out_base / style
@@ -202,10 +201,10 @@ def main():
         paired_dir = out_base / "paired" / style
         paired_dir.mkdir(parents=True, exist_ok=True)
 
-        with PdfPages(pdf_path) as pdf:
+        with vessel_profile.stage(f"{style} pdfs"), PdfPages(pdf_path) as pdf:
             for animal in sorted(df["animal"].unique()):
                 sub = df[df["animal"] == animal]
-                fig = plot_redesign(sub, f"Animal {animal}", style=style)
+                fig = plot_redesign(sub, f"Animal {animal}", style=style, stats=stats)
                 pdf.savefig(fig, bbox_inches="tight"); plt.close(fig)
 
                 # 3 stand-alone paired plots
@@ -216,7 +215,7 @@ def main():
                 ]:
                     path = paired_dir / f"Paired_SO2{suffix}_Animal_{animal}.pdf"
                     fig2, ax2 = plt.subplots(figsize=(9,7))
-                    func(sub, ax2, style=style)
+                    func(sub, ax2, style=style, stats=stats)
                     fig2.suptitle(
                         f"Animal {animal} — {style.title()} Paired SO₂{suffix.replace('_',' ')}",
                         fontsize=16, fontweight="bold")
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Title: Converter Benchmark Suite (synthetic HuffYUV fixtures)
+Author: G.M
+Date: 18 Oct 2026
+Version: 1.0
+
+Times the hot paths of convert_homohs_to_mp4.py on deterministic, offline
+fixtures so a change to find_files(), probe(), md5() or convert() can be
+compared across commits and machines.
+
+Fixtures (generated once with ffmpeg lavfi, cached in --fixtures):
+  • HuffYUV AVI clips at our typical resolutions/durations (testsrc2 → identical bytes every run)
+  • Junk non-video files: small (<1 MB, skipped by find_files) and large (probed, unreadable)
+
+Stages, per corpus size:
+  discovery → find_files()   probing → probe() + get_info()
+  hashing   → md5()          encoding → convert() on the first --encode-count clips
+
+Usage:
+  python3 benchmark_converter.py                       # defaults → bench_results/<stamp>.json
+  python3 benchmark_converter.py --sizes 4 16 64 --repeat 5 --json results.json
+  python3 benchmark_converter.py --resolutions 2472x2064 --durations 2 --encode-count 2
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import convert_homohs_to_mp4 as conv
+
+JUNK_SMALL = 64 * 1024          # below find_files() 1 MB threshold
+JUNK_LARGE = 2 * 1024 * 1024    # above threshold → gets probed
+
+
+# —————————————————————————————————————————————————————————————————————
+# Fixtures
+# —————————————————————————————————————————————————————————————————————
+def make_clip(path: Path, res: str, duration: float, fps: int):
+    cmd = [
+        "ffmpeg", "-v", "error", "-y", "-f", "lavfi",
+        "-i", f"testsrc2=size={res}:rate={fps}:duration={duration}",
+        "-c:v", "huffyuv", "-pix_fmt", "yuv422p",
+        "-fflags", "+bitexact", "-flags:v", "+bitexact", "-map_metadata", "-1",
+        "-f", "avi", str(path)
+    ]
+    subprocess.run(cmd, check=True)
+
+def make_junk(path: Path, size: int, seed: int):
+    path.write_bytes(random.Random(seed).randbytes(size))
+
+def build_fixtures(fixture_dir: Path, resolutions: List[str], durations: List[float],
+                   fps: int) -> Dict[str, List[Path]]:
+    """Unique source files, reused across runs (same spec → same bytes)."""
+    fixture_dir.mkdir(parents=True, exist_ok=True)
+    clips = []
+    for res in resolutions:
+        for dur in durations:
+            p = fixture_dir / f"clip_{res}_{dur:g}s_{fps}fps.homohs"
+            if not p.exists():
+                print(f"[FIXTURE] {p.name}")
+                make_clip(p, res, dur, fps)
+            clips.append(p)
+    junk = []
+    for i, size in enumerate([JUNK_SMALL, JUNK_LARGE]):
+        p = fixture_dir / f"junk_{i}.bin"
+        if not p.exists():
+            make_junk(p, size, seed=i)
+        junk.append(p)
+    return {"clips": clips, "junk": junk}
+
+def build_corpus(corpus_dir: Path, fixtures: Dict[str, List[Path]], n_files: int) -> Path:
+    """n_files real copies (not links → hashing/probing reads distinct inodes), nested 2 deep."""
+    if corpus_dir.exists():
+        shutil.rmtree(corpus_dir)
+    pool = fixtures["clips"] * 3 + fixtures["junk"]   # ~3:1 video:junk mix
+    for i in range(n_files):
+        src = pool[i % len(pool)]
+        dst = corpus_dir / f"day{i % 4}" / f"run{i % 3}" / f"{i:04d}_{src.name}"
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(src, dst)
+    return corpus_dir
+
+
+# —————————————————————————————————————————————————————————————————————
+# Timing
+# —————————————————————————————————————————————————————————————————————
+def timed(fn: Callable, repeat: int) -> List[float]:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+def record(results: list, stage: str, size: int, n_items: int, times: List[float]):
+    med = statistics.median(times)
+    results.append({
+        "stage": stage,
+        "corpus_size": size,
+        "n_items": n_items,
+        "seconds": [round(t, 6) for t in times],
+        "median_s": round(med, 6),
+        "min_s": round(min(times), 6),
+        "per_item_ms": round(med / n_items * 1000, 3) if n_items else None,
+    })
+    print(f"   {stage:<10} n={n_items:<5} median={med:8.4f}s  min={min(times):8.4f}s")
+
+def bench_size(corpus: Path, size: int, repeat: int, encode_count: int, results: list):
+    print(f"\n[SIZE {size}] {corpus}")
+    files = conv.find_files(corpus)
+    record(results, "discovery", size, len(files), timed(lambda: conv.find_files(corpus), repeat))
+
+    infos = []
+    def probe_all():
+        infos.clear()
+        infos.extend(conv.get_info(conv.probe(f), f) for f in files)
+    record(results, "probing", size, len(files), timed(probe_all, repeat))
+
+    record(results, "hashing", size, len(files),
+           timed(lambda: [conv.md5(f) for f in files], repeat))
+
+    to_encode = [i for i in infos if i["can_convert"]][:encode_count]
+    if not to_encode:
+        print("   encoding   skipped (no probe-able clips – is ffprobe on PATH?)")
+        return
+    with tempfile.TemporaryDirectory(prefix="bench_out_") as tmp:
+        out = Path(tmp)
+        record(results, "encoding", size, len(to_encode),
+               timed(lambda: [conv.convert(i["path"], out, i) for i in to_encode], repeat))
+
+def machine_info() -> Dict:
+    def cmd_out(cmd):
+        try:
+            return subprocess.run(cmd, capture_output=True, text=True).stdout.strip()
+        except OSError:
+            return None
+    ffmpeg = cmd_out(["ffmpeg", "-version"])
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": sys.version.split()[0],
+        "ffmpeg": ffmpeg.splitlines()[0] if ffmpeg else None,
+        "git_commit": cmd_out(["git", "-C", str(Path(__file__).parent), "rev-parse", "HEAD"]),
+    }
+
+
+# —————————————————————————————————————————————————————————————————————
+# Main
+# —————————————————————————————————————————————————————————————————————
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the video converter on synthetic fixtures")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 16, 64],
+                        help="Corpus sizes (files per corpus, default: 4 16 64)")
+    parser.add_argument("--resolutions", nargs="+", default=["640x480", "1280x1024", "2472x2064"])
+    parser.add_argument("--durations", type=float, nargs="+", default=[1.0, 4.0],
+                        help="Clip durations in seconds (default: 1 4)")
+    parser.add_argument("--fps", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--encode-count", type=int, default=2,
+                        help="Clips encoded per corpus size (encoding dominates runtime)")
+    parser.add_argument("--fixtures", type=Path, default=Path("bench_fixtures"))
+    parser.add_argument("--json", type=Path, default=None,
+                        help="Result file (default: bench_results/<timestamp>.json)")
+    args = parser.parse_args()
+
+    if not shutil.which("ffmpeg"):
+        sys.exit("ERROR: ffmpeg not found in PATH (needed to generate fixtures).")
+    conv.console.quiet = True   # keep convert()/probe() chatter out of the timings
+
+    fixtures = build_fixtures(args.fixtures, args.resolutions, args.durations, args.fps)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_corpus_") as tmp:
+        for size in args.sizes:
+            corpus = build_corpus(Path(tmp) / f"n{size}", fixtures, size)
+            bench_size(corpus, size, args.repeat, args.encode_count, results)
+
+    out = args.json or Path("bench_results") / f"{datetime.now():%Y%m%d_%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    report = {"machine": machine_info(), "config": {
+        "sizes": args.sizes, "resolutions": args.resolutions, "durations": args.durations,
+        "fps": args.fps, "repeat": args.repeat, "encode_count": args.encode_count,
+    }, "results": results}
+    out.write_text(json.dumps(report, indent=2))
+    print(f"\n→ Results: {out}")
+
+
+if __name__ == "__main__":
+    main()
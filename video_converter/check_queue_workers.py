@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Title: Queue Worker Check (several local workers, stubbed converter)
+Author: G.M
+Date: 18 Oct 2026
+Version: 1.0
+
+Runs the real `convert_homohs_to_mp4.py worker` loop in N local processes on
+a temporary queue. Only probe()/get_info()/convert() are replaced by a stub
+whose "ffmpeg" is a tracked child process (sleep), so leases, heartbeats,
+throttling and abort() behave as in production — no ffmpeg or video needed.
+
+While the jobs run, one worker is killed (SIGKILL) and another is frozen
+(SIGSTOP, longer than the lease, then SIGCONT). Checked afterwards:
+
+  • every job ends `done`, with a real output folder, and was finished
+    (stub convert ran to the end) exactly once
+  • the killed worker's job is retried exactly once, and only after its
+    lease expired (≥ 2/3 lease after the kill: heartbeats run every lease/3)
+  • the frozen worker's job is retried exactly once; the frozen worker
+    aborts its copy when it wakes up instead of finishing it a second time
+    (only the last attempt may finish — possibly by the same worker, which
+    can re-claim the job right after aborting)
+  • all other jobs ran once
+
+Usage:
+  python3 check_queue_workers.py                    # 3 workers, 8 jobs
+  python3 check_queue_workers.py --workers 4 --jobs 12 --lease 2 --job-seconds 3
+Exit code 0 = all checks passed.
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+HERE = Path(__file__).resolve().parent
+
+
+# —————————————————————————————————————————————————————————————————————
+# Worker side (this script re-run with --as-worker)
+# —————————————————————————————————————————————————————————————————————
+def stub_worker(events: Path, job_seconds: float, argv: List[str]):
+    sys.path.insert(0, str(HERE))
+    import convert_homohs_to_mp4 as conv
+
+    def log(event: str, src: Path, **extra) -> float:
+        now = time.time()
+        with open(events, "a") as f:
+            f.write(json.dumps({"t": now, "event": event, "src": str(src),
+                                "pid": os.getpid(), **extra}) + "\n")
+        return now
+
+    def convert(src, out_dir, info, debug=False, limits=None):
+        started = log("start", src)
+        # stands in for ffmpeg: a child process tracked (and killable) through limits
+        conv.run_cmd([sys.executable, "-c", f"import time; time.sleep({job_seconds})"],
+                     limits=limits, check=True)
+        (out_dir / f"{src.stem}.mp4").write_bytes(b"stub")
+        log("done", src, started=started)        # which copy (attempt) got to the end
+
+    conv.probe = lambda path, debug=False: {}
+    conv.get_info = lambda data, path: {"can_convert": True, "v_codec": "HUFFYUV",
+                                        "a_codec": "NONE", "duration_s": job_seconds}
+    conv.convert = convert
+    conv.worker_main(argv)
+
+
+# —————————————————————————————————————————————————————————————————————
+# Driver
+# —————————————————————————————————————————————————————————————————————
+def running_jobs(queue) -> List[dict]:
+    return [dict(j) for j in queue.jobs() if j["status"] == "running"]
+
+
+def wait_for(cond, timeout: float, poll: float = 0.05):
+    end = time.time() + timeout
+    while time.time() < end:
+        value = cond()
+        if value:
+            return value
+        time.sleep(poll)
+    return None
+
+
+def run_check(args, tmp: Path) -> List[str]:
+    from conversion_queue import JobQueue
+
+    src_dir, out_root = tmp / "sources", tmp / "converted"
+    src_dir.mkdir()
+    events, queue_path = tmp / "events.jsonl", tmp / "convert.queue"
+    queue = JobQueue(queue_path)
+    for i in range(args.jobs):
+        src = src_dir / f"clip_{i:02d}.homohs"
+        src.write_bytes(b"x")
+        queue.enqueue(src, src.stem, out_root, {}, max_attempts=3)
+
+    workers: Dict[int, subprocess.Popen] = {}
+    for i in range(args.workers):
+        log = open(tmp / f"worker_{i}.log", "w")
+        cmd = [sys.executable, __file__, "--as-worker", str(events), str(args.job_seconds),
+               "worker", "-q", str(queue_path), "--lease", str(args.lease),
+               "--poll", "0.2", "--exit-when-empty"]
+        # own session → killpg reaches the worker *and* its stub ffmpeg
+        proc = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+        workers[proc.pid] = proc
+
+    # two different workers, each 0.5 s into a job
+    busy = wait_for(lambda: (lambda r: r if len({j["worker"] for j in r}) >= 2 else None)(
+        running_jobs(queue)), timeout=30)
+    if not busy:
+        return ["fewer than two jobs ever ran at the same time"]
+    time.sleep(0.5)
+    pid_of = lambda job: int(job["worker"].rsplit(":", 1)[1])
+    killed, frozen = busy[0], next(j for j in busy if j["worker"] != busy[0]["worker"])
+    print(f"[CHECK] kill   worker {killed['worker']} on job {killed['id']}")
+    print(f"[CHECK] freeze worker {frozen['worker']} on job {frozen['id']} for {2 * args.lease:g} s")
+    kill_time = time.time()
+    os.killpg(pid_of(killed), signal.SIGKILL)
+    os.killpg(pid_of(frozen), signal.SIGSTOP)
+    time.sleep(2 * args.lease)                 # lease expires, another worker re-claims it
+    os.killpg(pid_of(frozen), signal.SIGCONT)
+
+    deadline = time.time() + args.timeout
+    for pid, proc in workers.items():
+        if pid == pid_of(killed):
+            proc.wait()
+            continue
+        try:
+            proc.wait(timeout=max(1.0, deadline - time.time()))
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            return [f"worker {pid} did not exit within {args.timeout:g} s"]
+
+    # —— Checks ——
+    errors = []
+    log = [json.loads(line) for line in events.read_text().splitlines()]
+    jobs = {j["id"]: dict(j) for j in queue.jobs()}
+    for job in jobs.values():
+        starts = [e for e in log if e["src"] == job["src"] and e["event"] == "start"]
+        dones = [e for e in log if e["src"] == job["src"] and e["event"] == "done"]
+        name = f"job {job['id']} ({Path(job['src']).name})"
+        if job["status"] != "done":
+            errors.append(f"{name}: status {job['status']} ({job['error']})")
+        if not job["out_dir"] or not (Path(job["out_dir"]) / f"{Path(job['src']).stem}.mp4").is_file():
+            errors.append(f"{name}: output folder {job['out_dir']!r} has no output")
+        if len(dones) != 1:
+            errors.append(f"{name}: finished {len(dones)}× (expected exactly once)")
+        expected = 2 if job["id"] in (killed["id"], frozen["id"]) else 1
+        if job["attempts"] != expected or len(starts) != expected:
+            errors.append(f"{name}: {job['attempts']} attempt(s), {len(starts)} start(s), expected {expected}")
+        if job["id"] == killed["id"] and len(starts) == 2:
+            waited = starts[1]["t"] - kill_time
+            if waited < args.lease * 2 / 3 - 0.1:
+                errors.append(f"{name}: retried {waited:.2f} s after the kill, before its lease expired")
+            print(f"[CHECK] killed job retried {waited:.2f} s after the kill (lease {args.lease:g} s)")
+        if len(starts) == 2 and len(dones) == 1 and dones[0]["started"] != starts[-1]["t"]:
+            errors.append(f"{name}: the first copy still finished after losing its lease")
+    return errors
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--as-worker":
+        stub_worker(Path(sys.argv[2]), float(sys.argv[3]), sys.argv[5:])
+        return
+
+    parser = argparse.ArgumentParser(description="Check the conversion queue with several local workers")
+    parser.add_argument("--workers", type=int, default=3, help="Worker processes (≥ 3, default: 3)")
+    parser.add_argument("--jobs", type=int, default=8, help="Queued jobs (default: 8)")
+    parser.add_argument("--lease", type=float, default=2.0, help="Lease in seconds (default: 2)")
+    parser.add_argument("--job-seconds", type=float, default=3.0,
+                        help="Stub conversion time, > lease (default: 3)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Give up after this many seconds")
+    parser.add_argument("--keep", action="store_true", help="Keep the temp folder (queue, logs)")
+    args = parser.parse_args()
+    if args.workers < 3 or args.jobs < args.workers or args.job_seconds <= args.lease:
+        parser.error("need --workers ≥ 3, --jobs ≥ --workers and --job-seconds > --lease")
+
+    tmp = Path(tempfile.mkdtemp(prefix="queue_check_"))
+    t0 = time.time()
+    errors = run_check(args, tmp)
+    print(f"[CHECK] {args.jobs} jobs on {args.workers} workers in {time.time() - t0:.1f} s")
+    for e in errors:
+        print(f"   ✗ {e}")
+    if errors:
+        print(f"FAILED – queue, events and worker logs kept in {tmp}")
+        sys.exit(1)
+    print("   ✓ every job done exactly once, killed + frozen jobs retried once after lease expiry")
+    if args.keep:
+        print(f"→ kept {tmp}")
+    else:
+        import shutil
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
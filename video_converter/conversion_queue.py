@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Title: Shared Conversion Queue (SQLite, no broker)
+Author: G.M
+Date: 18 Oct 2026
+Version: 1.0
+
+A job queue in one SQLite file on the shared filesystem. Any number of
+`convert_homohs_to_mp4.py worker` processes (on any box that sees the
+storage) claim jobs with a lease, keep it alive with heartbeats, and
+write results into the normal output hierarchy.
+
+  • Claim       → BEGIN IMMEDIATE (file lock) → oldest queued job → running + lease
+  • Heartbeat   → extends the lease every lease/3 seconds
+  • Worker dies → lease expires → job is re-queued for the next claim
+  • Lease lost  → a stalled worker's next heartbeat fails → it kills its
+                  ffmpeg and drops the job (complete() refuses it too)
+  • Failures    → retried until max_attempts, then marked failed
+
+Rollback journal (not WAL): WAL needs shared memory and breaks on network
+filesystems; the rollback journal only needs working POSIX locks.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    src          TEXT NOT NULL,
+    title        TEXT NOT NULL,
+    out_root     TEXT NOT NULL,
+    options      TEXT NOT NULL DEFAULT '{}',
+    status       TEXT NOT NULL DEFAULT 'queued',   -- queued | running | done | failed
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    worker       TEXT,
+    lease_until  REAL,
+    enqueued     REAL NOT NULL,
+    started      REAL,
+    finished     REAL,
+    out_dir      TEXT,
+    error        TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, id);
+"""
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue:
+    def __init__(self, path: Path, timeout: float = 60.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None → we issue BEGIN/COMMIT ourselves
+        self.db = sqlite3.connect(str(self.path), timeout=timeout, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=DELETE")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    @contextmanager
+    def _tx(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.db
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+
+    # —— Producer ——
+    def enqueue(self, src: Path, title: str, out_root: Path, options: Optional[Dict] = None,
+                max_attempts: int = 3) -> Optional[int]:
+        """Add a job unless the same source is already queued/running/done for this output root."""
+        with self._tx() as db:
+            dup = db.execute(
+                "SELECT id FROM jobs WHERE src=? AND out_root=? AND status != 'failed'",
+                (str(src), str(out_root))).fetchone()
+            if dup:
+                return None
+            cur = db.execute(
+                "INSERT INTO jobs (src, title, out_root, options, max_attempts, enqueued) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (str(src), title, str(out_root), json.dumps(options or {}), max_attempts, time.time()))
+            return cur.lastrowid
+
+    # —— Worker ——
+    def _reap(self, db, now: float):
+        """Expired leases → worker died: retry or give up."""
+        db.execute(
+            "UPDATE jobs SET status='failed', worker=NULL, finished=?, "
+            "error=COALESCE(error, '') || 'lease expired (worker died)' "
+            "WHERE status='running' AND lease_until < ? AND attempts >= max_attempts",
+            (now, now))
+        db.execute(
+            "UPDATE jobs SET status='queued', worker=NULL "
+            "WHERE status='running' AND lease_until < ?", (now,))
+
+    def claim(self, worker: str, lease: float) -> Optional[sqlite3.Row]:
+        now = time.time()
+        with self._tx() as db:
+            self._reap(db, now)
+            row = db.execute(
+                "SELECT id FROM jobs WHERE status='queued' ORDER BY id LIMIT 1").fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE jobs SET status='running', worker=?, lease_until=?, started=?, "
+                "attempts=attempts+1 WHERE id=?",
+                (worker, now + lease, now, row["id"]))
+            return db.execute("SELECT * FROM jobs WHERE id=?", (row["id"],)).fetchone()
+
+    def heartbeat(self, job_id: int, worker: str, lease: float) -> bool:
+        """False → lease was lost (expired and re-queued); the worker should stop."""
+        with self._tx() as db:
+            cur = db.execute(
+                "UPDATE jobs SET lease_until=? WHERE id=? AND worker=? AND status='running'",
+                (time.time() + lease, job_id, worker))
+            return cur.rowcount == 1
+
+    def complete(self, job_id: int, worker: str, out_dir: Path) -> bool:
+        """False → this worker no longer holds the job (lease lost); nothing was recorded."""
+        with self._tx() as db:
+            cur = db.execute(
+                "UPDATE jobs SET status='done', finished=?, out_dir=?, lease_until=NULL, error=NULL "
+                "WHERE id=? AND worker=? AND status='running'",
+                (time.time(), str(out_dir), job_id, worker))
+            return cur.rowcount == 1
+
+    def fail(self, job_id: int, worker: str, error: str, retry: bool = True):
+        """Re-queue for another attempt, or mark failed (attempts used up / retry=False)."""
+        give_up = "1" if not retry else "attempts >= max_attempts"
+        with self._tx() as db:
+            db.execute(
+                f"UPDATE jobs SET status=CASE WHEN {give_up} THEN 'failed' ELSE 'queued' END, "
+                "worker=NULL, lease_until=NULL, error=?, "
+                f"finished=CASE WHEN {give_up} THEN ? ELSE NULL END "
+                "WHERE id=? AND worker=?",
+                (error[-2000:], time.time(), job_id, worker))
+
+    # —— Status ——
+    def reap(self):
+        with self._tx() as db:
+            self._reap(db, time.time())
+
+    def counts(self) -> Dict[str, int]:
+        self.reap()
+        rows = self.db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+    def jobs(self) -> List[sqlite3.Row]:
+        return self.db.execute("SELECT * FROM jobs ORDER BY id").fetchall()
+
+    def pending(self) -> int:
+        """Jobs that may still need work (queued or running)."""
+        row = self.db.execute(
+            "SELECT COUNT(*) AS n FROM jobs WHERE status IN ('queued', 'running')").fetchone()
+        return row["n"]
@@ -16,22 +16,53 @@ v2.0 → v3.0 (UNIVERSAL)
   • ADDED: Table shows Container, Video Codec, Audio, Bitrate
   • ADDED: Smart conversion (lossless → CRF 17, lossy → copy if possible)
   • ADDED: Fallback: if ffprobe fails → shows file size + hex preview
+
+v3.1 (CUT)
+  • ADDED: `cut` mode → extract time / frame ranges without converting the whole file
+  • ADDED: Stream copy when cut points sit on keyframes (always for all-intra HuffYUV/FFV1)
+  • ADDED: Input-side seeking + one ffmpeg pass for all ranges of a source
+
+v3.2 (WORKERS)
+  • ADDED: --workers, --nice, --ionice, --cpus, --readers-per-device
+  • ADDED: --throttle-file → fewer workers (surplus ffmpeg paused) while acquisition runs
+
+v3.3 (RESUME)
+  • ADDED: --resume → encode in numbered segments + resume.json journal,
+    continue from the last complete segment, concat into faststart MP4
+    (video-only segments; audio is encoded once over the whole source)
+  • ADDED: Ctrl-C → clean exit with a resume hint
+
+v3.4 (QUEUE)
+  • ADDED: `enqueue` / `worker` / `status` modes → shared SQLite job queue,
+    leases + heartbeats, retry on worker death, no broker needed
+  • Heartbeat on a busy database ("database is locked") → retried next
+    beat; only a lost lease stops the running ffmpeg
 ═══════════════════════════════════════════════════════════════════════════════
 """
 
 import argparse
 import hashlib
 import json
+import os
+import shutil
+import sqlite3
 import subprocess
 import sys
+import threading
+import time
+import traceback
 from datetime import datetime
+from fractions import Fraction
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 
 from rich.console import Console
 from rich.table import Table
 from rich.prompt import Prompt, Confirm
 
+from conversion_queue import JobQueue, worker_id
+from worker_resources import IONICE_CLASSES, JobAborted, ResourceLimits, parse_cpus
+
 console = Console()
 
 # No extension limit — we'll use ffprobe to validate
@@ -43,12 +74,36 @@ SAFE_EXTS = {
     ".AVI", ".MP4", ".MKV", ".MOV", ".WMV", ".FLV", ".WEBM"
 }
 
-def run_cmd(cmd: List[str], capture: bool = True) -> str:
-    try:
-        result = subprocess.run(cmd, capture_output=capture, text=True, check=True)
-        return result.stdout + result.stderr if capture else ""
-    except subprocess.CalledProcessError as e:
-        return e.stderr or "FFmpeg failed."
+# Sources that are re-encoded at near-lossless quality
+LOSSLESS_CODECS = {"huffyuv", "ffv1", "v210", "rawvideo"}
+
+# Every frame is a keyframe → any cut point can be stream-copied
+INTRA_ONLY_CODECS = LOSSLESS_CODECS | {"ffvhuff", "mjpeg", "prores", "utvideo"}
+
+# The mp4 muxer has no tag for these → stream copies / FFV1 go into .mov (same ISO-BMFF family)
+MP4_CODECS = {"h264", "hevc", "mpeg4", "av1"}
+
+def run_cmd(cmd: List[str], capture: bool = True, limits: Optional[ResourceLimits] = None,
+            check: bool = False) -> str:
+    pipe = subprocess.PIPE if capture else None
+    with subprocess.Popen(cmd, stdout=pipe, stderr=pipe, text=True) as proc:
+        if limits:
+            limits.track(proc)
+        try:
+            out, err = proc.communicate()
+        except BaseException:
+            proc.kill()     # Ctrl-C / error → don't leave ffmpeg running (Popen.__exit__ waits on it)
+            raise
+        finally:
+            if limits:
+                limits.untrack(proc)
+    if limits and limits.aborted.is_set():
+        raise JobAborted(f"{cmd[0]} killed: job aborted")
+    if proc.returncode != 0:
+        if check:
+            raise subprocess.CalledProcessError(proc.returncode, cmd, out, err)
+        return err or "FFmpeg failed."
+    return out + err if capture else ""
 
 def probe(file_path: Path, debug: bool = False) -> Optional[Dict]:
     cmd = [
@@ -116,6 +171,7 @@ def get_info(data: Optional[Dict], path: Path) -> Dict:
         "bitrate": br_str,
         "size": f"{path.stat().st_size // (1024*1024)} MB",
         "path": path,
+        "duration_s": float(duration) if duration else None,
         "can_convert": bool(video)
     }
 
@@ -194,12 +250,14 @@ def menu(files: List[Dict]) -> List[Dict]:
         else:
             console.print("[yellow]Invalid. Use a, q, or number from table.[/yellow]")
 
+def safe_title(title: str) -> str:
+    return "".join(c if c.isalnum() or c in " _-" else "_" for c in title)[:60]
+
 def output_dir(root: Path, title: str) -> Path:
     now = datetime.now()
     d = now.strftime("%d%b%Y")
     t = now.strftime("%Hh%Mm%Ss")
-    safe = "".join(c if c.isalnum() or c in " _-" else "_" for c in title)[:60]
-    p = root / d / t / safe
+    p = root / d / t / safe_title(title)
     p.mkdir(parents=True, exist_ok=True)
     return p
 
@@ -209,30 +267,28 @@ def md5(f: Path) -> str:
         for c in iter(lambda: fp.read(8192), b""): h.update(c)
     return h.hexdigest()
 
-def convert(src: Path, out_dir: Path, info: Dict, debug: bool = False):
-    out_file = out_dir / f"{src.stem}.mp4"
-    log_file = out_dir / "conversion.log"
-
-    # Smart encoding
+def video_args(info: Dict) -> List[str]:
+    """Smart encoding: -c:v arguments for a probed source."""
     vcodec = info["v_codec"].lower()
-    is_lossless = vcodec in ["huffyuv", "ffv1", "v210", "rawvideo"]
-
-    cmd = ["ffmpeg", "-i", str(src)]
-
-    if is_lossless:
+    if vcodec in LOSSLESS_CODECS:
         # Lossless source → re-encode to high quality H.264
-        cmd += [
+        return [
             "-c:v", "libx264", "-preset", "slow", "-crf", "17",
             "-profile:v", "high", "-pix_fmt", "yuv420p",
             "-bf", "2", "-g", "25", "-coder", "1"
         ]
-    else:
-        # Already lossy → stream copy if H.264/AAC
-        if vcodec == "h264" and info["container"] in ["MP4", "MOV"]:
-            cmd += ["-c:v", "copy"]
-        else:
-            cmd += ["-c:v", "libx264", "-preset", "medium", "-crf", "23"]
+    # Already lossy → stream copy if H.264/AAC
+    if vcodec == "h264" and info["container"] in ["MP4", "MOV"]:
+        return ["-c:v", "copy"]
+    return ["-c:v", "libx264", "-preset", "medium", "-crf", "23"]
 
+def convert(src: Path, out_dir: Path, info: Dict, debug: bool = False,
+            limits: Optional[ResourceLimits] = None):
+    out_file = out_dir / f"{src.stem}.mp4"
+    log_file = out_dir / "conversion.log"
+
+    cmd = ["ffmpeg", "-i", str(src)]
+    cmd += video_args(info)
     cmd += ["-c:a", "aac" if info["a_codec"] != "NONE" else "-an",
             "-movflags", "+faststart", "-y", str(out_file)]
 
@@ -241,7 +297,7 @@ def convert(src: Path, out_dir: Path, info: Dict, debug: bool = False):
 
     console.print(f"\n[bold blue]→ {out_file.name}[/]")
     start = datetime.now()
-    logs = run_cmd(cmd, capture=debug)
+    logs = run_cmd(cmd, capture=debug, limits=limits)
     end = datetime.now()
 
     with open(log_file, "w") as f:
@@ -253,6 +309,448 @@ def convert(src: Path, out_dir: Path, info: Dict, debug: bool = False):
 
     console.print(f"[bold green]SUCCESS → {out_file.stat().st_size // (1024*1024)} MB[/]")
 
+# =============================================================================
+# Resumable (segmented) conversion
+# =============================================================================
+JOURNAL = "resume.json"
+
+def write_journal(path: Path, journal: Dict):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(journal, indent=2))
+    os.replace(tmp, path)   # atomic → journal is never half-written
+
+def find_resume_dir(root: Path, title: str, src: Path) -> Optional[Path]:
+    """Newest unfinished job dir for this exact source file (same path, size, mtime)."""
+    st = src.stat()
+    for journal_path in sorted(root.glob(f"*/*/{safe_title(title)}/{JOURNAL}"),
+                               key=lambda p: p.stat().st_mtime, reverse=True):
+        try:
+            j = json.loads(journal_path.read_text())
+        except (OSError, json.JSONDecodeError):
+            continue
+        if (j.get("source") == str(src) and j.get("size") == st.st_size
+                and j.get("mtime") == st.st_mtime and not j.get("done")):
+            return journal_path.parent
+    return None
+
+def convert_resumable(src: Path, root: Path, title: str, info: Dict, debug: bool = False,
+                      limits: Optional[ResourceLimits] = None, segment_s: float = 60.0) -> Path:
+    """Segmented convert(); returns the output folder it used."""
+    v_args = video_args(info)
+    duration = info.get("duration_s")
+    if not duration or v_args[-1] == "copy":
+        # Stream copy is already fast; unknown duration can't be segmented
+        out_dir = output_dir(root, title)
+        convert(src, out_dir, info, debug, limits)
+        return out_dir
+
+    out_dir = find_resume_dir(root, title, src)
+    resumed = out_dir is not None
+    out_dir = out_dir or output_dir(root, title)
+    seg_dir = out_dir / "segments"
+    seg_dir.mkdir(exist_ok=True)
+    journal_path = out_dir / JOURNAL
+    out_file = out_dir / f"{src.stem}.mp4"
+
+    fps = frame_rate(info)
+    if fps:
+        # Whole frames per segment → no dropped/duplicated frames at the seams
+        seg_frames = max(1, round(segment_s * fps))
+        n_frames = round(duration * fps)
+        bounds = [(f / fps, min(seg_frames, n_frames - f)) for f in range(0, n_frames, seg_frames)]
+    else:
+        n_seg = int(-(-duration // segment_s))
+        bounds = [(k * segment_s, None) for k in range(n_seg)]
+
+    st = src.stat()
+    journal = json.loads(journal_path.read_text()) if resumed else {
+        "source": str(src), "size": st.st_size, "mtime": st.st_mtime,
+        "video_args": v_args, "segments": len(bounds), "completed": [], "done": False,
+        "started": datetime.now().isoformat(),
+    }
+    if resumed and (journal.get("segments") != len(bounds) or journal.get("video_args") != v_args):
+        console.print(f"[yellow]Journal settings changed → restarting {src.name}[/]")
+        journal.update(video_args=v_args, segments=len(bounds), completed=[])
+    done = set(journal["completed"])
+    write_journal(journal_path, journal)
+
+    console.print(f"\n[bold blue]→ {out_file.name}[/] [dim]({len(bounds)} segments"
+                  f"{f', resuming at {len(done)}' if resumed else ''})[/]")
+    # Segments are video-only: audio is encoded once over the whole source at
+    # the final mux (per-segment AAC adds priming silence at every join)
+    has_audio = info["a_codec"] != "NONE"
+    a_args = ["-c:a", "aac"] if has_audio else ["-an"]
+    start = datetime.now()
+    for k, (seg_start, seg_len) in enumerate(bounds):
+        seg = seg_dir / f"seg_{k:05d}.mp4"
+        if k in done and seg.exists():
+            continue
+        part = seg_dir / f"seg_{k:05d}.part.mp4"
+        cmd = ["ffmpeg", "-y", "-ss", f"{seg_start:.6f}"]
+        cmd += ["-t", f"{segment_s:.6f}"] if seg_len is None else []
+        cmd += ["-i", str(src)] + v_args + ["-an"]
+        cmd += ["-frames:v", str(seg_len)] if seg_len is not None else []
+        cmd += [str(part)]
+        if debug:
+            cmd.insert(1, "-loglevel"); cmd.insert(2, "debug")
+        run_cmd(cmd, capture=True, limits=limits, check=True)
+        os.replace(part, seg)
+        done.add(k)
+        journal["completed"] = sorted(done)
+        write_journal(journal_path, journal)
+        console.print(f"[dim]  segment {k + 1}/{len(bounds)} ✓[/]")
+
+    # Concat demuxer (video stream copy) + the source's audio → one faststart MP4
+    list_file = seg_dir / "segments.txt"
+    list_file.write_text("".join(f"file 'seg_{k:05d}.mp4'\n" for k in range(len(bounds))))
+    cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", str(list_file)]
+    cmd += ["-i", str(src), "-map", "0:v:0", "-map", "1:a:0"] if has_audio else []
+    cmd += ["-c:v", "copy"] + a_args + ["-movflags", "+faststart", str(out_file)]
+    logs = run_cmd(cmd, capture=True, limits=limits, check=True)
+    end = datetime.now()
+
+    journal.update(done=True, finished=end.isoformat())
+    write_journal(journal_path, journal)
+    shutil.rmtree(seg_dir)
+
+    with open(out_dir / "conversion.log", "w") as f:
+        f.write(f"Start: {start.isoformat()}\nEnd: {end.isoformat()}\n")
+        f.write(f"Mode: segmented ({len(bounds)} x {segment_s:g}s, resumed={resumed})\n")
+        f.write(f"Segment command: ffmpeg -ss <t> -i {src} {' '.join(v_args)} -an\n")
+        f.write(f"Concat command: {' '.join(cmd)}\n\n{logs}\n")
+        f.write(f"Input MD5:  {md5(src)}\n")
+        f.write(f"Output MD5: {md5(out_file)}\n")
+        f.write(f"Size: {out_file.stat().st_size // (1024*1024)} MB\n")
+
+    console.print(f"[bold green]SUCCESS → {out_file.stat().st_size // (1024*1024)} MB[/]")
+    return out_dir
+
+# =============================================================================
+# Cut (sub-clip extraction)
+# =============================================================================
+def parse_timestamp(text: str) -> float:
+    """'12.5', '01:30' or '00:01:30.250' → seconds."""
+    secs = 0.0
+    for part in text.strip().split(":"):
+        secs = secs * 60 + float(part)
+    return secs
+
+def parse_range(text: str, frames: bool = False) -> Tuple[float, float]:
+    """'START-END' → (start, end). Frame ranges are start-inclusive, end-exclusive."""
+    try:
+        a, b = text.split("-", 1)
+        start = int(a) if frames else parse_timestamp(a)
+        end = int(b) if frames else parse_timestamp(b)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Bad range '{text}' (expected START-END)")
+    if end <= start:
+        raise argparse.ArgumentTypeError(f"Empty range '{text}'")
+    return start, end
+
+def frame_rate(info: Dict) -> Optional[float]:
+    try:
+        fps = float(Fraction(info["fps"]))
+    except (ValueError, ZeroDivisionError):
+        return None
+    return fps or None
+
+def keyframe_times(src: Path) -> List[float]:
+    """Timestamps of all video keyframes (only decodes keyframes)."""
+    cmd = [
+        "ffprobe", "-v", "error", "-select_streams", "v:0", "-skip_frame", "nokey",
+        "-show_entries", "frame=pts_time", "-of", "csv=p=0", str(src)
+    ]
+    times = []
+    for line in run_cmd(cmd).splitlines():
+        try:
+            times.append(float(line.strip().rstrip(",")))
+        except ValueError:
+            pass
+    return times
+
+def cut_plan(info: Dict, starts: List[float], target: str) -> Tuple[bool, str]:
+    """Decide stream copy vs re-encode → (copy, output suffix)."""
+    vcodec = info["v_codec"].lower()
+    same_codec = (
+        target == "lossless"
+        or (target == "ffv1" and vcodec == "ffv1")
+        or (target == "h264" and vcodec == "h264")
+    )
+    if same_codec:
+        if vcodec in INTRA_ONLY_CODECS:
+            aligned = True
+        else:
+            fps = frame_rate(info) or 25.0
+            keys = keyframe_times(info["path"])
+            aligned = bool(keys) and all(
+                any(abs(k - s) <= 0.5 / fps for k in keys) for s in starts
+            )
+        if aligned:
+            return True, ".mp4" if vcodec in MP4_CODECS else ".mov"
+    if target == "h264":
+        return False, ".mp4"
+    # Lossless target that can't be copied → intra-only FFV1 keeps it lossless
+    return False, ".mov"
+
+def cut(src: Path, out_dir: Path, info: Dict, ranges: List[Tuple[float, float]],
+        frame_ranges: List[Tuple[int, int]], target: str = "h264", debug: bool = False):
+    """Extract all ranges from one source in a single ffmpeg pass."""
+    fps = frame_rate(info)
+    if frame_ranges and not fps:
+        console.print("[red]Frame ranges need a known frame rate.[/red]")
+        sys.exit(1)
+
+    # (start s, duration s, frame count or None, label)
+    clips = [(a, b - a, None, f"{a:.3f}-{b:.3f}s") for a, b in ranges]
+    clips += [(a / fps, (b - a) / fps, b - a, f"f{a}-{b}") for a, b in frame_ranges]
+
+    copy, suffix = cut_plan(info, [c[0] for c in clips], target)
+    if copy:
+        v_args = ["-c:v", "copy"]
+    elif target == "h264":
+        v_args = video_args(info) if info["v_codec"].lower() != "h264" else \
+            ["-c:v", "libx264", "-preset", "medium", "-crf", "23"]
+    else:
+        v_args = ["-c:v", "ffv1", "-level", "3", "-g", "1"]
+    has_audio = info["a_codec"] != "NONE"
+    a_args = (["-c:a", "copy" if copy else "aac"] if has_audio else ["-an"])
+
+    # Input-side seeking: one -ss/-t input per range → decoding starts near each range
+    cmd = ["ffmpeg"]
+    for start, dur, _, _ in clips:
+        cmd += ["-ss", f"{start:.6f}", "-t", f"{dur:.6f}", "-i", str(src)]
+
+    outputs = []
+    for i, (start, dur, n_frames, label) in enumerate(clips):
+        out_file = out_dir / f"{src.stem}_cut{i + 1:02d}_{label}{suffix}"
+        cmd += ["-map", f"{i}:v:0"] + (["-map", f"{i}:a:0?"] if has_audio else [])
+        cmd += v_args + a_args
+        if n_frames is not None:
+            cmd += ["-frames:v", str(n_frames)]
+        cmd += ["-movflags", "+faststart", str(out_file)]
+        outputs.append(out_file)
+    cmd.insert(1, "-y")
+    if debug:
+        cmd.insert(1, "-loglevel"); cmd.insert(2, "debug")
+
+    mode = "stream copy" if copy else "re-encode"
+    console.print(f"\n[bold blue]✂ {src.name} → {len(clips)} clip(s) ({mode})[/]")
+    start_t = datetime.now()
+    logs = run_cmd(cmd, capture=debug)
+    end_t = datetime.now()
+
+    with open(out_dir / "cut.log", "w") as f:
+        f.write(f"Start: {start_t.isoformat()}\nEnd: {end_t.isoformat()}\n")
+        f.write(f"Mode: {mode}\nCommand: {' '.join(cmd)}\n\n{logs}\n")
+        f.write(f"Input MD5:  {md5(src)}\n")
+        for out_file in outputs:
+            if out_file.exists():
+                f.write(f"{out_file.name}: MD5 {md5(out_file)}, "
+                        f"{out_file.stat().st_size // (1024*1024)} MB\n")
+            else:
+                f.write(f"{out_file.name}: MISSING\n")
+
+    for out_file in outputs:
+        if out_file.exists():
+            console.print(f"[green]  ✓ {out_file.name}[/]")
+        else:
+            console.print(f"[red]  ✗ {out_file.name} (see cut.log)[/]")
+
+def cut_main(argv: List[str]):
+    cut_parser = argparse.ArgumentParser(
+        prog="convert_homohs_to_mp4.py cut",
+        description="Extract time / frame ranges from one video (one ffmpeg pass)")
+    cut_parser.add_argument("path", help="Source file")
+    cut_parser.add_argument("-r", "--range", dest="ranges", action="append", default=[],
+                            type=parse_range, help="Time range START-END (s, MM:SS or HH:MM:SS.mmm)")
+    cut_parser.add_argument("-f", "--frames", dest="frame_ranges", action="append", default=[],
+                            type=lambda t: parse_range(t, frames=True),
+                            help="Frame range START-END (end exclusive)")
+    cut_parser.add_argument("-t", "--target", choices=["h264", "lossless", "ffv1"], default="h264",
+                            help="h264 → .mp4 (default); lossless/ffv1 → .mov")
+    cut_parser.add_argument("-o", "--output", default="converted_videos")
+    cut_parser.add_argument("--debug", action="store_true")
+    cut_args = cut_parser.parse_args(argv)
+
+    src = Path(cut_args.path).expanduser().resolve()
+    if not src.is_file():
+        console.print(f"[red]Not a file: {src}[/red]")
+        sys.exit(1)
+    if not cut_args.ranges and not cut_args.frame_ranges:
+        cut_parser.error("give at least one --range or --frames")
+
+    info = get_info(probe(src, cut_args.debug), src)
+    if not info["can_convert"]:
+        console.print(f"[red]No video stream: {src.name}[/red]")
+        sys.exit(1)
+
+    root = Path(cut_args.output).expanduser().resolve()
+    root.mkdir(exist_ok=True)
+    out_dir = output_dir(root, f"{src.stem}_cut")
+    cut(src, out_dir, info, cut_args.ranges, cut_args.frame_ranges,
+        cut_args.target, cut_args.debug)
+    console.print(f"\n[bold green]DONE! → {out_dir}[/]")
+
+# =============================================================================
+# Queue (enqueue / worker / status)
+# =============================================================================
+def add_priority_args(p: argparse.ArgumentParser):
+    g = p.add_argument_group("process priority")
+    g.add_argument("--nice", type=int, default=None, help="Niceness increment, e.g. 10")
+    g.add_argument("--ionice", choices=list(IONICE_CLASSES), default=None, help="I/O class (Linux)")
+    g.add_argument("--cpus", type=parse_cpus, default=None,
+                   help="CPU affinity, e.g. 4-15 to keep cores 0–3 for acquisition (Linux)")
+
+def enqueue_main(argv: List[str]):
+    p = argparse.ArgumentParser(prog="convert_homohs_to_mp4.py enqueue",
+                                description="Add every candidate file under PATH to a shared queue")
+    p.add_argument("path", help="Folder or file")
+    p.add_argument("-q", "--queue", type=Path, required=True, help="Queue file on shared storage")
+    p.add_argument("-o", "--output", default="converted_videos")
+    p.add_argument("--resume", action="store_true", help="Workers use segmented --resume encodes")
+    p.add_argument("--segment-seconds", type=float, default=60.0)
+    p.add_argument("--max-attempts", type=int, default=3)
+    q_args = p.parse_args(argv)
+
+    src_root = Path(q_args.path).expanduser().resolve()
+    if not src_root.exists():
+        console.print(f"[red]Path not found: {src_root}[/red]")
+        sys.exit(1)
+    root = Path(q_args.output).expanduser().resolve()
+    options = {"resume": q_args.resume, "segment_seconds": q_args.segment_seconds}
+
+    queue = JobQueue(q_args.queue)
+    added = skipped = 0
+    for f in find_files(src_root):
+        job = queue.enqueue(f, f.name.rsplit(".", 1)[0], root, options, q_args.max_attempts)
+        if job is None:
+            skipped += 1
+        else:
+            added += 1
+    console.print(f"[green]Queued {added} job(s)[/] [dim]({skipped} already in queue) → {q_args.queue}[/]")
+
+def heartbeat_loop(queue_path: Path, job_id: int, me: str, lease: float, stop: threading.Event,
+                   limits: ResourceLimits):
+    hb = None   # own connection: sqlite3 connections are per-thread
+    try:
+        while not stop.wait(lease / 3):
+            try:
+                if hb is None:
+                    # busy timeout below the beat interval: a locked database is retried
+                    # on the next tick, well before the lease runs out
+                    hb = JobQueue(queue_path, timeout=lease / 3)
+                alive = hb.heartbeat(job_id, me, lease)
+            except sqlite3.OperationalError as e:
+                # e.g. "database is locked" (other workers on shared storage): the lease
+                # is not lost — only heartbeat() returning False means that
+                console.print(f"[yellow]Heartbeat for job {job_id} failed ({e}) – retrying.[/yellow]")
+                continue
+            if not alive:
+                # The job is back in the queue → stop our ffmpeg before another worker
+                # writes the same output / segment dir
+                console.print(f"[red]Lease lost on job {job_id} – aborting it here.[/red]")
+                limits.abort()
+                return
+    finally:
+        if hb is not None:
+            hb.close()
+
+def run_job(queue: JobQueue, job, me: str, lease: float, debug: bool,
+            limits: ResourceLimits):
+    """Convert one claimed job; raises JobAborted when its lease was lost (not completed)."""
+    src = Path(job["src"])
+    options = json.loads(job["options"])
+    console.print(f"\n[bold cyan]Job {job['id']}[/] {src.name} "
+                  f"[dim](attempt {job['attempts']}/{job['max_attempts']})[/]")
+    stop = threading.Event()
+    limits.aborted.clear()
+    hb = threading.Thread(target=heartbeat_loop, daemon=True,
+                          args=(queue.path, job["id"], me, lease, stop, limits))
+    hb.start()
+    try:
+        if not src.is_file():
+            queue.fail(job["id"], me, f"source not found: {src}", retry=False)
+            return
+        info = get_info(probe(src, debug), src)
+        if not info["can_convert"]:
+            queue.fail(job["id"], me, "not a convertible video", retry=False)
+            return
+        root = Path(job["out_root"])
+        root.mkdir(parents=True, exist_ok=True)
+        if options.get("resume"):
+            out_dir = convert_resumable(src, root, job["title"], info, debug, limits,
+                                        options.get("segment_seconds", 60.0))
+        else:
+            out_dir = output_dir(root, job["title"])
+            convert(src, out_dir, info, debug, limits)
+        if limits.aborted.is_set() or not queue.complete(job["id"], me, out_dir):
+            raise JobAborted(f"lease on job {job['id']} lost")
+    except JobAborted:
+        raise
+    except Exception:
+        queue.fail(job["id"], me, traceback.format_exc())
+        console.print(f"[red]Job {job['id']} failed (will retry if attempts remain)[/red]")
+    finally:
+        stop.set()
+        hb.join()
+
+def worker_main(argv: List[str]):
+    p = argparse.ArgumentParser(prog="convert_homohs_to_mp4.py worker",
+                                description="Claim and convert jobs from a shared queue")
+    p.add_argument("-q", "--queue", type=Path, required=True, help="Queue file on shared storage")
+    p.add_argument("--lease", type=float, default=120.0,
+                   help="Seconds without heartbeat before a job is handed to another worker")
+    p.add_argument("--poll", type=float, default=5.0, help="Idle poll interval (s)")
+    p.add_argument("--exit-when-empty", action="store_true",
+                   help="Stop once nothing is queued or running")
+    p.add_argument("--debug", action="store_true")
+    add_priority_args(p)
+    w_args = p.parse_args(argv)
+
+    limits = ResourceLimits(nice=w_args.nice, ionice=w_args.ionice, cpus=w_args.cpus,
+                            log=lambda msg: console.print(f"[yellow]{msg}[/yellow]"))
+    limits.apply_to_self()
+    queue = JobQueue(w_args.queue)
+    me = worker_id()
+    console.print(f"[bold]Worker {me}[/] → {w_args.queue} [dim]({limits.describe()})[/]")
+
+    done = 0
+    while True:
+        job = queue.claim(me, w_args.lease)
+        if job is None:
+            if w_args.exit_when_empty and queue.pending() == 0:
+                break
+            time.sleep(w_args.poll)
+            continue
+        try:
+            run_job(queue, job, me, w_args.lease, w_args.debug, limits)
+        except JobAborted as e:
+            console.print(f"[yellow]Job {job['id']} abandoned ({e}) – its new owner finishes it.[/yellow]")
+            continue
+        done += 1
+    console.print(f"[bold green]Worker {me} finished – {done} job(s) handled.[/]")
+
+def status_main(argv: List[str]):
+    p = argparse.ArgumentParser(prog="convert_homohs_to_mp4.py status")
+    p.add_argument("-q", "--queue", type=Path, required=True)
+    s_args = p.parse_args(argv)
+    if not s_args.queue.exists():
+        console.print(f"[red]Queue not found: {s_args.queue}[/red]")
+        sys.exit(1)
+
+    queue = JobQueue(s_args.queue)
+    counts = queue.counts()
+    table = Table(title=f"Queue {s_args.queue.name}")
+    for col in ["ID", "File", "Status", "Attempts", "Worker", "Output"]:
+        table.add_column(col)
+    colors = {"queued": "yellow", "running": "cyan", "done": "green", "failed": "red"}
+    for j in queue.jobs():
+        table.add_row(str(j["id"]), Path(j["src"]).name,
+                      f"[{colors[j['status']]}]{j['status']}[/]",
+                      f"{j['attempts']}/{j['max_attempts']}", j["worker"] or "", j["out_dir"] or "")
+    console.print(table)
+    console.print(" • ".join(f"{k}: {v}" for k, v in sorted(counts.items())))
+
 # =============================================================================
 # Main
 # =============================================================================
@@ -260,9 +758,39 @@ parser = argparse.ArgumentParser(description="Convert ANY video → MP4")
 parser.add_argument("path", help="Folder or file")
 parser.add_argument("-o", "--output", default="converted_videos")
 parser.add_argument("--debug", action="store_true")
-args = parser.parse_args()
+parser.add_argument("--resume", action="store_true",
+                    help="Segmented, crash-safe encode that continues where it stopped")
+parser.add_argument("--segment-seconds", type=float, default=60.0,
+                    help="Segment length for --resume (default: 60)")
+res = parser.add_argument_group("worker resources (keep acquisition free)")
+res.add_argument("-w", "--workers", type=int, default=1, help="Concurrent conversions (default: 1)")
+res.add_argument("--readers-per-device", type=int, default=None,
+                 help="Max concurrent source readers per disk")
+res.add_argument("--throttle-file", type=Path, default=None,
+                 help="While this file exists, run only --throttle-workers jobs")
+res.add_argument("--throttle-workers", type=int, default=1,
+                 help="Worker count while throttled (0 = pause all, default: 1)")
+add_priority_args(parser)
+
+def limits_from_args(args) -> ResourceLimits:
+    return ResourceLimits(
+        workers=args.workers, nice=args.nice, ionice=args.ionice, cpus=args.cpus,
+        readers_per_device=args.readers_per_device,
+        throttle_file=args.throttle_file.expanduser() if args.throttle_file else None,
+        throttle_workers=args.throttle_workers,
+        log=lambda msg: console.print(f"[yellow]{msg}[/yellow]"))
+
+MODES = {"cut": cut_main, "enqueue": enqueue_main, "worker": worker_main, "status": status_main}
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in MODES:
+        MODES[sys.argv[1]](sys.argv[2:])
+        return
+
+    args = parser.parse_args()
+    limits = limits_from_args(args)
+    limits.apply_to_self()
+
     p = Path(args.path).expanduser().resolve()
     if not p.exists():
         console.print(f"[red]Path not found: {p}[/red]")
@@ -286,12 +814,23 @@ def main():
     root = Path(args.output).expanduser().resolve()
     root.mkdir(exist_ok=True)
 
-    for item in to_convert:
+    def convert_item(item: Dict):
         title = item["file"].rsplit(".", 1)[0]
-        out_dir = output_dir(root, title)
-        convert(item["path"], out_dir, item, args.debug)
+        if args.resume:
+            convert_resumable(item["path"], root, title, item, args.debug, limits,
+                              args.segment_seconds)
+        else:
+            convert(item["path"], output_dir(root, title), item, args.debug, limits)
+
+    console.print(f"[dim]Resources: {limits.describe()}[/dim]")
+    limits.run(to_convert, convert_item)
 
     console.print(f"\n[bold green]DONE! → {root}[/]")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    except KeyboardInterrupt:
+        console.print("\n[red]Interrupted by user.[/red] "
+                      "[dim]Segmented jobs continue with --resume.[/dim]")
+        sys.exit(130)
\ No newline at end of file
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Title: Conversion Worker Resource Controls
+Author: G.M
+Date: 18 Oct 2026
+Version: 1.0
+
+Keeps background conversion out of the way of camera acquisition on the
+same workstation:
+  • nice / ionice class for the converter and every ffmpeg it starts
+  • CPU affinity (e.g. --cpus 4-15 → cores 0–3 stay free for acquisition)
+  • Max concurrent disk readers per device
+  • "Acquisition active" throttle: while the flag file exists, the worker
+    count drops to --throttle-workers and surplus ffmpeg jobs are paused
+    (SIGSTOP) until the flag is removed
+  • abort(): kill the running ffmpeg (e.g. a queue worker lost its lease);
+    run_cmd() then raises JobAborted instead of finishing the job
+  • run(): Ctrl-C or an exception ends the batch through abort(), so a
+    paused ffmpeg cannot keep it waiting forever
+
+Linux gets all controls; on macOS/Windows the unsupported ones are skipped
+with a warning.
+"""
+
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+IONICE_CLASSES = {"realtime": "1", "best-effort": "2", "idle": "3"}
+
+
+class JobAborted(Exception):
+    """The running job was cancelled with ResourceLimits.abort()."""
+
+
+def parse_cpus(text: str) -> Set[int]:
+    """'4-7,10' → {4, 5, 6, 7, 10}"""
+    cpus = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            a, b = part.split("-", 1)
+            cpus.update(range(int(a), int(b) + 1))
+        else:
+            cpus.add(int(part))
+    if not cpus:
+        raise ValueError(f"No CPUs in '{text}'")
+    return cpus
+
+
+class ResourceLimits:
+    def __init__(self, workers: int = 1, nice: Optional[int] = None,
+                 ionice: Optional[str] = None, cpus: Optional[Set[int]] = None,
+                 readers_per_device: Optional[int] = None,
+                 throttle_file: Optional[Path] = None, throttle_workers: int = 1,
+                 poll: float = 1.0, log: Callable[[str], None] = print):
+        self.workers = max(1, workers)
+        self.nice = nice
+        self.ionice = ionice
+        self.cpus = cpus
+        self.readers_per_device = readers_per_device
+        self.throttle_file = throttle_file
+        self.throttle_workers = max(0, throttle_workers)
+        self.poll = poll
+        self.log = log
+
+        self._cond = threading.Condition()
+        self._running = 0
+        self._throttled = False
+        self._device_slots: Dict[int, threading.BoundedSemaphore] = {}
+        self._procs: List[subprocess.Popen] = []   # start order → newest paused first
+        self._paused: Set[int] = set()
+        self._stop = threading.Event()
+        self.aborted = threading.Event()           # set by abort(), cleared per job by the caller
+
+    # —— Process-level controls (inherited by ffprobe / ffmpeg children) ——
+    def apply_to_self(self):
+        if self.nice:
+            try:
+                os.nice(self.nice)
+            except (AttributeError, OSError) as e:
+                self.log(f"nice not applied: {e}")
+        if self.cpus:
+            if hasattr(os, "sched_setaffinity"):
+                try:
+                    os.sched_setaffinity(0, self.cpus)
+                except OSError as e:
+                    self.log(f"CPU affinity not applied: {e}")
+            else:
+                self.log("CPU affinity not supported on this platform")
+        if self.ionice:
+            if sys.platform.startswith("linux") and shutil.which("ionice"):
+                cmd = ["ionice", "-c", IONICE_CLASSES[self.ionice], "-p", str(os.getpid())]
+                if subprocess.run(cmd, capture_output=True).returncode != 0:
+                    self.log("ionice not applied (realtime needs root)")
+            else:
+                self.log("ionice not available on this platform")
+
+    def describe(self) -> str:
+        parts = [f"workers={self.workers}"]
+        if self.nice:
+            parts.append(f"nice=+{self.nice}")
+        if self.ionice:
+            parts.append(f"ionice={self.ionice}")
+        if self.cpus:
+            parts.append(f"cpus={','.join(map(str, sorted(self.cpus)))}")
+        if self.readers_per_device:
+            parts.append(f"readers/device={self.readers_per_device}")
+        if self.throttle_file:
+            parts.append(f"throttle={self.throttle_file} → {self.throttle_workers}")
+        return " • ".join(parts)
+
+    # —— Disk readers per device ——
+    @contextmanager
+    def reader_slot(self, path: Path):
+        if not self.readers_per_device:
+            yield
+            return
+        dev = path.stat().st_dev
+        with self._cond:
+            sem = self._device_slots.setdefault(
+                dev, threading.BoundedSemaphore(self.readers_per_device))
+        with sem:
+            yield
+
+    # —— Acquisition throttle ——
+    def allowed_workers(self) -> int:
+        return min(self.workers, self.throttle_workers) if self._throttled else self.workers
+
+    def track(self, proc: subprocess.Popen):
+        with self._cond:
+            self._procs.append(proc)
+        if self.aborted.is_set():
+            proc.kill()                            # started after abort() → never let it run
+        self._rebalance()
+
+    def untrack(self, proc: subprocess.Popen):
+        with self._cond:
+            if proc in self._procs:
+                self._procs.remove(proc)
+            if proc.pid in self._paused:
+                # a stopped ffmpeg never acts on SIGINT/SIGTERM and would block wait() forever
+                self._paused.discard(proc.pid)
+                try:
+                    os.kill(proc.pid, signal.SIGCONT)
+                except ProcessLookupError:
+                    pass
+        self._rebalance()
+
+    def abort(self):
+        """Kill every tracked ffmpeg, paused ones included (SIGKILL also ends stopped processes)."""
+        self.aborted.set()
+        with self._cond:
+            procs = list(self._procs)
+        for proc in procs:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+
+    def _rebalance(self):
+        """Pause the newest ffmpeg jobs beyond the allowed count, resume the rest."""
+        if not hasattr(signal, "SIGSTOP"):
+            return
+        with self._cond:
+            allowed = self.allowed_workers()
+            for i, proc in enumerate(self._procs):
+                want_paused = i >= allowed
+                if want_paused == (proc.pid in self._paused) or proc.poll() is not None:
+                    continue
+                try:
+                    os.kill(proc.pid, signal.SIGSTOP if want_paused else signal.SIGCONT)
+                except ProcessLookupError:
+                    continue
+                if want_paused:
+                    self._paused.add(proc.pid)
+                else:
+                    self._paused.discard(proc.pid)
+
+    def _monitor(self):
+        while not self._stop.wait(self.poll):
+            active = self.throttle_file.exists()
+            if active != self._throttled:
+                with self._cond:
+                    self._throttled = active
+                    self._cond.notify_all()
+                self.log(f"Acquisition {'ACTIVE → throttling to' if active else 'idle → back to'} "
+                         f"{self.allowed_workers()} worker(s)")
+                self._rebalance()
+
+    # —— Job slots ——
+    @contextmanager
+    def job_slot(self):
+        with self._cond:
+            while self._running >= self.allowed_workers():
+                self._cond.wait(self.poll)
+            self._running += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._cond.notify_all()
+
+    def run(self, items: list, fn: Callable, path_of: Callable = lambda item: item["path"]):
+        """Run fn(item) for every item on up to `workers` threads, honouring all limits."""
+        def job(item):
+            with self.job_slot(), self.reader_slot(path_of(item)):
+                return fn(item)
+
+        monitor = None
+        if self.throttle_file:
+            self._throttled = self.throttle_file.exists()
+            monitor = threading.Thread(target=self._monitor, daemon=True)
+            monitor.start()
+        self.aborted.clear()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                try:
+                    return list(pool.map(job, items))
+                except BaseException:
+                    # Ctrl-C / a failed job: kill every ffmpeg (paused ones included) and drop
+                    # the queued items first — the pool's exit waits for its running jobs
+                    self.abort()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+        finally:
+            self._stop.set()
+            if monitor:
+                monitor.join()
+            self._stop.clear()